@@ -36,6 +36,11 @@ else
     echo -e "${RED}[!] Error: omarchy-control.py not found in current folder!${NC}"
 fi
 
+if [ -f "hyprland-descriptions.json" ]; then
+    cp hyprland-descriptions.json "$HOME/.config/hypr/"
+    echo -e "${GREEN}[+] hyprland-descriptions.json -> ~/.config/hypr/${NC}"
+fi
+
 
 DESKTOP_FILE="$HOME/.local/share/applications/omarchy-settings.desktop"
 
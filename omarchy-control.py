@@ -6,422 +6,3921 @@ Version 3.2 - Shadow Bug Fixed
 """
 
 import gi
+import sys
+import os
+import argparse
+from pathlib import Path
+from gi.repository import Gio, GLib
+
+SETTINGS_APP_ID = 'com.omarchy.settings'
+SETTINGS_OBJECT_PATH = '/com/omarchy/settings'
+SETTINGS_INTERFACE = 'com.omarchy.Settings'
+# Commands answered by a running daemon over D-Bus
+CLIENT_COMMANDS = ('get', 'set', 'apply', 'watch')
+
+
+def build_arg_parser():
+    """Command line for the GUI, the daemon and its client commands"""
+    arg_parser = argparse.ArgumentParser(prog='omarchy-control.py',
+                                         description="Omarchy Settings")
+    arg_parser.add_argument('--daemon', action='store_true',
+                            help="keep running in the background and serve settings over D-Bus")
+    arg_parser.add_argument('--config-dir', help="Hyprland config directory (default ~/.config/hypr)")
+    commands = arg_parser.add_subparsers(dest='command')
+    get_cmd = commands.add_parser('get', help="print one setting, or all of them")
+    get_cmd.add_argument('key', nargs='?')
+    set_cmd = commands.add_parser('set', help="stage settings as key=value")
+    set_cmd.add_argument('assignments', nargs='+', metavar='key=value')
+    set_cmd.add_argument('--apply', action='store_true', help="apply right away")
+    commands.add_parser('apply', help="write staged settings")
+    commands.add_parser('watch', help="print settings as they change")
+    fleet_cmd = commands.add_parser('fleet', help="apply a profile to many config directories")
+    fleet_cmd.add_argument('profile', help="JSON object of settings and option paths")
+    fleet_cmd.add_argument('roots', nargs='*', metavar='config-dir')
+    fleet_cmd.add_argument('--roots-from', metavar='FILE',
+                           help="file with one config directory per line, optionally followed by reload")
+    fleet_cmd.add_argument('--jobs', type=int, help="worker processes (default: one per CPU)")
+    fleet_cmd.add_argument('--reload', action='store_true', help="reload Hyprland after every changed root")
+    fleet_cmd.add_argument('--dry-run', action='store_true', help="report and diff without writing")
+    fleet_cmd.add_argument('--diff', action='store_true', help="print each root's diff")
+    fleet_cmd.add_argument('--report', metavar='JSON', help="write the per-root report here")
+    autostart_cmd = commands.add_parser('autostart', help="list exec-once/exec entries, or profile them")
+    autostart_cmd.add_argument('--profile', action='store_true',
+                               help="start each of your enabled exec-once entries in a sandbox, "
+                                    "measure it, stop it, rank them")
+    autostart_cmd.add_argument('--timeout', type=float,
+                               help="seconds to wait for one entry to settle (default 10)")
+    autostart_cmd.add_argument('--json', action='store_true', help="print the profile as JSON")
+    autostart_cmd.add_argument('--yes', action='store_true',
+                               help="profile without asking for confirmation first")
+    return arg_parser
+
+
+def default_config_dir():
+    """Hyprland config directory, overridable with OMARCHY_CONFIG_DIR"""
+    override = os.environ.get('OMARCHY_CONFIG_DIR')
+    if override:
+        return Path(override).expanduser()
+    return Path.home() / ".config" / "hypr"
+
+
+def _settings_proxy():
+    """Connect to a running settings daemon (or GUI) on the session bus"""
+    bus = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+    return Gio.DBusProxy.new_sync(
+        bus, Gio.DBusProxyFlags.DO_NOT_AUTO_START, None,
+        SETTINGS_APP_ID, SETTINGS_OBJECT_PATH, SETTINGS_INTERFACE, None
+    )
+
+
+def run_client(args):
+    """Thin command line client for the settings daemon"""
+    try:
+        proxy = _settings_proxy()
+        if args.config_dir:
+            wanted = Path(args.config_dir).expanduser().resolve()
+            served = Path(proxy.call_sync('ConfigDir', None, Gio.DBusCallFlags.NONE, 5000,
+                                          None).unpack()[0]).resolve()
+            if served != wanted:
+                print(f"⚠️ The running daemon edits {served}, not {wanted}", file=sys.stderr)
+                print("Stop it first, or leave out --config-dir", file=sys.stderr)
+                return 2
+        if args.command == 'get':
+            if args.key:
+                print(proxy.call_sync('Get', GLib.Variant('(s)', (args.key,)),
+                                      Gio.DBusCallFlags.NONE, 5000, None).unpack()[0])
+            else:
+                snapshot = proxy.call_sync('Subscribe', None, Gio.DBusCallFlags.NONE, 5000, None).unpack()[0]
+                for key in sorted(snapshot):
+                    print(f"{key} = {snapshot[key]}")
+        elif args.command == 'set':
+            for assignment in args.assignments:
+                key, _, value = assignment.partition('=')
+                proxy.call_sync('Set', GLib.Variant('(ss)', (key.strip(), value.strip())),
+                                Gio.DBusCallFlags.NONE, 5000, None)
+            if args.apply:
+                ok = proxy.call_sync('Apply', None, Gio.DBusCallFlags.NONE, 30000, None).unpack()[0]
+                return 0 if ok else 1
+        elif args.command == 'apply':
+            ok = proxy.call_sync('Apply', None, Gio.DBusCallFlags.NONE, 30000, None).unpack()[0]
+            return 0 if ok else 1
+        elif args.command == 'watch':
+            for key, value in sorted(proxy.call_sync(
+                    'Subscribe', None, Gio.DBusCallFlags.NONE, 5000, None).unpack()[0].items()):
+                print(f"{key} = {value}")
+            proxy.connect('g-signal', lambda p, sender, signal, params:
+                          print("{} = {}".format(*params.unpack()), flush=True))
+            GLib.MainLoop().run()
+        return 0
+    except GLib.Error as e:
+        print(f"⚠️ {e.message}", file=sys.stderr)
+        print("Is the daemon running? Start it with: omarchy-control.py --daemon", file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    # Client commands only need Gio; answer them before GTK and the rest are loaded
+    _args = build_arg_parser().parse_known_args(sys.argv[1:])[0]
+    if _args.command in CLIENT_COMMANDS:
+        sys.exit(run_client(_args))
+
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
-from gi.repository import Gtk, Adw, Gdk, Gio, GLib
-import sys
+gi.require_version('Gsk', '4.0')
+gi.require_version('Graphene', '1.0')
+from gi.repository import Gtk, Adw, Gdk, GdkPixbuf, GObject, Gsk, Graphene, Pango
 import re
 import subprocess
-from pathlib import Path
 import json
-import os
+import io
+import atexit
+import signal
+import threading
+import time
+import functools
+import importlib.util
+import importlib.metadata
+import contextlib
+import tempfile
+import shutil
+import glob
+import hashlib
+import fcntl
+import bisect
+import marshal
+import zlib
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
-class OmarchyConfigParser:
-    """Parse Omarchy/Hyprland configuration files"""
+
+class OmarchyTracer:
+    """Lightweight span recorder that exports Chrome/Perfetto trace files
+
+    Enabled by setting OMARCHY_TRACE to an output path (or to 1 for a file in
+    the temp directory). When disabled, spans are a shared no-op context and
+    the traced decorator returns functions untouched.
+    """
     
-    def __init__(self, config_dir):
-        self.config_dir = Path(config_dir)
-        self.looknfeel_path = self.config_dir / "looknfeel.conf"
-        self.input_path = self.config_dir / "input.conf"
-        self.bindings_path = self.config_dir / "bindings.conf"
-        
-    def parse_decoration_settings(self):
-        """Parse decoration block from looknfeel.conf"""
-        if not self.looknfeel_path.exists():
-            return self._default_decoration_settings()
-        
-        try:
-            content = self.looknfeel_path.read_text()
-            settings = {}
-            
-            blur_match = re.search(r'blur\s*{([^}]+)}', content, re.DOTALL)
-            if blur_match:
-                blur_content = blur_match.group(1)
-                settings['blur_enabled'] = 'enabled = true' in blur_content.lower() or 'enabled=true' in blur_content.lower()
-                
-                for key, pattern in [
-                    ('blur_size', r'size\s*=\s*(\d+)'),
-                    ('blur_passes', r'passes\s*=\s*(\d+)'),
-                ]:
-                    match = re.search(pattern, blur_content)
-                    if match:
-                        settings[key] = int(match.group(1))
-                
-                for key, pattern in [
-                    ('blur_noise', r'noise\s*=\s*([\d.]+)'),
-                    ('blur_contrast', r'contrast\s*=\s*([\d.]+)'),
-                    ('blur_brightness', r'brightness\s*=\s*([\d.]+)'),
-                    ('blur_vibrancy', r'vibrancy\s*=\s*([\d.]+)'),
-                    ('blur_vibrancy_darkness', r'vibrancy_darkness\s*=\s*([\d.]+)'),
-                ]:
-                    match = re.search(pattern, blur_content)
-                    if match:
-                        settings[key] = float(match.group(1))
-                
-                xray_match = re.search(r'xray\s*=\s*(true|false)', blur_content)
-                if xray_match:
-                    settings['blur_xray'] = xray_match.group(1) == 'true'
-                    
-                new_opt_match = re.search(r'new_optimizations\s*=\s*(true|false)', blur_content)
-                if new_opt_match:
-                    settings['blur_new_optimizations'] = new_opt_match.group(1) == 'true'
-            
-            rounding_match = re.search(r'rounding\s*=\s*(\d+)', content)
-            if rounding_match:
-                settings['rounding'] = int(rounding_match.group(1))
-                
-            shadow_match = re.search(r'shadow\s*{([^}]+)}', content, re.DOTALL)
-            if shadow_match:
-                shadow_content = shadow_match.group(1)
-                settings['shadow_enabled'] = 'enabled = true' in shadow_content.lower()
-                
-                range_match = re.search(r'range\s*=\s*(\d+)', shadow_content)
-                if range_match:
-                    settings['shadow_range'] = int(range_match.group(1))
-                    
-                power_match = re.search(r'render_power\s*=\s*(\d+)', shadow_content)
-                if power_match:
-                    settings['shadow_power'] = int(power_match.group(1))
-            
-            return settings
-        except Exception as e:
-            print(f"Error parsing decoration settings: {e}")
-            return self._default_decoration_settings()
+    ENV_VAR = 'OMARCHY_TRACE'
     
-    def parse_general_settings(self):
-        """Parse general block"""
-        if not self.looknfeel_path.exists():
-            return self._default_general_settings()
-        
+    def __init__(self, output_path=None):
+        self.output_path = Path(output_path) if output_path else None
+        self.enabled = self.output_path is not None
+        self.events = []
+        self._origin = time.perf_counter()
+        self._null_span = contextlib.nullcontext()
+        if self.enabled:
+            atexit.register(self.save)
+    
+    @classmethod
+    def from_environment(cls):
+        value = os.environ.get(cls.ENV_VAR, '').strip()
+        if not value or value == '0':
+            return cls()
+        if value == '1':
+            value = Path(tempfile.gettempdir()) / f"omarchy-trace-{os.getpid()}.json"
+        return cls(value)
+    
+    def _now_us(self):
+        return (time.perf_counter() - self._origin) * 1_000_000
+    
+    def span(self, name, category='app', **args):
+        """Context manager timing a block as one complete trace event"""
+        if not self.enabled:
+            return self._null_span
+        return self._record(name, category, args)
+    
+    @contextlib.contextmanager
+    def _record(self, name, category, args):
+        start = self._now_us()
         try:
-            content = self.looknfeel_path.read_text()
-            settings = {}
-            
-            general_match = re.search(r'general\s*{([^}]+)}', content, re.DOTALL)
-            if general_match:
-                general_content = general_match.group(1)
-                
-                for key, pattern in [
-                    ('gaps_in', r'gaps_in\s*=\s*(\d+)'),
-                    ('gaps_out', r'gaps_out\s*=\s*(\d+)'),
-                    ('border_size', r'border_size\s*=\s*(\d+)'),
-                ]:
-                    match = re.search(pattern, general_content)
-                    if match:
-                        settings[key] = int(match.group(1))
+            yield
+        finally:
+            self.events.append({
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': start,
+                'dur': self._now_us() - start,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+                'args': {k: str(v) for k, v in args.items()},
+            })
+    
+    def traced(self, name, category='app'):
+        """Decorator wrapping a function in a span, free when tracing is off"""
+        def decorator(func):
+            if not self.enabled:
+                return func
             
-            return settings
-        except Exception as e:
-            print(f"Error parsing general settings: {e}")
-            return self._default_general_settings()
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self._record(name, category, {}):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
     
-    def parse_input_settings(self):
-        """Parse input configuration"""
-        if not self.input_path.exists():
-            return self._default_input_settings()
-        
+    def save(self):
+        """Write collected spans in Chrome trace event format"""
+        if not self.enabled or not self.events:
+            return
         try:
-            content = self.input_path.read_text()
-            settings = {}
-            
-            input_match = re.search(r'input\s*{([^}]+)}', content, re.DOTALL)
-            if input_match:
-                input_content = input_match.group(1)
-                
-                kb_layout_match = re.search(r'kb_layout\s*=\s*([^\n]+)', input_content)
-                if kb_layout_match:
-                    layouts = kb_layout_match.group(1).strip()
-                    settings['kb_layout'] = layouts
-                
-                kb_options_match = re.search(r'kb_options\s*=\s*([^\n]+)', input_content)
-                if kb_options_match:
-                    settings['kb_options'] = kb_options_match.group(1).strip()
-                
-                repeat_rate_match = re.search(r'repeat_rate\s*=\s*(\d+)', input_content)
-                if repeat_rate_match:
-                    settings['repeat_rate'] = int(repeat_rate_match.group(1))
-                repeat_delay_match = re.search(r'repeat_delay\s*=\s*(\d+)', input_content)
-                if repeat_delay_match:
-                    settings['repeat_delay'] = int(repeat_delay_match.group(1))
-                
-                numlock_match = re.search(r'numlock_by_default\s*=\s*(true|false)', input_content)
-                if numlock_match:
-                    settings['numlock_by_default'] = numlock_match.group(1) == 'true'
-                
-                sensitivity_match = re.search(r'sensitivity\s*=\s*([-\d.]+)', input_content)
-                if sensitivity_match:
-                    settings['sensitivity'] = float(sensitivity_match.group(1))
-                
-                touchpad_match = re.search(r'touchpad\s*{([^}]+)}', input_content, re.DOTALL)
-                if touchpad_match:
-                    touchpad_content = touchpad_match.group(1)
-                    
-                    natural_scroll_match = re.search(r'natural_scroll\s*=\s*(true|false)', touchpad_content)
-                    if natural_scroll_match:
-                        settings['touchpad_natural_scroll'] = natural_scroll_match.group(1) == 'true'
-                    
-                    scroll_factor_match = re.search(r'scroll_factor\s*=\s*([\d.]+)', touchpad_content)
-                    if scroll_factor_match:
-                        settings['touchpad_scroll_factor'] = float(scroll_factor_match.group(1))
-            
-            return settings
+            trace = {'traceEvents': list(self.events), 'displayTimeUnit': 'ms'}
+            self.output_path.write_text(json.dumps(trace))
+            print(f"📈 Trace written to {self.output_path}")
         except Exception as e:
-            print(f"Error parsing input settings: {e}")
-            return self._default_input_settings()
+            print(f"⚠️ Could not write trace: {e}")
+
+
+tracer = OmarchyTracer.from_environment()
+
+
+# 'default' is Hyprland's own built-in value, used when no config file sets the key
+SETTINGS_SCHEMA = {
+    'blur_enabled': {'file': 'looknfeel', 'path': 'decoration:blur:enabled',
+                     'type': 'bool', 'default': True},
+    'blur_size': {'file': 'looknfeel', 'path': 'decoration:blur:size',
+                  'type': 'int', 'min': 1, 'max': 20, 'default': 8},
+    'blur_passes': {'file': 'looknfeel', 'path': 'decoration:blur:passes',
+                    'type': 'int', 'min': 1, 'max': 8, 'default': 1},
+    'blur_noise': {'file': 'looknfeel', 'path': 'decoration:blur:noise',
+                   'type': 'float', 'min': 0.0, 'max': 1.0, 'default': 0.0117},
+    'blur_contrast': {'file': 'looknfeel', 'path': 'decoration:blur:contrast',
+                      'type': 'float', 'min': 0.0, 'max': 2.0, 'default': 0.8916},
+    'blur_brightness': {'file': 'looknfeel', 'path': 'decoration:blur:brightness',
+                        'type': 'float', 'min': 0.0, 'max': 2.0, 'default': 0.8172},
+    'blur_vibrancy': {'file': 'looknfeel', 'path': 'decoration:blur:vibrancy',
+                      'type': 'float', 'min': 0.0, 'max': 1.0, 'default': 0.1696},
+    'blur_vibrancy_darkness': {'file': 'looknfeel', 'path': 'decoration:blur:vibrancy_darkness',
+                               'type': 'float', 'min': 0.0, 'max': 1.0, 'default': 0.0},
+    'blur_xray': {'file': 'looknfeel', 'path': 'decoration:blur:xray',
+                  'type': 'bool', 'default': False},
+    'blur_new_optimizations': {'file': 'looknfeel', 'path': 'decoration:blur:new_optimizations',
+                               'type': 'bool', 'default': True},
+    'rounding': {'file': 'looknfeel', 'path': 'decoration:rounding',
+                 'type': 'int', 'min': 0, 'max': 40, 'default': 0},
+    'shadow_enabled': {'file': 'looknfeel', 'path': 'decoration:shadow:enabled',
+                       'type': 'bool', 'default': True},
+    'shadow_range': {'file': 'looknfeel', 'path': 'decoration:shadow:range',
+                     'type': 'int', 'min': 0, 'max': 200, 'default': 4},
+    'shadow_power': {'file': 'looknfeel', 'path': 'decoration:shadow:render_power',
+                     'type': 'int', 'min': 1, 'max': 4, 'default': 3},
+    'gaps_in': {'file': 'looknfeel', 'path': 'general:gaps_in',
+                'type': 'int', 'min': 0, 'max': 30, 'default': 5},
+    'gaps_out': {'file': 'looknfeel', 'path': 'general:gaps_out',
+                 'type': 'int', 'min': 0, 'max': 30, 'default': 20},
+    'border_size': {'file': 'looknfeel', 'path': 'general:border_size',
+                    'type': 'int', 'min': 0, 'max': 10, 'default': 1},
+    'animations_enabled': {'file': 'looknfeel', 'path': 'animations:enabled',
+                           'type': 'bool', 'default': True},
+    'kb_layout': {'file': 'input', 'path': 'input:kb_layout',
+                  'type': 'layouts', 'max_items': 4, 'default': 'us'},
+    'kb_options': {'file': 'input', 'path': 'input:kb_options',
+                   'type': 'options', 'default': ''},
+    'repeat_rate': {'file': 'input', 'path': 'input:repeat_rate',
+                    'type': 'int', 'min': 10, 'max': 100, 'default': 25},
+    'repeat_delay': {'file': 'input', 'path': 'input:repeat_delay',
+                     'type': 'int', 'min': 200, 'max': 1000, 'default': 600},
+    'numlock_by_default': {'file': 'input', 'path': 'input:numlock_by_default',
+                           'type': 'bool', 'default': False},
+    'sensitivity': {'file': 'input', 'path': 'input:sensitivity',
+                    'type': 'float', 'min': -1.0, 'max': 1.0, 'default': 0.0},
+    'touchpad_natural_scroll': {'file': 'input', 'path': 'input:touchpad:natural_scroll',
+                                'type': 'bool', 'default': False},
+    'touchpad_scroll_factor': {'file': 'input', 'path': 'input:touchpad:scroll_factor',
+                               'type': 'float', 'min': 0.1, 'max': 2.0, 'default': 1.0},
+}
+
+SCHEMA_KEYS_BY_PATH = {entry['path']: key for key, entry in SETTINGS_SCHEMA.items()}
+
+DEVICE_SCHEMA = {
+    'sensitivity': {'type': 'float', 'min': -1.0, 'max': 1.0},
+    'accel_profile': {'type': 'string', 'choices': ('adaptive', 'flat')},
+    'kb_layout': {'type': 'layouts', 'max_items': 4},
+}
+
+DEVICE_KEYS_BY_KIND = {
+    'mice': ('sensitivity', 'accel_profile'),
+    'keyboards': ('kb_layout',),
+}
+
+HYPRLOCK_SCHEMA = {
+    'general:hide_cursor': {'type': 'bool'},
+    'general:ignore_empty_input': {'type': 'bool'},
+    'general:grace': {'type': 'int', 'min': 0, 'max': 3600},
+    'auth:fingerprint:enabled': {'type': 'bool'},
+    'background:blur_passes': {'type': 'int', 'min': 0, 'max': 10},
+    'background:blur_size': {'type': 'int', 'min': 0, 'max': 100},
+    'input-field:placeholder_text': {'type': 'string'},
+    'input-field:fail_text': {'type': 'string'},
+}
+
+HYPRIDLE_SCHEMA = {
+    'general:lock_cmd': {'type': 'string'},
+    'general:before_sleep_cmd': {'type': 'string'},
+    'general:after_sleep_cmd': {'type': 'string'},
+    'general:ignore_dbus_inhibit': {'type': 'bool'},
+}
+
+IDLE_LISTENER_SCHEMA = {
+    'timeout': {'type': 'int', 'min': 1, 'max': 86400},
+    'on-timeout': {'type': 'string'},
+    'on-resume': {'type': 'string'},
+}
+
+# Hyprland runs exec-once lines at login and exec lines on every reload
+AUTOSTART_KEYWORDS = ('exec-once', 'exec')
+DISABLED_EXEC_RE = re.compile(r'#+\s*(exec-once|exec)\s*=\s*(.*)$')
+
+
+def format_config_value(value):
+    """Format a Python value the way Hyprland config files write it"""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float):
+        text = f'{value:.4f}'.rstrip('0')
+        return text + '0' if text.endswith('.') else text
+    return str(value)
+
+
+
+class SettingsValidator:
+    """Validators compiled once per setting from SETTINGS_SCHEMA
     
-    def parse_animations_settings(self):
-        """Parse animations block"""
-        if not self.looknfeel_path.exists():
-            return self._default_animations_settings()
-        
-        try:
-            content = self.looknfeel_path.read_text()
-            settings = {}
-            
-            animations_match = re.search(r'animations\s*{([^}]+)}', content, re.DOTALL)
-            if animations_match:
-                anim_content = animations_match.group(1)
-                settings['animations_enabled'] = 'enabled = true' in anim_content.lower()
+    validate() checks a single edit; validate_all() checks a whole profile.
+    Both return messages instead of raising so the UI can show them inline.
+    """
+    
+    XKB_SYMBOLS_DIR = Path("/usr/share/X11/xkb/symbols")
+    LAYOUT_RE = re.compile(r'^[a-z][a-z0-9_-]{1,15}$')
+    OPTION_RE = re.compile(r'^[a-z0-9_]+:[A-Za-z0-9_]+$')
+    
+    def __init__(self, schema=None):
+        self.schema = SETTINGS_SCHEMA if schema is None else schema
+        self._known_layouts = None
+        self._validators = {key: self._compile(entry) for key, entry in self.schema.items()}
+    
+    def _compile(self, entry):
+        kind = entry.get('type', 'string')
+        low, high = entry.get('min'), entry.get('max')
+        
+        def check_range(value):
+            if low is not None and value < low:
+                return f"must be at least {low}"
+            if high is not None and value > high:
+                return f"must be at most {high}"
+            return None
+        
+        if kind == 'bool':
+            return lambda value: None if isinstance(value, bool) else "must be true or false"
+        if kind == 'int':
+            def check_int(value):
+                if isinstance(value, bool) or not isinstance(value, int):
+                    return "must be a whole number"
+                return check_range(value)
+            return check_int
+        if kind == 'float':
+            def check_float(value):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    return "must be a number"
+                return check_range(value)
+            return check_float
+        if kind == 'layouts':
+            max_items = entry.get('max_items')
             
-            return settings
-        except Exception as e:
-            print(f"Error parsing animations: {e}")
-            return self._default_animations_settings()
+            def check_layouts(value):
+                layouts = [part.strip() for part in str(value).split(',')]
+                if not all(layouts):
+                    return "has an empty layout"
+                if max_items and len(layouts) > max_items:
+                    return f"allows at most {max_items} layouts"
+                known = self.known_layouts()
+                for layout in layouts:
+                    if not self.LAYOUT_RE.match(layout):
+                        return f"'{layout}' is not a layout code"
+                    if known and layout not in known:
+                        return f"unknown keyboard layout '{layout}'"
+                return None
+            return check_layouts
+        if kind == 'options':
+            def check_options(value):
+                for option in filter(None, (part.strip() for part in str(value).split(','))):
+                    if not self.OPTION_RE.match(option):
+                        return f"'{option}' is not an XKB option (group:name)"
+                return None
+            return check_options
+        if 'choices' in entry:
+            choices = entry['choices']
+            return lambda value: None if value in choices else f"must be one of {', '.join(choices)}"
+        return lambda value: None if '\n' not in str(value) else "must fit on one line"
     
-    def _default_decoration_settings(self):
-        return {
-            'blur_enabled': True,
-            'blur_size': 10,
-            'blur_passes': 4,
-            'blur_noise': 0.01,
-            'blur_contrast': 1.3,
-            'blur_brightness': 1.1,
-            'blur_vibrancy': 0.6,
-            'blur_vibrancy_darkness': 0.2,
-            'blur_xray': False,
-            'blur_new_optimizations': True,
-            'rounding': 20,
-            'shadow_enabled': True,
-            'shadow_range': 30,
-            'shadow_power': 3,
-        }
+    def known_layouts(self):
+        """XKB layout names installed on this system, read once"""
+        if self._known_layouts is None:
+            try:
+                self._known_layouts = frozenset(
+                    p.name for p in self.XKB_SYMBOLS_DIR.iterdir() if p.is_file()
+                )
+            except OSError:
+                self._known_layouts = frozenset()
+        return self._known_layouts
     
-    def _default_general_settings(self):
-        return {
-            'gaps_in': 5,
-            'gaps_out': 10,
-            'border_size': 2,
-        }
+    def validate(self, key, value):
+        """Return an error message for one setting, or None"""
+        validator = self._validators.get(key)
+        if validator is None:
+            return None
+        return validator(value)
     
-    def _default_input_settings(self):
-        return {
-            'kb_layout': 'us,ara',
-            'kb_options': 'grp:alt_shift_toggle',
-            'repeat_rate': 40,
-            'repeat_delay': 600,
-            'numlock_by_default': True,
-            'sensitivity': 0.0,
-            'touchpad_natural_scroll': False,
-            'touchpad_scroll_factor': 0.4,
-        }
+    def validate_all(self, settings):
+        """Return {key: message} for every invalid value in a profile"""
+        errors = {}
+        for key, value in settings.items():
+            error = self.validate(key, value)
+            if error:
+                errors[key] = error
+        return errors
+
+
+settings_validator = SettingsValidator()
+device_validator = SettingsValidator(DEVICE_SCHEMA)
+idle_listener_validator = SettingsValidator(IDLE_LISTENER_SCHEMA)
+
+
+def mark_setting_widget(widget, error):
+    """Show or clear a validation error on the row holding a widget"""
+    row = widget if isinstance(widget, Adw.ActionRow) else widget.get_ancestor(Adw.ActionRow)
+    target = row or widget
+    if error:
+        target.add_css_class("error")
+        target.set_tooltip_text(error)
+    else:
+        target.remove_css_class("error")
+        target.set_tooltip_text(None)
+
+
+
+class BezierCurve:
+    """A Hyprland bezier curve with a precomputed easing lookup table
     
-    def _default_animations_settings(self):
-        return {
-            'animations_enabled': True,
-        }
+    The cubic is sampled once per distinct set of control points into a
+    table of progress values at evenly spaced times. Previews and scrubbing
+    only interpolate in that table; nothing re-evaluates the cubic per frame.
+    """
+    
+    __slots__ = ('name', 'x1', 'y1', 'x2', 'y2')
+    
+    SAMPLES = 256
+    
+    def __init__(self, name, x1, y1, x2, y2):
+        self.name = name
+        self.x1, self.y1, self.x2, self.y2 = float(x1), float(y1), float(x2), float(y2)
+    
+    @classmethod
+    def from_config(cls, value):
+        """Parse 'NAME, X0, Y0, X1, Y1' from a bezier = line"""
+        parts = [part.strip() for part in value.split(',')]
+        if len(parts) != 5:
+            raise ValueError(f"bezier needs a name and 4 points: {value}")
+        return cls(parts[0], *parts[1:])
+    
+    def to_config(self):
+        points = ', '.join(format_config_value(round(v, 3)) for v in self.points)
+        return f"{self.name}, {points}"
+    
+    @property
+    def points(self):
+        return (self.x1, self.y1, self.x2, self.y2)
+    
+    @property
+    def table(self):
+        return self.lookup_table(*self.points)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def lookup_table(x1, y1, x2, y2, samples=SAMPLES):
+        """Progress at samples+1 evenly spaced times, computed once per curve"""
+        x1 = min(max(x1, 0.0), 1.0)
+        x2 = min(max(x2, 0.0), 1.0)
+        steps = samples * 4
+        curve_x = []
+        curve_y = []
+        for i in range(steps + 1):
+            t = i / steps
+            u = 1 - t
+            curve_x.append(3 * u * u * t * x1 + 3 * u * t * t * x2 + t ** 3)
+            curve_y.append(3 * u * u * t * y1 + 3 * u * t * t * y2 + t ** 3)
+        
+        table = []
+        j = 0
+        for i in range(samples + 1):
+            x = i / samples
+            while j < steps and curve_x[j + 1] < x:
+                j += 1
+            x0, xa = curve_x[j], curve_x[min(j + 1, steps)]
+            y0, ya = curve_y[j], curve_y[min(j + 1, steps)]
+            ratio = 0.0 if xa == x0 else (x - x0) / (xa - x0)
+            table.append(y0 + (ya - y0) * min(max(ratio, 0.0), 1.0))
+        return tuple(table)
+    
+    DEFAULT = None
+    
+    def value_at(self, progress):
+        """Eased progress for a time fraction, by table interpolation"""
+        table = self.table
+        position = min(max(progress, 0.0), 1.0) * (len(table) - 1)
+        index = int(position)
+        if index >= len(table) - 1:
+            return table[-1]
+        return table[index] + (table[index + 1] - table[index]) * (position - index)
 
 
+BezierCurve.DEFAULT = BezierCurve('default', 0.0, 0.75, 0.15, 1.0)
 
-class OmarchyConfigWriter:
-    """Write settings back to Omarchy/Hyprland configuration files"""
+
+def parse_animation_line(value):
+    """Parse 'NAME, ONOFF, SPEED, CURVE[, STYLE]' from an animation = line"""
+    parts = [part.strip() for part in value.split(',')]
+    animation = {
+        'name': parts[0],
+        'enabled': len(parts) > 1 and parts[1] == '1',
+        'speed': float(parts[2]) if len(parts) > 2 and parts[2] else 1.0,
+        'curve': parts[3] if len(parts) > 3 else 'default',
+        'style': ', '.join(parts[4:]),
+    }
+    return animation
+
+
+def format_animation_line(animation):
+    parts = [animation['name'], '1' if animation['enabled'] else '0',
+             format_config_value(float(animation['speed'])), animation['curve']]
+    if animation.get('style'):
+        parts.append(animation['style'])
+    return ', '.join(parts)
+
+
+
+class HyprConfNode:
+    """One line of a hyprlang file in the concrete syntax tree"""
+
+    __slots__ = (
+        'kind', 'start', 'end', 'line', 'indent', 'key', 'path',
+        'value', 'value_start', 'value_end', 'parent', 'block_key', 'close',
+    )
+
+    def __init__(self, kind, start, end, line, indent, parent):
+        self.kind = kind
+        self.start = start
+        self.end = end
+        self.line = line
+        self.indent = indent
+        self.parent = parent
+        self.key = None
+        self.path = None
+        self.value = None
+        self.value_start = None
+        self.value_end = None
+        self.block_key = None
+        self.close = None
+
+    def __repr__(self):
+        return f"<HyprConfNode {self.kind} {self.path or ''} line {self.line}>"
+
+
+
+class HyprConfDocument:
+    """Round-trip-preserving concrete syntax tree for hyprlang config files
+
+    Every line becomes a node that remembers its byte range, so comments,
+    whitespace and ordering survive untouched. Edits are recorded as splices
+    over the original text and only the changed ranges are rewritten.
+    """
+
+    _ASSIGN_RE = re.compile(r'([^\s={}#][^=#{}]*?)\s*=')
+    _OPEN_RE = re.compile(r'([A-Za-z0-9_.:\-]+)(?:\[([^\]]*)\])?\s*\{\s*$')
+
+    def __init__(self, text, path=None):
+        self.text = text
+        self.path = Path(path) if path else None
+        self.nodes = []
+        self.blocks = []
+        self._index = {}
+        self._splices = {}
+        self._inserts = {}
+        self._indent_unit = None
+        self._line_starts = None
+        self._digest = None
+        self._parse()
+
+    @classmethod
+    def load(cls, path):
+        path = Path(path)
+        return cls(path.read_text(), path)
+
+    def _parse(self):
+        """Single pass over the text building line nodes and the path index"""
+        text = self.text
+        stack = []
+        pos = 0
+        line_no = 0
+        length = len(text)
+
+        while pos < length:
+            line_no += 1
+            newline = text.find('\n', pos)
+            end = length if newline == -1 else newline + 1
+            raw = text[pos:end].rstrip('\n')
+            stripped = raw.strip()
+            indent = raw[:len(raw) - len(raw.lstrip())]
+            parent = stack[-1] if stack else None
+
+            if indent and self._indent_unit is None and parent is not None and not parent.indent:
+                self._indent_unit = indent
+
+            code = self._strip_comment(stripped)
+
+            if not stripped:
+                node = HyprConfNode('blank', pos, end, line_no, indent, parent)
+            elif not code:
+                node = HyprConfNode('comment', pos, end, line_no, indent, parent)
+            elif code == '}':
+                node = HyprConfNode('close', pos, end, line_no, indent, parent)
+                if stack:
+                    stack.pop().close = node
+            else:
+                open_match = self._OPEN_RE.match(code)
+                assign_match = None if open_match else self._ASSIGN_RE.match(code)
+                if open_match:
+                    node = HyprConfNode('open', pos, end, line_no, indent, parent)
+                    node.key = open_match.group(1)
+                    node.block_key = open_match.group(2)
+                    node.path = self._join(parent, node.key)
+                    self.blocks.append(node)
+                    stack.append(node)
+                elif assign_match:
+                    node = HyprConfNode('assign', pos, end, line_no, indent, parent)
+                    node.key = assign_match.group(1).strip()
+                    node.path = self._join(parent, node.key)
+                    offset = pos + len(indent)
+                    value_start = offset + assign_match.end()
+                    value_text = code[assign_match.end():]
+                    value_start += len(value_text) - len(value_text.lstrip())
+                    node.value = value_text.strip().replace('##', '#')
+                    node.value_start = value_start
+                    node.value_end = offset + len(code.rstrip())
+                    self._index.setdefault(node.path, []).append(node)
+                else:
+                    node = HyprConfNode('other', pos, end, line_no, indent, parent)
+
+            self.nodes.append(node)
+            pos = end
+
+    @staticmethod
+    def _strip_comment(stripped):
+        """Drop a trailing comment, honouring hyprlang's ## escape"""
+        index = stripped.find('#')
+        while index != -1:
+            if stripped[index:index + 2] == '##':
+                index = stripped.find('#', index + 2)
+                continue
+            return stripped[:index].rstrip()
+        return stripped
+
+    @staticmethod
+    def _join(parent, key):
+        if key.startswith('$') or parent is None:
+            return key
+        return f"{parent.path}:{key}"
+
+    def get(self, path):
+        """Return the effective (last) assignment node for a path"""
+        nodes = self._index.get(path)
+        return nodes[-1] if nodes else None
+
+    def get_value(self, path, default=None):
+        node = self.get(path)
+        return node.value if node else default
+
+    def find_all(self, path):
+        """Return every assignment for a repeatable keyword such as bind"""
+        return list(self._index.get(path, ()))
+
+    def node_at_line(self, line):
+        if 1 <= line <= len(self.nodes):
+            return self.nodes[line - 1]
+        return None
     
-    def __init__(self, config_dir):
-        self.config_dir = Path(config_dir)
-        self.looknfeel_path = self.config_dir / "looknfeel.conf"
-        self.input_path = self.config_dir / "input.conf"
+    def find_blocks(self, path):
+        return [block for block in self.blocks if block.path == path]
+
+    def items(self):
+        """Yield (path, node) for the effective value of every key"""
+        for path, nodes in self._index.items():
+            yield path, nodes[-1]
+
+    @property
+    def modified(self):
+        return bool(self._splices or self._inserts)
+
+    def set(self, path, value):
+        """Set a key, editing its node in place or inserting it into its block"""
+        value = str(value).replace('#', '##')
+        node = self.get(path)
+        if node is not None:
+            if node.value != value.replace('##', '#'):
+                self._splices[(node.value_start, node.value_end)] = value
+            else:
+                self._splices.pop((node.value_start, node.value_end), None)
+            return node
+        self._insert(path, value)
+        return None
+
+    def set_node(self, node, value):
+        """Replace the value of one specific assignment node"""
+        self._splices[(node.value_start, node.value_end)] = str(value).replace('#', '##')
+
+    def remove_node(self, node):
+        """Delete one line from the document"""
+        self._splices[(node.start, node.end)] = ''
+
+    def replace_line(self, node, text):
+        """Replace one whole line with raw text, keeping its indentation"""
+        newline = '\n' if self.text[node.end - 1:node.end] == '\n' else ''
+        self._splices[(node.start, node.end)] = f"{node.indent}{text}{newline}"
     
-    def update_blur_settings(self, settings):
-        """Update blur settings in looknfeel.conf"""
-        if not self.looknfeel_path.exists():
-            print(f"Error: {self.looknfeel_path} does not exist")
-            return False
-        
-        try:
-            content = self.looknfeel_path.read_text()
-            
-            for key, value in settings.items():
-                if key.startswith('blur_'):
-                    setting_name = key.replace('blur_', '')
-                    
-                    if isinstance(value, bool):
-                        value_str = 'true' if value else 'false'
-                    elif isinstance(value, float):
-                        value_str = f'{value:.4f}'
-                    else:
-                        value_str = str(value)
-                    
-                    pattern = rf'(blur\s*{{[^}}]*?){setting_name}\s*=\s*[^\n]+'
-                    replacement = rf'\g<1>{setting_name} = {value_str}'
-                    
-                    new_content = re.sub(pattern, replacement, content, flags=re.DOTALL)
-                    if new_content != content:
-                        content = new_content
-            
-            self.looknfeel_path.write_text(content)
-            self._reload_hyprland()
-            return True
-        except Exception as e:
-            print(f"Error updating blur settings: {e}")
-            return False
+    def append_to_block(self, block, key, value):
+        """Add an assignment at the end of a specific block, or the file if None"""
+        anchor = block.close.start if block is not None and block.close else len(self.text)
+        pending = self._inserts.setdefault(anchor, {'block': block, 'entries': []})
+        pending['entries'].append(((key,), str(value).replace('#', '##')))
+
+    def append_lines(self, lines):
+        """Add raw lines at the end of the file"""
+        end = len(self.text)
+        text = self._splices.get((end, end), '')
+        if not text and self.text and not self.text.endswith('\n'):
+            text = '\n'
+        self._splices[(end, end)] = text + ''.join(f"{line}\n" for line in lines)
     
-    def update_decoration_settings(self, settings):
-        """Update decoration settings"""
-        if not self.looknfeel_path.exists():
-            return False
+    def insert_before(self, node, key, value):
+        """Add an assignment on a new line just above node, in node's block"""
+        pending = self._inserts.setdefault(node.start, {'block': node.parent, 'entries': []})
+        pending['entries'].append(((key,), str(value).replace('#', '##')))
+    
+    def append(self, path, value):
+        """Add another line for a repeatable keyword such as bezier or bind"""
+        self._insert(path, str(value).replace('#', '##'), replace=False)
+
+    def append_block(self, key, entries):
+        """Add a new block of (key, value) lines at the end of the file"""
+        pending = self._inserts.setdefault(len(self.text), {'block': None, 'entries': []})
+        lines = [(name, str(value).replace('#', '##')) for name, value in entries]
+        pending['entries'].append(((key,), lines))
+    
+    def remove_block(self, block):
+        """Delete a block with everything inside it, and the blank line before it"""
+        start = block.start
+        index = self._line_of(start)
+        if index > 0 and self.nodes[index - 1].kind == 'blank':
+            start = self.nodes[index - 1].start
+        end = block.close.end if block.close else len(self.text)
+        self._splices[(start, end)] = ''
+    
+    def _insert(self, path, value, replace=True):
+        """Queue a missing key under the deepest existing ancestor block"""
+        parts = path.split(':')
+        block = None
+        depth = 0
+        for i in range(len(parts) - 1, 0, -1):
+            candidates = [b for b in self.find_blocks(':'.join(parts[:i])) if b.block_key is None]
+            if candidates:
+                block = candidates[-1]
+                depth = i
+                break
+        anchor = block.close.start if block is not None and block.close else len(self.text)
+        pending = self._inserts.setdefault(anchor, {'block': block, 'entries': []})
+        relative = tuple(parts[depth:])
+        if replace:
+            for i, (existing, _) in enumerate(pending['entries']):
+                if existing == relative:
+                    pending['entries'][i] = (relative, value)
+                    return
+        pending['entries'].append((relative, value))
+
+    def _unit(self):
+        return self._indent_unit or '    '
+
+    def _render_insert(self, pending, anchor):
+        """Build the text for keys (and any missing blocks) queued at one anchor"""
+        block = pending['block']
+        if block is None:
+            base = ''
+        else:
+            children = [n for n in self.nodes if n.parent is block and n.kind in ('assign', 'open')]
+            base = children[0].indent if children else block.indent + self._unit()
+
+        tree = []
+        for relative, value in pending['entries']:
+            level = tree
+            for part in relative[:-1]:
+                for name, child in level:
+                    if name == (part,):
+                        level = child
+                        break
+                else:
+                    child = []
+                    level.append(((part,), child))
+                    level = child
+            if isinstance(value, list):
+                level.append(((relative[-1],), value))
+            else:
+                level.append((relative[-1], value))
+
+        lines = []
+
+        def emit(level, indent):
+            for name, value in level:
+                if isinstance(name, tuple):
+                    if not indent and lines:
+                        lines.append('')
+                    lines.append(f"{indent}{name[0]} {{")
+                    emit(value, indent + self._unit())
+                    lines.append(f"{indent}}}")
+                else:
+                    lines.append(f"{indent}{name} = {value}")
+
+        emit(tree, base)
+        if block is None and isinstance(tree[0][0], tuple) and self.text.strip():
+            lines.insert(0, '')
+        text = '\n'.join(lines) + '\n'
+        if block is None and anchor == len(self.text) and self.text and not self.text.endswith('\n'):
+            text = '\n' + text
+        return text
+
+    def discard(self):
+        """Forget every pending edit"""
+        self._splices = {}
+        self._inserts = {}
+    
+    def _edits(self):
+        edits = [(start, end, value) for (start, end), value in self._splices.items()]
+        for anchor, pending in self._inserts.items():
+            edits.append((anchor, anchor, self._render_insert(pending, anchor)))
+        edits.sort(key=lambda e: (e[0], e[1]))
+        return edits
+    
+    def _line_of(self, offset):
+        """0-based index of the line containing offset (len(nodes) past the end)"""
+        if self._line_starts is None:
+            self._line_starts = [node.start for node in self.nodes]
+        if offset >= len(self.text) and (not self.text or self.text.endswith('\n')):
+            return len(self.nodes)
+        return bisect.bisect_right(self._line_starts, offset) - 1
+    
+    def diff(self, label=None, context=3):
+        """Unified diff of the pending edits against the original text
         
-        try:
-            content = self.looknfeel_path.read_text()
-            
-            for key, value in settings.items():
-                if key == 'rounding':
-                    content = re.sub(
-                        r'rounding\s*=\s*\d+',
-                        f'rounding = {value}',
-                        content
-                    )
-                elif key.startswith('shadow_'):
-                    setting_name = key.replace('shadow_', '')
-                    if isinstance(value, bool):
-                        value_str = 'true' if value else 'false'
-                    else:
-                        value_str = str(value)
-                    
-                    pattern = rf'(shadow\s*{{[^}}]*?){setting_name}\s*=\s*[^\n]+'
-                    replacement = rf'\g<1>{setting_name} = {value_str}'
-                    content = re.sub(pattern, replacement, content, flags=re.DOTALL)
+        Only the lines touched by an edit (plus context) are looked at, so the
+        cost follows the number of edits rather than the size of the file.
+        """
+        if not self.modified:
+            return ''
+        groups = []
+        for start, end, value in self._edits():
+            first = self._line_of(start)
+            if end > start:
+                last = self._line_of(end - 1) + 1
+            elif first < len(self.nodes) and self.nodes[first].start != start:
+                last = first + 1
+            else:
+                last = first
+            if groups and (first < groups[-1][1] or (first == last == groups[-1][0] == groups[-1][1])):
+                group = groups[-1]
+                group[1] = max(group[1], last)
+                group[2].append((start, end, value))
+            else:
+                groups.append([first, last, [(start, end, value)]])
+        
+        nodes = self.nodes
+        
+        def lines(first, last):
+            return [self.text[node.start:node.end].rstrip('\n') for node in nodes[first:last]]
+        
+        def line_start(index):
+            return self.nodes[index].start if index < len(self.nodes) else len(self.text)
+        
+        changes = []
+        for first, last, edits in groups:
+            region_start = line_start(first)
+            out = []
+            pos = region_start
+            for start, end, value in edits:
+                if start < pos:
+                    continue
+                out.append(self.text[pos:start])
+                out.append(value)
+                pos = end
+            out.append(self.text[pos:line_start(last)])
+            changes.append((first, last, ''.join(out).splitlines()))
+        
+        name = label or (str(self.path) if self.path else 'config')
+        output = [f"--- a/{name}", f"+++ b/{name}"]
+        shift = 0
+        index = 0
+        while index < len(changes):
+            hunk = [changes[index]]
+            while (index + 1 < len(changes)
+                   and changes[index + 1][0] - hunk[-1][1] <= 2 * context):
+                index += 1
+                hunk.append(changes[index])
+            index += 1
             
-            self.looknfeel_path.write_text(content)
-            self._reload_hyprland()
-            return True
-        except Exception as e:
-            print(f"Error updating decoration settings: {e}")
-            return False
+            old_start = max(0, hunk[0][0] - context)
+            old_end = min(len(nodes), hunk[-1][1] + context)
+            body = []
+            pos = old_start
+            added = 0
+            for first, last, new_lines in hunk:
+                body.extend(f" {line}" for line in lines(pos, first))
+                body.extend(f"-{line}" for line in lines(first, last))
+                body.extend(f"+{line}" for line in new_lines)
+                added += len(new_lines) - (last - first)
+                pos = last
+            body.extend(f" {line}" for line in lines(pos, old_end))
+            old_count = old_end - old_start
+            new_count = old_count + added
+            output.append(f"@@ -{old_start + 1 if old_count else old_start},{old_count} "
+                          f"+{old_start + shift + 1 if new_count else old_start + shift},{new_count} @@")
+            output.extend(body)
+            shift += added
+        return '\n'.join(output) + '\n'
     
-    def update_general_settings(self, settings):
-        """Update general settings"""
-        if not self.looknfeel_path.exists():
-            return False
-        
+    def render(self):
+        """Serialize by splicing edits into the untouched original text"""
+        if not self.modified:
+            return self.text
+        edits = self._edits()
+
+        out = []
+        pos = 0
+        for start, end, value in edits:
+            if start < pos:
+                continue
+            out.append(self.text[pos:start])
+            out.append(value)
+            pos = end
+        out.append(self.text[pos:])
+        return ''.join(out)
+
+    @property
+    def digest(self):
+        """Hash of the text as parsed, for compare-and-swap on save"""
+        if self._digest is None:
+            self._digest = text_digest(self.text)
+        return self._digest
+    
+    def unchanged_on_disk(self, path=None):
+        """True while the file still holds exactly the text that was parsed"""
+        target = Path(path) if path else self.path
         try:
-            content = self.looknfeel_path.read_text()
-            
-            for key, value in settings.items():
-                pattern = rf'(general\s*{{[^}}]*?){key}\s*=\s*\d+'
-                replacement = rf'\g<1>{key} = {value}'
-                content = re.sub(pattern, replacement, content, flags=re.DOTALL)
-            
-            self.looknfeel_path.write_text(content)
-            self._reload_hyprland()
-            return True
-        except Exception as e:
-            print(f"Error updating general settings: {e}")
-            return False
+            text = target.read_text()
+        except FileNotFoundError:
+            text = ''
+        return text_digest(text) == self.digest
     
-    def update_input_settings(self, settings):
-        """Update input settings"""
-        if not self.input_path.exists():
-            print(f"Error: {self.input_path} does not exist")
+    def save(self, path=None):
+        """Write the document back if anything changed"""
+        target = Path(path) if path else self.path
+        if not self.modified:
             return False
-        
-        try:
-            content = self.input_path.read_text()
-            
-            for key, value in settings.items():
-                if key == 'kb_layout':
-                    content = re.sub(
-                        r'kb_layout\s*=\s*[^\n]+',
-                        f'kb_layout = {value}',
-                        content
-                    )
-                elif key == 'kb_options':
-                    content = re.sub(
-                        r'kb_options\s*=\s*[^\n]+',
-                        f'kb_options = {value}',
-                        content
-                    )
-                elif key in ['repeat_rate', 'repeat_delay']:
-                    content = re.sub(
-                        rf'{key}\s*=\s*\d+',
-                        f'{key} = {value}',
-                        content
-                    )
-                elif key == 'numlock_by_default':
-                    value_str = 'true' if value else 'false'
-                    content = re.sub(
-                        r'numlock_by_default\s*=\s*(true|false)',
-                        f'numlock_by_default = {value_str}',
-                        content
-                    )
-                elif key == 'sensitivity':
-                    if 'sensitivity' not in content:
-                        content = re.sub(
-                            r'(input\s*{)',
-                            rf'\g<1>\n  sensitivity = {value}',
-                            content
-                        )
-                    else:
-                        content = re.sub(
-                            r'sensitivity\s*=\s*[-\d.]+',
-                            f'sensitivity = {value}',
-                            content
-                        )
-                elif key.startswith('touchpad_'):
-                    setting_name = key.replace('touchpad_', '')
-                    if isinstance(value, bool):
-                        value_str = 'true' if value else 'false'
-                    else:
-                        value_str = str(value)
-                    
-                    pattern = rf'(touchpad\s*{{[^}}]*?){setting_name}\s*=\s*[^\n]+'
-                    replacement = rf'\g<1>{setting_name} = {value_str}'
-                    content = re.sub(pattern, replacement, content, flags=re.DOTALL)
-            
-            self.input_path.write_text(content)
-            self._reload_hyprland()
+        atomic_write(target, self.render().encode())
+        return True
+
+
+def parse_config_value(text, kind):
+    """Convert config/D-Bus text to a setting value of the given schema type"""
+    text = text.strip()
+    if kind == 'bool':
+        if text.lower() in ('true', '1', 'yes', 'on'):
             return True
-        except Exception as e:
-            print(f"Error updating input settings: {e}")
+        if text.lower() in ('false', '0', 'no', 'off'):
             return False
-    
-    def _reload_hyprland(self):
-        """Reload Hyprland configuration"""
-        try:
-            result = subprocess.run(
-                ['hyprctl', 'reload'],
-                check=False,
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            if result.returncode == 0:
-                print("Omarchy reloaded successfully")
-            else:
-                print(f"⚠️ Omarchy reload warning: {result.stderr}")
-        except subprocess.TimeoutExpired:
-            print("⚠️ Omarchy reload timed out")
-        except FileNotFoundError:
-            print("⚠️ hyprctl not found - changes saved but not applied")
-        except Exception as e:
-            print(f"⚠️ Could not reload Omarchy: {e}")
+        raise ValueError(f"'{text}' is not true or false")
+    if kind == 'int':
+        return int(text)
+    if kind == 'float':
+        return float(text)
+    return text
 
 
+def device_blocks(document):
+    """Map each device name to (block, {key: node}) for its device { } block"""
+    blocks = {}
+    for node in document.nodes:
+        parent = node.parent
+        if node.kind != 'assign' or parent is None or parent.path != 'device' or parent.block_key:
+            continue
+        blocks.setdefault(parent, {})[node.key] = node
+    devices = {}
+    for block, nodes in blocks.items():
+        name = nodes.get('name')
+        if name is not None and name.value:
+            devices[name.value] = (block, nodes)
+    return devices
 
-class LanguageInputPage(Adw.PreferencesPage):
-    """Language and input configuration page"""
+
+def idle_listeners(document):
+    """Every hypridle listener { } block as (block, {key: node}), in file order"""
+    listeners = {block: {} for block in document.find_blocks('listener')}
+    for node in document.nodes:
+        if node.kind == 'assign' and node.parent in listeners:
+            listeners[node.parent][node.key] = node
+    return list(listeners.items())
+
+
+def listener_source(nodes):
+    """The keys and values a listener block holds, to recognise it later"""
+    return tuple(sorted((key, node.value) for key, node in nodes.items()))
+
+
+def autostart_entries(document):
+    """Every top-level exec/exec-once line as (node, keyword, command, enabled)
     
-    AVAILABLE_LANGUAGES = {
-        'us': ' English (US)',
-        'ara': ' Arabic',
+    A commented-out exec line counts as a disabled entry: that is how the
+    Autostart page switches one off, and how optional programs are usually
+    left in autostart.conf.
+    """
+    entries = []
+    for node in document.nodes:
+        if node.parent is not None:
+            continue
+        if node.kind == 'assign' and node.key in AUTOSTART_KEYWORDS:
+            entries.append((node, node.key, node.value, True))
+        elif node.kind == 'comment':
+            match = DISABLED_EXEC_RE.match(document.text[node.start:node.end].strip())
+            if match:
+                command = HyprConfDocument._strip_comment(match.group(2)).replace('##', '#')
+                entries.append((node, match.group(1), command, False))
+    return entries
+
+
+def autostart_source(document):
+    """(line, keyword, command, enabled) of every exec line, to recognise the file later"""
+    return [(node.line, keyword, command, enabled)
+            for node, keyword, command, enabled in autostart_entries(document)]
+
+
+def input_devices(data):
+    """Flatten `hyprctl devices -j` into [{'name', 'kind', ...}], one per device name"""
+    devices = {}
+    for kind in DEVICE_KEYS_BY_KIND:
+        for device in (data or {}).get(kind) or []:
+            name = device.get('name')
+            if name and name not in devices:
+                devices[name] = dict(device, kind=kind)
+    return sorted(devices.values(), key=lambda d: (d['kind'], d['name']))
+
+
+class WindowRule:
+    """One windowrule/windowrulev2 line and the windows it applies to
+    
+    The matchers are parsed from the line once and every regex goes through
+    a shared compile cache, so re-parsing an unchanged rule (or another rule
+    with the same pattern) compiles nothing. Hyprland matches regexes against
+    the whole string; a negative: prefix inverts the match.
+    """
+    
+    __slots__ = ('keyword', 'text', 'effect', 'conditions', 'error')
+    
+    KEYWORDS = ('windowrule', 'windowrulev2')
+    REGEX_FIELDS = {
+        'class': 'class', 'title': 'title',
+        'initialclass': 'initialClass', 'initialtitle': 'initialTitle',
+    }
+    FLAG_FIELDS = {'xwayland': 'xwayland', 'floating': 'floating', 'pinned': 'pinned'}
+    FIELD_RE = re.compile(
+        r'(?:^|,)\s*(class|title|initialClass|initialTitle|tag|xwayland|floating|fullscreen'
+        r'|pinned|focus|workspace|onworkspace|fullscreenstate|content|xdgTag|group)\s*:',
+        re.IGNORECASE
+    )
+    
+    def __init__(self, keyword, text):
+        self.keyword = keyword
+        self.text = text
+        self.conditions = []
+        self.error = None
+        effect, _, window = text.partition(',')
+        self.effect = effect.strip()
+        try:
+            self._parse(window.strip())
+        except (re.error, ValueError) as e:
+            self.error = str(e)
+            self.conditions = []
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=2048)
+    def compile(pattern):
+        """Compiled regex for a pattern, shared by every rule that uses it"""
+        return re.compile(pattern)
+    
+    def _parse(self, window):
+        fields = list(self.FIELD_RE.finditer(window))
+        if not fields:
+            if not window:
+                raise ValueError("rule has no window to match")
+            self._add('class', window)
+            return
+        for index, match in enumerate(fields):
+            end = fields[index + 1].start() if index + 1 < len(fields) else len(window)
+            self._add(match.group(1).lower(), window[match.end():end].strip())
+    
+    def _add(self, field, value):
+        negative = value.startswith('negative:')
+        if negative:
+            value = value[len('negative:'):]
+        if field in self.REGEX_FIELDS:
+            attribute, test = self.REGEX_FIELDS[field], self.compile(value).fullmatch
+        elif field == 'tag':
+            regex = self.compile(value)
+            attribute, test = 'tags', lambda tags: any(regex.fullmatch(tag) for tag in tags)
+        elif field in self.FLAG_FIELDS or field in ('fullscreen', 'focus'):
+            wanted = value in ('1', 'true', 'yes')
+            attribute, test = self.FLAG_FIELDS.get(field, field), lambda flag: flag == wanted
+        elif field == 'workspace':
+            if value.startswith('name:'):
+                attribute, wanted = 'workspace_name', value[len('name:'):]
+            else:
+                attribute, wanted = 'workspace_id', int(value)
+            test = lambda workspace: workspace == wanted
+        else:
+            # Matchers that depend on state hyprctl clients does not report
+            return
+        self.conditions.append((attribute, test, negative))
+    
+    @staticmethod
+    def columns(clients):
+        """Each client attribute the matchers read, normalized once per client list"""
+        columns = {
+            attribute: [str(client.get(attribute) or '') for client in clients]
+            for attribute in WindowRule.REGEX_FIELDS.values()
+        }
+        for attribute in WindowRule.FLAG_FIELDS.values():
+            columns[attribute] = [bool(client.get(attribute)) for client in clients]
+        columns['fullscreen'] = [bool(client.get('fullscreen')) for client in clients]
+        columns['focus'] = [client.get('focusHistoryID') == 0 for client in clients]
+        columns['tags'] = [tuple(tag.rstrip('*') for tag in client.get('tags') or ()) for client in clients]
+        workspaces = [client.get('workspace') or {} for client in clients]
+        columns['workspace_id'] = [workspace.get('id') for workspace in workspaces]
+        columns['workspace_name'] = [workspace.get('name') for workspace in workspaces]
+        return columns
+    
+    def matching(self, clients, columns=None):
+        """Indexes of the clients this rule applies to
+        
+        Conditions filter the candidate list one column at a time, so most
+        rules stop after their first (class) check.
+        """
+        if not self.conditions:
+            return []
+        if columns is None:
+            columns = self.columns(clients)
+        selected = range(len(clients))
+        for attribute, test, negative in self.conditions:
+            column = columns[attribute]
+            selected = [index for index in selected if bool(test(column[index])) != negative]
+            if not selected:
+                break
+        return list(selected)
+
+
+def atomic_write(path, data, unchanged=None):
+    """Replace a file's contents in one rename so readers never see half a file
+    
+    Symlinks are followed, so files linked in by a dotfile manager stay
+    links. unchanged, if given, is checked right before the rename; when it
+    returns False the file is left alone and False is returned.
+    """
+    path = Path(os.path.realpath(path))
+    fd, temporary = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+        if path.exists():
+            shutil.copymode(path, temporary)
+        else:
+            os.chmod(temporary, 0o644)
+        if unchanged is not None and not unchanged():
+            os.unlink(temporary)
+            return False
+        os.replace(temporary, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(temporary)
+        raise
+    return True
+
+
+def text_digest(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+@contextlib.contextmanager
+def config_lock(path):
+    """Hold an exclusive advisory lock for a read-modify-write of one file
+    
+    The lock file lives in the runtime directory, keyed by the real path,
+    so it never lands in a synced dotfile tree and every process of this
+    app (window, D-Bus service, fleet runs) agrees on it.
+    """
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    lock_dir = Path(runtime_dir) / f"omarchy-settings-{os.getuid()}"
+    lock_dir.mkdir(mode=0o700, exist_ok=True)
+    name = hashlib.sha1(os.path.realpath(path).encode()).hexdigest()
+    with open(lock_dir / f"{name}.lock", 'a') as handle:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+def cache_home():
+    """Per-user cache directory for this app"""
+    base = os.environ.get('XDG_CACHE_HOME') or str(Path.home() / ".cache")
+    return Path(base) / "omarchy-settings"
+
+
+_config_pool = None
+
+
+def config_pool():
+    """Shared worker pool that parses config files off the main loop"""
+    global _config_pool
+    if _config_pool is None:
+        _config_pool = ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 1) + 2),
+                                          thread_name_prefix="config-parse")
+    return _config_pool
+
+
+def default_layer_dir():
+    """Omarchy's stock Hypr configs, overridable with OMARCHY_DEFAULT_DIR"""
+    override = os.environ.get('OMARCHY_DEFAULT_DIR')
+    if override:
+        return Path(override).expanduser()
+    return Path.home() / ".local" / "share" / "omarchy" / "default" / "hypr"
+
+
+class ConfigValue:
+    """One assignment of a key together with where it was made"""
+    
+    __slots__ = ('path', 'value', 'layer', 'file', 'line')
+    
+    def __init__(self, path, value, layer, file, line):
+        self.path = path
+        self.value = value
+        self.layer = layer
+        self.file = file
+        self.line = line
+    
+    @property
+    def location(self):
+        return f"{self.file}:{self.line}" if self.line is not None else str(self.file)
+    
+    def __repr__(self):
+        return f"<ConfigValue {self.path} = {self.value} ({self.layer} {self.location})>"
+
+
+
+class ParseCache:
+    """Each config file's assignments kept on disk between launches
+    
+    One small marshal file per config file under
+    ~/.cache/omarchy-settings/parse holds (key, value, line) for every
+    assignment, source lines included: those are the file's edges in the
+    include graph LayeredConfig follows. An entry is only used if the file's
+    inode, mtime and size match and its content hash agrees. Truncated or
+    corrupt entries, and those from another cache version or Python, count
+    as misses and are written again after the reparse.
+    """
+    
+    VERSION = 1
+    MAGIC = b'OMPC'
+    
+    def __init__(self, cache_dir=None):
+        self.cache_dir = (Path(cache_dir) if cache_dir else cache_home()) / "parse"
+        self.header = self.MAGIC + bytes([self.VERSION]) + sys.implementation.cache_tag.encode() + b'\0'
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def digest(data):
+        return hashlib.blake2b(data, digest_size=16).digest()
+    
+    def _entry(self, path):
+        return self.cache_dir / f"{hashlib.sha1(str(path).encode()).hexdigest()}.bin"
+    
+    def load(self, path, stamp, digest):
+        """The cached assignments of path, or None if missing or stale"""
+        try:
+            blob = self._entry(path).read_bytes()
+            if not blob.startswith(self.header) or len(blob) < len(self.header) + 4:
+                raise ValueError("foreign cache entry")
+            payload = blob[len(self.header):-4]
+            if zlib.crc32(payload) != int.from_bytes(blob[-4:], 'little'):
+                raise ValueError("checksum mismatch")
+            cached_path, cached_stamp, cached_digest, assignments = marshal.loads(payload)
+        except (OSError, ValueError, EOFError, TypeError):
+            self.misses += 1
+            return None
+        if (cached_path, cached_stamp, cached_digest) != (str(path), tuple(stamp), digest):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return assignments
+    
+    def store(self, path, stamp, digest, assignments):
+        payload = marshal.dumps((str(path), tuple(stamp), digest, assignments))
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            atomic_write(self._entry(path),
+                         self.header + payload + zlib.crc32(payload).to_bytes(4, 'little'))
+        except OSError as e:
+            print(f"⚠️ Could not cache {path.name}: {e}")
+
+
+
+class LayeredConfig:
+    """Hyprland settings resolved over Omarchy's config layers
+    
+    Hyprland's built-in defaults from SETTINGS_SCHEMA are the bottom layer,
+    Omarchy's stock configs sit above them, then the current theme's
+    hyprland.conf, and the user's files in the config directory override
+    all of them, later files winning as Hyprland sources them. The stock
+    configs are ordered by following the source lines of Omarchy's own
+    hyprland.conf template, the file every Omarchy install starts from.
+    That include graph is built file by file from the cached assignments,
+    and the resolved order is kept until a file in it changes.
+    Each file is parsed once per inode/mtime/size, across launches through
+    the ParseCache, and the merged result is reused until any layer
+    changes, so lookups never re-parse anything. Files that do need reading
+    are read concurrently on the shared config pool.
+    """
+    
+    LAYERS = ('builtin', 'default', 'theme', 'user')
+    USER_FILES = ('monitors', 'input', 'bindings', 'envs', 'looknfeel', 'autostart', 'hyprland')
+    
+    def __init__(self, config_dir, default_dir=None, theme_dir=None, cache=None):
+        self.config_dir = Path(config_dir)
+        self.default_dir = Path(default_dir) if default_dir else default_layer_dir()
+        self.theme_dir = (Path(theme_dir) if theme_dir
+                          else Path.home() / ".config" / "omarchy" / "current" / "theme")
+        self.cache = cache if cache is not None else ParseCache()
+        self.builtin = {spec['path']: format_config_value(spec['default'])
+                        for spec in SETTINGS_SCHEMA.values()}
+        self._assignments = {}
+        self._resolved = None
+        self._stamps = None
+        self._default_order = None
+    
+    @property
+    def entry_file(self):
+        """Omarchy's hyprland.conf template, whose source lines order the stock configs"""
+        return self.default_dir.parent.parent / "config" / "hypr" / "hyprland.conf"
+    
+    def _sources(self, path):
+        """Files one config file sources, in its order, with ~ and globs expanded
+        
+        The source lines come from the file's assignments, in memory or
+        from the ParseCache under the same stamp and hash checks, so an
+        unchanged file is never parsed again just to follow its includes.
+        """
+        root = self.default_dir.parent.parent
+        stamp = self._stamp(path)
+        cached = self._assignments.get(path)
+        assignments = cached[1] if cached and cached[0] == stamp else self._read_assignments(path, stamp)
+        targets = []
+        for key, value, line in assignments:
+            if key != 'source':
+                continue
+            value = value.strip()
+            # The template names Omarchy's own directory; follow it wherever default_dir points
+            prefix = '~/.local/share/omarchy/'
+            value = str(root / value[len(prefix):]) if value.startswith(prefix) else os.path.expanduser(value)
+            value = value if os.path.isabs(value) else str(path.parent / value)
+            targets.extend(Path(target) for target in sorted(glob.glob(value)))
+        return targets
+    
+    def _default_files(self):
+        """Stock config files in the order Hyprland applies them
+        
+        source lines are followed depth-first from the entry file; only
+        files under default_dir are kept. Stock files no source line
+        reaches come last, sorted, so none is left out. The order is reused
+        until one of the files it was read from changes.
+        """
+        found = sorted(self.default_dir.rglob('*.conf'))
+        if self._default_order is not None:
+            stamps, order = self._default_order
+            if all(self._stamp(path) == stamp for path, stamp in stamps) and set(found) <= set(order):
+                return order
+        stamps = []
+        order = []
+        
+        def visit(path):
+            stamps.append((path, self._stamp(path)))
+            try:
+                targets = self._sources(path)
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"⚠️ Could not follow the source lines of {path}: {e}")
+                return
+            for target in targets:
+                if target.is_relative_to(self.default_dir) and target.is_file() and target not in order:
+                    order.append(target)
+                    visit(target)
+        
+        if self.entry_file.is_file():
+            visit(self.entry_file)
+        else:
+            stamps.append((self.entry_file, None))
+        order.extend(path for path in found if path not in order)
+        self._default_order = (stamps, order)
+        return order
+    
+    def files(self):
+        """(layer, path) for every existing file, lowest precedence first"""
+        files = []
+        if self.default_dir.is_dir():
+            files.extend(('default', path) for path in self._default_files())
+        theme = self.theme_dir / "hyprland.conf"
+        if theme.is_file():
+            files.append(('theme', theme))
+        for name in self.USER_FILES:
+            path = self.config_dir / f"{name}.conf"
+            if path.is_file():
+                files.append(('user', path))
+        return files
+    
+    @staticmethod
+    def _stamp(path):
+        try:
+            stat = path.stat()
+            return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+    
+    def _read_assignments(self, path, stamp):
+        """(key, value, line) of every assignment in one file; runs on a worker"""
+        if stamp is None:
+            raise FileNotFoundError(f"{path} disappeared")
+        data = path.read_bytes()
+        digest = self.cache.digest(data)
+        assignments = self.cache.load(path, stamp, digest)
+        if assignments is None:
+            document = HyprConfDocument(data.decode().replace('\r\n', '\n'), path)
+            assignments = [(node.path, node.value, node.line)
+                           for node in document.nodes if node.kind == 'assign']
+            self.cache.store(path, stamp, digest, assignments)
+        return assignments
+    
+    def _load(self, stamps):
+        """Read every file not already in memory on the worker pool, all at once
+        
+        Results are merged here, on the calling thread, in layer order.
+        """
+        futures = [
+            (path, stamp, config_pool().submit(self._read_assignments, path, stamp))
+            for _, path, stamp in stamps
+            if self._assignments.get(path, (None,))[0] != stamp
+        ]
+        for path, stamp, future in futures:
+            try:
+                self._assignments[path] = (stamp, future.result())
+            except (OSError, UnicodeDecodeError) as e:
+                self._assignments.pop(path, None)
+                print(f"⚠️ Could not read {path}: {e}")
+    
+    @tracer.traced('layers.resolve', 'parser')
+    def resolve(self):
+        """Return {path: [ConfigValue, ...]} with the effective value last"""
+        files = self.files()
+        stamps = tuple((layer, path, self._stamp(path)) for layer, path in files)
+        if self._resolved is not None and stamps == self._stamps:
+            return self._resolved
+        
+        self._load(stamps)
+        resolved = {}
+        for layer, path, stamp in stamps:
+            cached = self._assignments.get(path)
+            if cached is None:
+                continue
+            for key, value, line in cached[1]:
+                resolved.setdefault(key, []).append(ConfigValue(key, value, layer, path, line))
+        
+        live = {path for _, path, _ in stamps}
+        for path in list(self._assignments):
+            if path not in live:
+                del self._assignments[path]
+        self._resolved = resolved
+        self._stamps = stamps
+        return resolved
+    
+    def get(self, path):
+        """The value Hyprland ends up using, or None if no layer sets it"""
+        values = self.resolve().get(path)
+        return values[-1] if values else None
+    
+    def default(self, path):
+        """The value the user's files override, from the theme, Omarchy or Hyprland"""
+        for value in reversed(self.resolve().get(path, ())):
+            if value.layer != 'user':
+                return value
+        if path in self.builtin:
+            return ConfigValue(path, self.builtin[path], 'builtin', "Hyprland", None)
+        return None
+    
+    def overrides(self, path):
+        """Every assignment of path in the user's own files"""
+        return [value for value in self.resolve().get(path, ()) if value.layer == 'user']
+    
+    def assignments(self, *paths):
+        """Every assignment of any of the paths, in the order Hyprland reads them"""
+        resolved = self.resolve()
+        order = {path: index for index, (_, path, _) in enumerate(self._stamps)}
+        values = [value for path in paths for value in resolved.get(path, ())]
+        return sorted(values, key=lambda value: (order[value.file], value.line))
+
+
+
+class OmarchyConfigParser:
+    """Parse Omarchy/Hyprland configuration files"""
+    
+    def __init__(self, config_dir):
+        self.config_dir = Path(config_dir)
+        self.looknfeel_path = self.config_dir / "looknfeel.conf"
+        self.input_path = self.config_dir / "input.conf"
+        self.bindings_path = self.config_dir / "bindings.conf"
+        self.layers = LayeredConfig(self.config_dir)
+    
+    def _layer_settings(self, prefix, pick):
+        """Schema settings under prefix, typed, from the value pick() selects"""
+        settings = {}
+        for key, spec in SETTINGS_SCHEMA.items():
+            if not spec['path'].startswith(prefix):
+                continue
+            value = pick(spec['path'])
+            if value is None:
+                continue
+            try:
+                settings[key] = parse_config_value(value.value, spec.get('type'))
+            except ValueError as e:
+                print(f"⚠️ Ignoring {spec['path']} at {value.location}: {e}")
+        return settings
+    
+    def _user_settings(self, prefix):
+        def pick(path):
+            overrides = self.layers.overrides(path)
+            return overrides[-1] if overrides else None
+        return self._layer_settings(prefix, pick)
+    
+    @tracer.traced('parser.parse_decoration_settings', 'parser')
+    def parse_decoration_settings(self):
+        """Decoration values set in the user's files"""
+        return self._user_settings('decoration:')
+    
+    @tracer.traced('parser.parse_general_settings', 'parser')
+    def parse_general_settings(self):
+        """General values set in the user's files"""
+        return self._user_settings('general:')
+    
+    @tracer.traced('parser.parse_input_settings', 'parser')
+    def parse_input_settings(self):
+        """Input values set in the user's files"""
+        return self._user_settings('input:')
+    
+    @tracer.traced('parser.parse_animations_settings', 'parser')
+    def parse_animations_settings(self):
+        """Animation values set in the user's files"""
+        return self._user_settings('animations:')
+    
+    @tracer.traced('parser.parse_device_settings', 'parser')
+    def parse_device_settings(self):
+        """Per-device values from the device { } blocks in input.conf"""
+        if not self.input_path.exists():
+            return {}
+        devices = {}
+        try:
+            document = HyprConfDocument.load(self.input_path)
+            for name, (block, nodes) in device_blocks(document).items():
+                values = {}
+                for key, spec in DEVICE_SCHEMA.items():
+                    if key not in nodes:
+                        continue
+                    try:
+                        values[key] = parse_config_value(nodes[key].value, spec.get('type'))
+                    except ValueError as e:
+                        print(f"⚠️ Ignoring {key} of {name} on line {nodes[key].line}: {e}")
+                devices[name] = values
+        except Exception as e:
+            print(f"Error parsing device settings: {e}")
+        return devices
+    
+    @tracer.traced('parser.parse_animation_curves', 'parser')
+    def parse_animation_curves(self):
+        """Parse bezier = and animation = lines from looknfeel.conf"""
+        curves = {'beziers': [], 'animations': []}
+        if not self.looknfeel_path.exists():
+            return curves
+        try:
+            document = HyprConfDocument.load(self.looknfeel_path)
+            # A later line for the same name replaces the earlier one, as in Hyprland
+            beziers = {}
+            for node in sorted(document.find_all('animations:bezier') + document.find_all('bezier'),
+                               key=lambda node: node.start):
+                try:
+                    curve = BezierCurve.from_config(node.value)
+                except ValueError as e:
+                    print(f"Skipping bezier on line {node.line}: {e}")
+                    continue
+                beziers[curve.name] = curve
+            animations = {}
+            for node in sorted(document.find_all('animations:animation') + document.find_all('animation'),
+                               key=lambda node: node.start):
+                try:
+                    animation = parse_animation_line(node.value)
+                except ValueError as e:
+                    print(f"Skipping animation on line {node.line}: {e}")
+                    continue
+                animations[animation['name']] = animation
+            curves['beziers'] = list(beziers.values())
+            curves['animations'] = list(animations.values())
+        except Exception as e:
+            print(f"Error parsing animation curves: {e}")
+        return curves
+    
+    def default_settings(self):
+        """Values the user's files would fall back to, from the lower layers"""
+        return self._layer_settings('', self.layers.default)
+
+
+
+class OmarchyConfigWriter:
+    """Write settings back to Omarchy/Hyprland configuration files"""
+    
+    CONFLICT_ATTEMPTS = 5
+    
+    def __init__(self, config_dir):
+        self.config_dir = Path(config_dir)
+        self.looknfeel_path = self.config_dir / "looknfeel.conf"
+        self.input_path = self.config_dir / "input.conf"
+        self._defer_reload = False
+    
+    @contextlib.contextmanager
+    def deferred_reload(self):
+        """Skip the per-file reloads; the caller reloads once afterwards"""
+        self._defer_reload = True
+        try:
+            yield
+        finally:
+            self._defer_reload = False
+    
+    def _file_path(self, file_key):
+        return self.config_dir / f"{file_key}.conf"
+    
+    def _edit(self, path, plan, create=False):
+        """Read-modify-write one config file without losing anyone's changes
+        
+        Runs under the file's advisory lock, so other instances of this app
+        wait their turn. Writers that ignore the lock, like an editor or a
+        dotfile sync, are caught by compare-and-swap on the hash taken at
+        parse time: the file is parsed again and plan(document) re-queues
+        only this edit's keys on top of their version. Returns True when the
+        file was written.
+        """
+        path = Path(path)
+        with config_lock(path):
+            for attempt in range(self.CONFLICT_ATTEMPTS):
+                if attempt:
+                    time.sleep(0.005 * attempt)
+                if path.exists():
+                    document = HyprConfDocument.load(path)
+                elif create:
+                    document = HyprConfDocument('', path)
+                else:
+                    raise FileNotFoundError(f"{path} does not exist")
+                plan(document)
+                if not document.modified:
+                    return False
+                if atomic_write(path, document.render().encode(),
+                                unchanged=lambda: document.unchanged_on_disk(path)):
+                    return True
+                print(f"⚠️ {path.name} changed on disk while saving, merging the edit again")
+        raise RuntimeError(f"{path.name} kept changing, gave up after {self.CONFLICT_ATTEMPTS} attempts")
+    
+    def _update_file(self, file_path, settings, path_filter):
+        """Apply matching settings to one file through its syntax tree"""
+        if not file_path.exists():
+            print(f"Error: {file_path} does not exist")
+            return False
+        
+        selected = {
+            key: value for key, value in settings.items()
+            if key in SETTINGS_SCHEMA and path_filter(SETTINGS_SCHEMA[key]['path'])
+            and self._file_path(SETTINGS_SCHEMA[key]['file']) == file_path
+        }
+        if self._rejected(selected):
+            return False
+        
+        if self._edit(file_path, lambda document: self.plan_settings(document, selected)):
+            self._reload_hyprland()
+        return True
+    
+    @staticmethod
+    def _rejected(settings):
+        """Print every setting that fails validation; True if there was one"""
+        errors = settings_validator.validate_all(settings)
+        for key, error in errors.items():
+            print(f"⚠️ Rejected {key} = {settings[key]!r}: {error}")
+        return bool(errors)
+    
+    @staticmethod
+    def plan_settings(document, settings):
+        """Queue an assignment for each schema setting"""
+        for key, value in settings.items():
+            document.set(SETTINGS_SCHEMA[key]['path'], format_config_value(value))
+    
+    @tracer.traced('writer.update_blur_settings', 'writer')
+    def update_blur_settings(self, settings):
+        """Update blur settings in looknfeel.conf"""
+        try:
+            return self._update_file(
+                self.looknfeel_path, settings,
+                lambda path: path.startswith('decoration:blur:')
+            )
+        except Exception as e:
+            print(f"Error updating blur settings: {e}")
+            return False
+    
+    @tracer.traced('writer.update_decoration_settings', 'writer')
+    def update_decoration_settings(self, settings):
+        """Update decoration settings"""
+        try:
+            return self._update_file(
+                self.looknfeel_path, settings,
+                lambda path: path.startswith('decoration:') and not path.startswith('decoration:blur:')
+            )
+        except Exception as e:
+            print(f"Error updating decoration settings: {e}")
+            return False
+    
+    @tracer.traced('writer.update_general_settings', 'writer')
+    def update_general_settings(self, settings):
+        """Update general settings"""
+        try:
+            return self._update_file(
+                self.looknfeel_path, settings,
+                lambda path: path.startswith('general:')
+            )
+        except Exception as e:
+            print(f"Error updating general settings: {e}")
+            return False
+    
+    @tracer.traced('writer.update_input_settings', 'writer')
+    def update_input_settings(self, settings):
+        """Update input settings"""
+        try:
+            return self._update_file(
+                self.input_path, settings,
+                lambda path: path.startswith('input:')
+            )
+        except Exception as e:
+            print(f"Error updating input settings: {e}")
+            return False
+    
+    @tracer.traced('writer.update_settings', 'writer')
+    def update_settings(self, settings):
+        """Update any mix of schema settings, one write per touched file
+        
+        Every value and target file is checked before the first write, so a
+        rejected value or a missing file leaves all the files untouched.
+        """
+        by_file = {}
+        for key, value in settings.items():
+            if key in SETTINGS_SCHEMA:
+                path = self._file_path(SETTINGS_SCHEMA[key]['file'])
+                by_file.setdefault(path, {})[key] = value
+        try:
+            missing = [path for path in sorted(by_file) if not path.exists()]
+            for path in missing:
+                print(f"Error: {path} does not exist")
+            rejected = any([self._rejected(selected) for selected in by_file.values()])
+            if missing or rejected:
+                return False
+            
+            changed = False
+            for path, selected in sorted(by_file.items()):
+                changed = self._edit(
+                    path, lambda document, selected=selected: self.plan_settings(document, selected)
+                ) or changed
+            if changed:
+                self._reload_hyprland()
+            return True
+        except Exception as e:
+            print(f"Error updating settings: {e}")
+            return False
+    
+    @staticmethod
+    def plan_removals(document, paths):
+        """Queue deletion of every assignment of the given keys"""
+        for path in paths:
+            for node in document.find_all(path):
+                document.remove_node(node)
+    
+    @tracer.traced('writer.remove_assignments', 'writer')
+    def remove_assignments(self, removals):
+        """Delete user overrides so the lower config layers apply again
+        
+        removals maps each file to the keys to drop from it.
+        """
+        try:
+            changed = False
+            for file_path, paths in removals.items():
+                changed = self._edit(
+                    file_path, lambda document, paths=paths: self.plan_removals(document, paths)
+                ) or changed
+            if changed:
+                self._reload_hyprland()
+            return True
+        except Exception as e:
+            print(f"Error removing overrides: {e}")
+            return False
+    
+    def _file_for_option(self, path, documents):
+        """Pick the user file that already sets an option, or its natural home"""
+        for candidate in sorted(self.config_dir.glob("*.conf")):
+            if candidate not in documents:
+                try:
+                    documents[candidate] = HyprConfDocument.load(candidate)
+                except (OSError, UnicodeDecodeError):
+                    continue
+            if documents[candidate].get(path) is not None:
+                return candidate
+        return self.input_path if path.startswith('input:') else self.looknfeel_path
+    
+    @tracer.traced('writer.update_options', 'writer')
+    def update_options(self, values, validator=None):
+        """Write raw option paths such as misc:vfr, one save per touched file"""
+        try:
+            if validator is not None:
+                errors = validator.validate_all(values)
+                if errors:
+                    for path, error in errors.items():
+                        print(f"⚠️ Rejected {path} = {values[path]!r}: {error}")
+                    return False
+            documents = {}
+            targets = {}
+            for path, value in values.items():
+                target = self._file_for_option(path, documents)
+                targets.setdefault(target, {})[path] = format_config_value(value)
+            
+            def plan(document, values):
+                for path, value in values.items():
+                    document.set(path, value)
+            
+            saved = [target for target, group in targets.items()
+                     if self._edit(target, functools.partial(plan, values=group), create=True)]
+            if saved:
+                self._reload_hyprland()
+            return True
+        except Exception as e:
+            print(f"Error updating options: {e}")
+            return False
+    
+    @tracer.traced('writer.update_animation_curves', 'writer')
+    def update_animation_curves(self, beziers, animations):
+        """Rewrite bezier = and animation = lines, matching them by name"""
+        if not self.looknfeel_path.exists():
+            print(f"Error: {self.looknfeel_path} does not exist")
+            return False
+        try:
+            if self._edit(self.looknfeel_path,
+                          lambda document: self.plan_animation_curves(document, beziers, animations)):
+                self._reload_hyprland()
+            return True
+        except Exception as e:
+            print(f"Error updating animation curves: {e}")
+            return False
+    
+    @staticmethod
+    def plan_animation_curves(document, beziers, animations):
+        """Queue the bezier = and animation = edits on a document
+        
+        Hyprland uses the last line for a name, so that is the one edited. A
+        curve must be defined before an animation line uses it, so new
+        bezier lines go just above the first animation line.
+        """
+        def last_by_name(keyword):
+            nodes = sorted(document.find_all(f'animations:{keyword}') + document.find_all(keyword),
+                           key=lambda node: node.start)
+            return nodes, {node.value.split(',', 1)[0].strip(): node for node in nodes}
+        
+        def differs(node, value, normalize):
+            try:
+                return normalize(node.value) != normalize(value)
+            except ValueError:
+                return True
+        
+        animation_nodes, existing_animations = last_by_name('animation')
+        _, existing_beziers = last_by_name('bezier')
+        for curve in beziers:
+            value = curve.to_config()
+            node = existing_beziers.get(curve.name)
+            if node is None:
+                if animation_nodes:
+                    document.insert_before(animation_nodes[0], 'bezier', value)
+                else:
+                    document.append('animations:bezier', value)
+            elif differs(node, value, lambda text: BezierCurve.from_config(text).points):
+                document.set_node(node, value)
+        for animation in animations:
+            value = format_animation_line(animation)
+            node = existing_animations.get(animation['name'])
+            if node is None:
+                document.append('animations:animation', value)
+            elif differs(node, value, parse_animation_line):
+                document.set_node(node, value)
+    
+    @staticmethod
+    def format_monitor_line(monitor, extra=''):
+        """Build a monitor= value (name,WxH@Hz,XxY,scale[,transform,N]) from a monitor dict
+        
+        extra is the trailing arguments of the line being replaced, such as
+        vrr,1 or mirror,DP-1. They are kept, with transform taken from the
+        monitor so a rotated output stays rotated.
+        """
+        fields = [field.strip() for field in extra.split(',')] if extra.strip() else []
+        transform = str(int(monitor.get('transform') or 0))
+        for index in range(0, len(fields) - 1, 2):
+            if fields[index] == 'transform':
+                fields[index + 1] = transform
+                break
+        else:
+            if transform != '0':
+                fields += ['transform', transform]
+        return ','.join([
+            monitor['name'],
+            f"{monitor['width']}x{monitor['height']}@{float(monitor['refreshRate']):.2f}",
+            f"{int(monitor['x'])}x{int(monitor['y'])}",
+            format_config_value(float(monitor['scale'])),
+        ] + fields)
+    
+    @tracer.traced('writer.update_monitors', 'writer')
+    def update_monitors(self, monitors):
+        """Rewrite the monitor= line of each given output in monitors.conf"""
+        path = self.config_dir / "monitors.conf"
+        try:
+            if self._edit(path, lambda document: self.plan_monitors(document, monitors), create=True):
+                self._reload_hyprland()
+            return True
+        except Exception as e:
+            print(f"Error updating monitors: {e}")
+            return False
+    
+    @classmethod
+    def plan_monitors(cls, document, monitors):
+        """Queue monitor= edits on a document, matching lines by output name"""
+        existing = {}
+        for node in document.find_all('monitor'):
+            existing[node.value.split(',', 1)[0].strip()] = node
+        
+        for monitor in monitors:
+            node = existing.get(monitor['name'])
+            if node is None:
+                document.append_to_block(None, 'monitor', cls.format_monitor_line(monitor))
+                continue
+            fields = node.value.split(',', 4)
+            value = cls.format_monitor_line(monitor, fields[4] if len(fields) == 5 else '')
+            if node.value != value:
+                document.set_node(node, value)
+    
+    @tracer.traced('writer.update_devices', 'writer')
+    def update_devices(self, devices):
+        """Write per-device values as device { } blocks in input.conf"""
+        errors = {
+            f"{name} {key}": error
+            for name, values in devices.items()
+            for key, error in device_validator.validate_all({
+                key: value for key, value in (values or {}).items() if value not in (None, '')
+            }).items()
+        }
+        if errors:
+            for key, error in errors.items():
+                print(f"⚠️ Rejected device setting {key}: {error}")
+            return False
+        try:
+            if self._edit(self.input_path, lambda document: self.plan_devices(document, devices),
+                          create=True):
+                self._reload_hyprland()
+            return True
+        except Exception as e:
+            print(f"Error updating devices: {e}")
+            return False
+    
+    @staticmethod
+    def plan_devices(document, devices):
+        """Queue device block edits; None drops a device's managed keys
+        
+        A key mapped to None or '' is removed, keys missing from a device's
+        values are left as they are. Keys this app does not manage are left
+        alone too, and a block is only removed once nothing but its name
+        would remain.
+        """
+        existing = device_blocks(document)
+        for name, values in devices.items():
+            removed = set(DEVICE_SCHEMA) if values is None else {
+                key for key, value in values.items() if key in DEVICE_SCHEMA and value in (None, '')}
+            values = {key: value for key, value in (values or {}).items()
+                      if key in DEVICE_SCHEMA and value not in (None, '')}
+            block, nodes = existing.get(name, (None, {}))
+            if block is None:
+                if values:
+                    document.append_block('device', [('name', name)] + [
+                        (key, format_config_value(value)) for key, value in values.items()
+                    ])
+                continue
+            kept = [key for key in nodes if key != 'name' and key not in removed]
+            if not values and not kept:
+                document.remove_block(block)
+                continue
+            for key in DEVICE_SCHEMA:
+                node = nodes.get(key)
+                if key in removed:
+                    if node is not None:
+                        document.remove_node(node)
+                elif key not in values:
+                    continue
+                elif node is None:
+                    document.append_to_block(block, key, format_config_value(values[key]))
+                elif node.value != format_config_value(values[key]):
+                    document.set_node(node, format_config_value(values[key]))
+    
+    def _rules_path(self, documents):
+        """The user file that already holds window rules, else hyprland.conf"""
+        for keyword in WindowRule.KEYWORDS:
+            path = self._file_for_option(keyword, documents)
+            if path in documents and documents[path].get(keyword) is not None:
+                return path
+        return self.config_dir / "hyprland.conf"
+    
+    @staticmethod
+    def plan_window_rules(document_for, edits, additions, rules_path):
+        """Queue rule edits; edits maps (file, line, original value) to a new value or None
+        
+        A line that no longer holds the rule it held when the caller read it
+        means another program changed the file; a ValueError is raised rather
+        than editing or deleting whatever rule is there now.
+        """
+        nodes = {}
+        for file_path, line, original in edits:
+            node = document_for(Path(file_path)).node_at_line(line)
+            if (node is None or node.kind != 'assign' or node.key not in WindowRule.KEYWORDS
+                    or node.value != original):
+                raise ValueError(f"{Path(file_path).name}:{line} no longer holds the rule "
+                                 f"'{original}', reload the page before editing it")
+            nodes[(file_path, line, original)] = node
+        for key, value in edits.items():
+            node = nodes[key]
+            if value is None:
+                document_for(Path(key[0])).remove_node(node)
+            elif node.value != value:
+                document_for(Path(key[0])).set_node(node, value)
+        if additions:
+            target = document_for(rules_path)
+            for keyword, value in additions:
+                target.append_to_block(None, keyword, value)
+    
+    @tracer.traced('writer.update_window_rules', 'writer')
+    def update_window_rules(self, edits, additions=()):
+        """Edit, delete and add windowrule lines in the user's files"""
+        try:
+            rules_path = self._rules_path({}) if additions else None
+            files = {Path(file_path) for file_path, _, _ in edits}
+            if rules_path is not None:
+                files.add(rules_path)
+            
+            def plan(document, path):
+                self.plan_window_rules(
+                    lambda _: document,
+                    {key: value for key, value in edits.items() if Path(key[0]) == path},
+                    additions if path == rules_path else (),
+                    rules_path,
+                )
+            
+            changed = False
+            for path in sorted(files):
+                changed = self._edit(path, functools.partial(plan, path=path), create=True) or changed
+            if changed:
+                self._reload_hyprland()
+            return True
+        except Exception as e:
+            print(f"Error updating window rules: {e}")
+            return False
+    
+    @staticmethod
+    def plan_listeners(document, listeners, loaded=None):
+        """Queue hypridle listener edits; listeners is the wanted list in order
+        
+        An entry with an 'index' updates that existing block (counted in
+        file order), one without becomes a new block, and blocks no entry
+        refers to are removed. Keys this app does not manage stay put.
+        loaded is the listener_source() of each block when the caller read
+        the file; if the blocks on disk no longer match it, indexes would
+        point at the wrong blocks, so a ValueError is raised instead.
+        """
+        existing = idle_listeners(document)
+        if loaded is not None and [listener_source(nodes) for _, nodes in existing] != list(loaded):
+            raise ValueError(f"the listeners in {document.path.name} were changed by another "
+                             f"program, reload the page before editing them")
+        kept = set()
+        for listener in listeners:
+            values = {key: format_config_value(value) for key, value in listener.items()
+                      if key in IDLE_LISTENER_SCHEMA and value not in (None, '')}
+            index = listener.get('index')
+            if index is None or index >= len(existing):
+                document.append_block('listener', list(values.items()))
+                continue
+            kept.add(index)
+            block, nodes = existing[index]
+            for key in IDLE_LISTENER_SCHEMA:
+                node = nodes.get(key)
+                if key not in values:
+                    if node is not None:
+                        document.remove_node(node)
+                elif node is None:
+                    document.append_to_block(block, key, values[key])
+                elif node.value != values[key]:
+                    document.set_node(node, values[key])
+        for index, (block, _) in enumerate(existing):
+            if index not in kept:
+                document.remove_block(block)
+    
+    @classmethod
+    def plan_tool_config(cls, document, values, listeners=None, loaded=None):
+        """Queue hyprlock/hypridle edits: option paths, then hypridle's listeners"""
+        for path, value in values.items():
+            document.set(path, format_config_value(value))
+        if listeners is not None:
+            cls.plan_listeners(document, listeners, loaded)
+    
+    @tracer.traced('writer.update_tool_config', 'writer')
+    def update_tool_config(self, name, values, validator, listeners=None, loaded=None):
+        """Write hyprlock.conf or hypridle.conf, which Hyprland itself never reads"""
+        errors = validator.validate_all(values)
+        for number, listener in enumerate(listeners or (), 1):
+            for key, error in idle_listener_validator.validate_all(
+                    {key: value for key, value in listener.items() if key != 'index'}).items():
+                errors[f"listener {number} {key}"] = error
+        if errors:
+            for key, error in errors.items():
+                print(f"⚠️ Rejected {key}: {error}")
+            return False
+        path = self.config_dir / f"{name}.conf"
+        try:
+            self._edit(path, lambda document: self.plan_tool_config(document, values, listeners,
+                                                                    loaded), create=True)
+            return True
+        except Exception as e:
+            print(f"Error updating {path.name}: {e}")
+            return False
+    
+    @staticmethod
+    def restart_hypridle():
+        """hypridle reads its config once; restart it under Hyprland if it runs"""
+        try:
+            Gio.Subprocess.new(['sh', '-c', 'pkill -x hypridle && hyprctl dispatch exec hypridle'],
+                               Gio.SubprocessFlags.STDOUT_SILENCE | Gio.SubprocessFlags.STDERR_SILENCE)
+        except GLib.Error as e:
+            print(f"⚠️ Could not restart hypridle: {e.message}")
+    
+    @staticmethod
+    def format_autostart_line(keyword, command, enabled=True):
+        """An exec line as written to the file; a disabled one is commented out"""
+        line = f"{keyword} = {command.replace('#', '##')}"
+        return line if enabled else f"# {line}"
+    
+    @classmethod
+    def plan_autostart(cls, document, entries, loaded=None):
+        """Queue autostart edits; entries is the wanted list for this file, in order
+        
+        Each entry is {'keyword', 'command', 'enabled'} plus the 'line' it was
+        read from, or None when new. The file's existing exec lines are slots
+        the wanted entries fill in order, so comments and other lines between
+        them stay put. An entry whose keyword and command are unchanged keeps
+        its original text, trailing comment included. Left-over slots are
+        deleted and extra entries go at the end of the file. loaded is the
+        autostart_source() of the file when the caller read it; if the exec
+        lines on disk no longer match it, filling the slots would overwrite
+        someone else's lines, so a ValueError is raised instead.
+        """
+        slots = autostart_entries(document)
+        if loaded is not None and autostart_source(document) != list(loaded):
+            raise ValueError(f"the exec lines in {document.path.name} were changed by another "
+                             f"program, reload the page before editing them")
+        originals = {node.line: (node, keyword, command) for node, keyword, command, _ in slots}
+        lines = []
+        for entry in entries:
+            original = originals.get(entry.get('line'))
+            if original is not None and original[1:] == (entry['keyword'], entry['command']):
+                node = original[0]
+                text = re.sub(r'^#+\s*', '', document.text[node.start:node.end].strip())
+                lines.append(text if entry['enabled'] else f"# {text}")
+            else:
+                lines.append(cls.format_autostart_line(entry['keyword'], entry['command'], entry['enabled']))
+        for (node, *_), line in zip(slots, lines):
+            if document.text[node.start:node.end].strip() != line:
+                document.replace_line(node, line)
+        for node, *_ in slots[len(lines):]:
+            document.remove_node(node)
+        if len(lines) > len(slots):
+            document.append_lines(lines[len(slots):])
+    
+    @tracer.traced('writer.update_autostart', 'writer')
+    def update_autostart(self, files, loaded=None):
+        """Write the exec lines of each file; files maps a path to its wanted entries
+        
+        loaded maps each path to its autostart_source() when it was read.
+        """
+        for path, entries in files.items():
+            for entry in entries:
+                command = entry['command']
+                if entry['keyword'] not in AUTOSTART_KEYWORDS or not command.strip() or '\n' in command:
+                    print(f"⚠️ Rejected autostart entry in {Path(path).name}: "
+                          f"{entry['keyword']} = {command!r}")
+                    return False
+        try:
+            changed = False
+            for path, entries in sorted(files.items()):
+                plan = functools.partial(self.plan_autostart, entries=entries,
+                                         loaded=None if loaded is None else loaded.get(path, []))
+                changed = self._edit(Path(path), plan, create=True) or changed
+            if changed:
+                self._reload_hyprland()
+            return True
+        except Exception as e:
+            print(f"Error updating autostart: {e}")
+            return False
+    
+    @tracer.traced('hyprctl reload', 'ipc')
+    def _reload_hyprland(self):
+        """Reload Hyprland configuration"""
+        if self._defer_reload:
+            return
+        try:
+            result = subprocess.run(
+                ['hyprctl', 'reload'],
+                check=False,
+                capture_output=True,
+                text=True,
+                timeout=5
+            )
+            if result.returncode == 0:
+                print("Omarchy reloaded successfully")
+            else:
+                print(f"⚠️ Omarchy reload warning: {result.stderr}")
+        except subprocess.TimeoutExpired:
+            print("⚠️ Omarchy reload timed out")
+        except FileNotFoundError:
+            print("⚠️ hyprctl not found - changes saved but not applied")
+        except Exception as e:
+            print(f"⚠️ Could not reload Omarchy: {e}")
+
+
+
+class OmarchySettingsStore:
+    """In-memory settings model shared by the GUI, the D-Bus service and the CLI"""
+    
+    PARSE_METHODS = (
+        'parse_decoration_settings',
+        'parse_general_settings',
+        'parse_input_settings',
+        'parse_animations_settings',
+    )
+    
+    def __init__(self, config_dir):
+        self.config_dir = Path(config_dir)
+        self.parser = OmarchyConfigParser(self.config_dir)
+        self.writer = OmarchyConfigWriter(self.config_dir)
+        self.values = {}
+        self.origins = {}
+        self.pending = {}
+        self.listeners = []
+        self._monitors = []
+        self._reload_source = 0
+        self.reload()
+    
+    @tracer.traced('store.reload', 'parser')
+    def reload(self):
+        """Re-read every config file and notify listeners about changed keys
+        
+        Values start from the layers below the user's files, Hyprland's
+        built-in defaults first, and the user's overrides go on top, so
+        every setting has a value. origins keeps the layer each came from.
+        """
+        values = {key: spec['default'] for key, spec in SETTINGS_SCHEMA.items()}
+        origins = dict.fromkeys(values, 'builtin')
+        for key, value in self.parser.default_settings().items():
+            values[key] = value
+            origins[key] = self.parser.layers.default(SETTINGS_SCHEMA[key]['path']).layer
+        for method in self.PARSE_METHODS:
+            overrides = getattr(self.parser, method)()
+            values.update(overrides)
+            origins.update(dict.fromkeys(overrides, 'user'))
+        changed = [key for key, value in values.items() if self.values.get(key) != value]
+        self.values = values
+        self.origins = origins
+        for key in changed:
+            if key not in self.pending:
+                self._notify(key, values[key])
+        return changed
+    
+    def keys(self):
+        return sorted(set(self.values) | set(self.pending))
+    
+    def get(self, key):
+        if key in self.pending:
+            return self.pending[key]
+        return self.values.get(key)
+    
+    def set(self, key, value):
+        """Stage a value; strings are converted to the setting's current type"""
+        if key not in SETTINGS_SCHEMA:
+            raise KeyError(f"Unknown setting: {key}")
+        if isinstance(value, str):
+            value = parse_config_value(value, SETTINGS_SCHEMA[key].get('type'))
+        error = settings_validator.validate(key, value)
+        if error:
+            raise ValueError(f"{key} {error}")
+        if self.get(key) == value:
+            return False
+        self.pending[key] = value
+        self._notify(key, value)
+        return True
+    
+    def apply(self):
+        """Write staged values through the writer"""
+        if not self.pending:
+            return True
+        pending = dict(self.pending)
+        if not self.writer.update_settings(pending):
+            return False
+        for key in pending:
+            if self.pending.get(key) == pending[key]:
+                del self.pending[key]
+        self.values.update(pending)
+        self.origins.update(dict.fromkeys(pending, 'user'))
+        return True
+    
+    def subscribe(self, callback):
+        """Call callback(key, value) whenever a setting changes"""
+        self.listeners.append(callback)
+        return callback
+    
+    def unsubscribe(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+    
+    def _notify(self, key, value):
+        for callback in list(self.listeners):
+            try:
+                callback(key, value)
+            except Exception as e:
+                print(f"⚠️ Settings listener failed: {e}")
+    
+    def watch_files(self):
+        """Re-parse when config files change on disk (needs a GLib main loop)"""
+        if self._monitors:
+            return
+        for path in {self.parser.looknfeel_path, self.parser.input_path}:
+            monitor = Gio.File.new_for_path(str(path)).monitor_file(Gio.FileMonitorFlags.NONE, None)
+            monitor.connect("changed", self._on_file_changed)
+            self._monitors.append(monitor)
+    
+    def _on_file_changed(self, monitor, file, other_file, event_type):
+        if self._reload_source:
+            GLib.source_remove(self._reload_source)
+        self._reload_source = GLib.timeout_add(200, self._on_reload_timeout)
+    
+    def _on_reload_timeout(self):
+        self._reload_source = 0
+        self.reload()
+        return GLib.SOURCE_REMOVE
+
+
+
+def _model_property(key, spec):
+    """GObject property tuple for one schema setting"""
+    flags = GObject.ParamFlags.READWRITE | GObject.ParamFlags.EXPLICIT_NOTIFY
+    kind = spec.get('type')
+    if kind == 'bool':
+        return (bool, key, spec['path'], False, flags)
+    if kind == 'int':
+        return (int, key, spec['path'], -2 ** 31, 2 ** 31 - 1, 0, flags)
+    if kind == 'float':
+        return (float, key, spec['path'], -sys.float_info.max, sys.float_info.max, 0.0, flags)
+    return (str, key, spec['path'], '', flags)
+
+
+class OmarchySettingsModel(GObject.Object):
+    """Every schema setting as a GObject property the pages bind widgets to
+    
+    Property names are the schema keys with dashes (kb_layout is kb-layout).
+    notify:: fires only when a value really changes, and the changed signal
+    batches all changes of one main-loop iteration into a single dict. The
+    model also remembers the saved values so it can tell what was edited,
+    and which settings were reset to drop the user's override on Apply.
+    """
+    
+    __gproperties__ = {
+        key.replace('_', '-'): _model_property(key, spec)
+        for key, spec in SETTINGS_SCHEMA.items()
+    }
+    __gsignals__ = {
+        'changed': (GObject.SignalFlags.RUN_FIRST, None, (object,)),
+    }
+    
+    def __init__(self, values=None):
+        super().__init__()
+        self._values = {key: spec['default'] for key, spec in SETTINGS_SCHEMA.items()}
+        for key, value in (values or {}).items():
+            if key in SETTINGS_SCHEMA:
+                self._values[key] = self._coerce(key, value)
+        self._saved = dict(self._values)
+        self._resets = set()
+        self._resetting = False
+        self._batch = {}
+        self._flush_source = 0
+    
+    @staticmethod
+    def property_name(key):
+        return key.replace('_', '-')
+    
+    @staticmethod
+    def _coerce(key, value):
+        kind = SETTINGS_SCHEMA[key].get('type')
+        if kind == 'bool':
+            return bool(value)
+        if kind == 'int':
+            return int(value)
+        if kind == 'float':
+            return round(float(value), 4)
+        return str(value)
+    
+    def do_get_property(self, pspec):
+        return self._values[pspec.name.replace('-', '_')]
+    
+    def do_set_property(self, pspec, value):
+        key = pspec.name.replace('-', '_')
+        value = self._coerce(key, value)
+        if self._values.get(key) == value:
+            return
+        if not self._resetting:
+            self._resets.discard(key)
+        self._values[key] = value
+        self.notify_by_pspec(pspec)
+        self._queue(key, value)
+    
+    def _queue(self, key, value):
+        self._batch[key] = value
+        if not self._flush_source:
+            self._flush_source = GLib.idle_add(self._flush)
+    
+    def _flush(self):
+        self._flush_source = 0
+        batch, self._batch = self._batch, {}
+        if batch:
+            self.emit('changed', batch)
+        return GLib.SOURCE_REMOVE
+    
+    def get_value(self, key):
+        return self._values[key]
+    
+    def set_value(self, key, value):
+        self.set_property(self.property_name(key), self._coerce(key, value))
+    
+    def load(self, key, value):
+        """Take a value that is already saved (or staged) outside the window"""
+        self._saved[key] = self._coerce(key, value)
+        self._resets.discard(key)
+        self.set_value(key, value)
+    
+    def reset(self, key, default):
+        """Show the lower layer's value and drop the user's override on Apply"""
+        self._resetting = True
+        try:
+            self.set_value(key, default)
+        finally:
+            self._resetting = False
+        self._resets.add(key)
+        self._queue(key, self._values[key])
+    
+    def resets(self):
+        return set(self._resets)
+    
+    def commit_resets(self):
+        """The overrides are gone from disk; the shown values are the saved ones"""
+        for key in self._resets:
+            self._saved[key] = self._values[key]
+        self._resets.clear()
+    
+    def snapshot(self):
+        return dict(self._values)
+    
+    def changes(self):
+        """Settings edited since they were loaded, not counting resets"""
+        return {key: value for key, value in self._values.items()
+                if self._saved[key] != value and key not in self._resets}
+
+
+def bind_setting(model, key, widget):
+    """Bind a widget to a model property in both directions"""
+    flags = GObject.BindingFlags.BIDIRECTIONAL | GObject.BindingFlags.SYNC_CREATE
+    if isinstance(widget, (Adw.SwitchRow, Gtk.Switch)):
+        target, target_property = widget, 'active'
+    elif isinstance(widget, Gtk.Scale):
+        target, target_property = widget.get_adjustment(), 'value'
+    else:
+        target, target_property = widget, 'value'
+    return model.bind_property(model.property_name(key), target, target_property, flags)
+
+
+
+class OmarchySettingsService:
+    """D-Bus interface exposing the settings store on the application's object path"""
+    
+    INTERFACE = SETTINGS_INTERFACE
+    
+    INTROSPECTION_XML = """
+    <node>
+      <interface name="com.omarchy.Settings">
+        <method name="Get">
+          <arg type="s" name="key" direction="in"/>
+          <arg type="s" name="value" direction="out"/>
+        </method>
+        <method name="Set">
+          <arg type="s" name="key" direction="in"/>
+          <arg type="s" name="value" direction="in"/>
+          <arg type="b" name="changed" direction="out"/>
+        </method>
+        <method name="Apply">
+          <arg type="b" name="success" direction="out"/>
+        </method>
+        <method name="Subscribe">
+          <arg type="a{ss}" name="snapshot" direction="out"/>
+        </method>
+        <method name="ConfigDir">
+          <arg type="s" name="path" direction="out"/>
+        </method>
+        <signal name="Changed">
+          <arg type="s" name="key"/>
+          <arg type="s" name="value"/>
+        </signal>
+      </interface>
+    </node>
+    """
+    
+    def __init__(self, store):
+        self.store = store
+        self._connection = None
+        self._object_path = None
+        self._registration_id = 0
+        self.store.subscribe(self._on_store_changed)
+    
+    def register(self, connection, object_path):
+        node_info = Gio.DBusNodeInfo.new_for_xml(self.INTROSPECTION_XML)
+        self._connection = connection
+        self._object_path = object_path
+        self._registration_id = connection.register_object(
+            object_path, node_info.interfaces[0], self._on_method_call, None, None
+        )
+    
+    def unregister(self):
+        if self._connection and self._registration_id:
+            self._connection.unregister_object(self._registration_id)
+        self._registration_id = 0
+        self._connection = None
+    
+    def _snapshot(self):
+        return {key: format_config_value(self.store.get(key)) for key in self.store.keys()}
+    
+    @tracer.traced('dbus.method_call', 'ipc')
+    def _on_method_call(self, connection, sender, object_path, interface_name,
+                        method_name, parameters, invocation):
+        try:
+            if method_name == 'Get':
+                key, = parameters.unpack()
+                if self.store.get(key) is None:
+                    raise KeyError(f"Unknown setting: {key}")
+                result = GLib.Variant('(s)', (format_config_value(self.store.get(key)),))
+            elif method_name == 'Set':
+                key, value = parameters.unpack()
+                result = GLib.Variant('(b)', (self.store.set(key, value),))
+            elif method_name == 'Apply':
+                result = GLib.Variant('(b)', (self.store.apply(),))
+            elif method_name == 'Subscribe':
+                result = GLib.Variant('(a{ss})', (self._snapshot(),))
+            elif method_name == 'ConfigDir':
+                result = GLib.Variant('(s)', (str(self.store.config_dir),))
+            else:
+                raise KeyError(f"Unknown method: {method_name}")
+            invocation.return_value(result)
+        except (KeyError, ValueError) as e:
+            invocation.return_dbus_error(f'{self.INTERFACE}.Error.InvalidArgs', str(e))
+        except Exception as e:
+            invocation.return_dbus_error(f'{self.INTERFACE}.Error.Failed', str(e))
+    
+    def _on_store_changed(self, key, value):
+        if not self._connection:
+            return
+        self._connection.emit_signal(
+            None, self._object_path, self.INTERFACE, 'Changed',
+            GLib.Variant('(ss)', (key, format_config_value(value)))
+        )
+
+
+
+class HyprlandEventStream:
+    """Asynchronous reader for Hyprland's .socket2.sock event stream
+    
+    Lines look like "activelayout>>keyboard,English (US)". Events are read on
+    the GLib main loop and dispatched only to callbacks subscribed to that
+    event name ("*" receives everything). OMARCHY_HYPR_SOCKET2 points the
+    reader at another socket, such as tools/fake_socket2.py.
+    """
+    
+    RECONNECT_SECONDS = 3
+    
+    def __init__(self, socket_path=None):
+        self.socket_path = socket_path or self.default_socket_path()
+        self.subscribers = {}
+        self._cancellable = None
+        self._connection = None
+        self._stream = None
+        self._reconnect_source = 0
+    
+    @staticmethod
+    def default_socket_path():
+        override = os.environ.get('OMARCHY_HYPR_SOCKET2')
+        if override:
+            return Path(override)
+        signature = os.environ.get('HYPRLAND_INSTANCE_SIGNATURE')
+        if not signature:
+            return None
+        runtime_dir = os.environ.get('XDG_RUNTIME_DIR', f"/run/user/{os.getuid()}")
+        path = Path(runtime_dir) / "hypr" / signature / ".socket2.sock"
+        if not path.exists():
+            path = Path("/tmp/hypr") / signature / ".socket2.sock"
+        return path
+    
+    @staticmethod
+    def parse_line(line):
+        """Split an event line into (name, data)"""
+        name, _, data = line.partition('>>')
+        return name.strip(), data.rstrip('\n')
+    
+    def subscribe(self, event, callback):
+        """Call callback(event, data) for each matching event"""
+        self.subscribers.setdefault(event, []).append(callback)
+        return callback
+    
+    def unsubscribe(self, event, callback):
+        callbacks = self.subscribers.get(event, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+    
+    def dispatch(self, event, data):
+        for callback in self.subscribers.get(event, []) + self.subscribers.get('*', []):
+            try:
+                with tracer.span(f'event.{event}', 'ipc'):
+                    callback(event, data)
+            except Exception as e:
+                print(f"⚠️ Event handler for {event} failed: {e}")
+    
+    def start(self):
+        """Connect to the socket; reconnects on its own if Hyprland restarts"""
+        if self.socket_path is None or self._cancellable is not None:
+            return
+        self._cancellable = Gio.Cancellable()
+        client = Gio.SocketClient()
+        address = Gio.UnixSocketAddress.new(str(self.socket_path))
+        client.connect_async(address, self._cancellable, self._on_connected, None)
+    
+    def stop(self):
+        if self._reconnect_source:
+            GLib.source_remove(self._reconnect_source)
+            self._reconnect_source = 0
+        if self._cancellable is not None:
+            self._cancellable.cancel()
+            self._cancellable = None
+        if self._connection is not None:
+            self._connection.close(None)
+            self._connection = None
+        self._stream = None
+    
+    def _on_connected(self, client, result, user_data):
+        try:
+            self._connection = client.connect_finish(result)
+        except GLib.Error as e:
+            if not e.matches(Gio.io_error_quark(), Gio.IOErrorEnum.CANCELLED):
+                print(f"⚠️ Could not connect to Hyprland events: {e.message}")
+                self._schedule_reconnect()
+            return
+        self._stream = Gio.DataInputStream.new(self._connection.get_input_stream())
+        self._read_next()
+    
+    def _read_next(self):
+        self._stream.read_line_async(GLib.PRIORITY_DEFAULT, self._cancellable, self._on_line, None)
+    
+    def _on_line(self, stream, result, user_data):
+        try:
+            line, _ = stream.read_line_finish_utf8(result)
+        except GLib.Error as e:
+            if not e.matches(Gio.io_error_quark(), Gio.IOErrorEnum.CANCELLED):
+                self._schedule_reconnect()
+            return
+        if line is None:
+            self._schedule_reconnect()
+            return
+        if line:
+            self.dispatch(*self.parse_line(line))
+        self._read_next()
+    
+    def _schedule_reconnect(self):
+        self.stop()
+        self._reconnect_source = GLib.timeout_add_seconds(self.RECONNECT_SECONDS, self._on_reconnect)
+    
+    def _on_reconnect(self):
+        self._reconnect_source = 0
+        self.start()
+        return GLib.SOURCE_REMOVE
+
+class HyprlandOptionCatalog:
+    """Every Hyprland option (name, type, range, default, description)
+    
+    Imported from `hyprctl descriptions -j` and cached in
+    ~/.cache/omarchy-settings keyed by the installed Hyprland binary, so the
+    query runs once per Hyprland upgrade. Without Hyprland the bundled
+    hyprland-descriptions.json fixture is used.
+    """
+    
+    TYPE_NAMES = {
+        0: 'bool', 1: 'int', 2: 'float', 3: 'string', 4: 'string',
+        5: 'color', 6: 'choice', 7: 'gradient', 8: 'vector',
+    }
+    CACHE_VERSION = 1
+    FIXTURE_PATH = Path(__file__).resolve().with_name("hyprland-descriptions.json")
+    
+    def __init__(self, cache_dir=None):
+        self.cache_dir = Path(cache_dir) if cache_dir else cache_home()
+        self.options = None
+        self.version = None
+    
+    @staticmethod
+    def _hyprland_stamp():
+        """Identify the installed Hyprland build without spawning a process"""
+        binary = shutil.which('Hyprland') or shutil.which('hyprland')
+        if not binary:
+            return None
+        stat = Path(binary).stat()
+        return f"{binary}:{stat.st_mtime_ns}:{stat.st_size}"
+    
+    @tracer.traced('catalog.load', 'parser')
+    def load(self):
+        """Return the normalized option list, loading it on first use"""
+        if self.options is not None:
+            return self.options
+        stamp = self._hyprland_stamp()
+        cache_path = self.cache_dir / "descriptions.json"
+        raw = None
+        
+        if stamp:
+            try:
+                cached = json.loads(cache_path.read_text())
+                if cached.get('cache_version') == self.CACHE_VERSION and cached.get('stamp') == stamp:
+                    raw, self.version = cached['options'], cached.get('version')
+            except (OSError, ValueError, KeyError):
+                raw = None
+            if raw is None:
+                raw = self._query_hyprctl()
+                if raw is not None:
+                    self._write_cache(cache_path, stamp, raw)
+        
+        if raw is None:
+            try:
+                raw = json.loads(self.FIXTURE_PATH.read_text())
+                self.version = 'bundled'
+            except (OSError, ValueError) as e:
+                print(f"⚠️ No Hyprland option catalogue available: {e}")
+                raw = []
+        
+        self.options = [self.normalize(item) for item in raw if isinstance(item, dict) and item.get('value')]
+        return self.options
+    
+    def _query_hyprctl(self):
+        try:
+            with tracer.span('hyprctl descriptions', 'ipc'):
+                result = subprocess.run(['hyprctl', '-j', 'descriptions'],
+                                        check=False, capture_output=True, text=True, timeout=10)
+                version = subprocess.run(['hyprctl', '-j', 'version'],
+                                         check=False, capture_output=True, text=True, timeout=5)
+            if result.returncode != 0:
+                return None
+            try:
+                self.version = json.loads(version.stdout).get('tag')
+            except ValueError:
+                self.version = None
+            data = json.loads(result.stdout)
+            return data if isinstance(data, list) and data else None
+        except (OSError, subprocess.TimeoutExpired, ValueError) as e:
+            print(f"⚠️ hyprctl descriptions failed: {e}")
+            return None
+    
+    def _write_cache(self, cache_path, stamp, raw):
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            cache_path.write_text(json.dumps({
+                'cache_version': self.CACHE_VERSION, 'stamp': stamp,
+                'version': self.version, 'options': raw,
+            }))
+        except OSError as e:
+            print(f"⚠️ Could not cache option catalogue: {e}")
+    
+    @classmethod
+    def normalize(cls, item):
+        """Flatten one hyprctl description entry"""
+        data = item.get('data') or {}
+        kind = cls.TYPE_NAMES.get(item.get('type'), 'string')
+        path = item['value']
+        option = {
+            'path': path,
+            'section': path.split(':', 1)[0],
+            'name': path.split(':', 1)[-1],
+            'type': kind,
+            'description': item.get('description', ''),
+            'default': data.get('default', data.get('value')),
+            'current': data.get('current'),
+        }
+        if kind in ('int', 'float'):
+            option['min'] = data.get('min')
+            option['max'] = data.get('max')
+        elif kind == 'choice':
+            option['choices'] = str(data.get('choices', '')).split(',')
+            option['default'] = option['choices'][data.get('firstIndex', 0)] if option['choices'] else ''
+        elif kind == 'vector':
+            option['default'] = f"{data.get('x', 0)} {data.get('y', 0)}"
+        elif kind == 'color' and isinstance(option['default'], int):
+            option['default'] = f"0x{option['default']:08x}"
+        return option
+    
+    def sections(self):
+        """Options grouped by their top-level section, in catalogue order"""
+        grouped = {}
+        for option in self.load():
+            grouped.setdefault(option['section'], []).append(option)
+        return grouped
+    
+    def schema(self):
+        """Validator schema keyed by option path"""
+        return {
+            option['path']: {key: option[key] for key in ('type', 'min', 'max') if option.get(key) is not None}
+            for option in self.load() if option['type'] in ('bool', 'int', 'float')
+        }
+
+
+
+class OmarchyThemes:
+    """Installed Omarchy themes and the current-theme symlink
+    
+    Themes are directories under ~/.config/omarchy/themes (user) and
+    ~/.local/share/omarchy/themes (stock); the active one is the target of
+    ~/.config/omarchy/current/theme.
+    """
+    
+    IMAGE_SUFFIXES = ('.png', '.jpg', '.jpeg', '.webp')
+    
+    def __init__(self, home=None):
+        home = Path(home) if home else Path.home()
+        self.theme_dirs = [
+            home / ".config" / "omarchy" / "themes",
+            home / ".local" / "share" / "omarchy" / "themes",
+        ]
+        self.current_dir = home / ".config" / "omarchy" / "current"
+        self.current_link = self.current_dir / "theme"
+    
+    @tracer.traced('themes.scan', 'parser')
+    def scan(self):
+        """List themes by name with the image used for their thumbnail"""
+        themes = {}
+        for base in self.theme_dirs:
+            try:
+                entries = sorted(os.scandir(base), key=lambda e: e.name)
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.name in themes or not entry.is_dir():
+                    continue
+                themes[entry.name] = {
+                    'name': entry.name,
+                    'path': Path(entry.path),
+                    'preview': self._preview_source(Path(entry.path)),
+                }
+        return list(themes.values())
+    
+    def _preview_source(self, theme_dir):
+        """A theme's preview.png, or else its first background image"""
+        for name in ('preview.png', 'preview.jpg'):
+            if (theme_dir / name).is_file():
+                return theme_dir / name
+        return self._first_background(theme_dir)
+    
+    def _first_background(self, theme_dir):
+        try:
+            backgrounds = sorted(
+                entry.path for entry in os.scandir(theme_dir / "backgrounds")
+                if entry.name.lower().endswith(self.IMAGE_SUFFIXES)
+            )
+        except OSError:
+            return None
+        return Path(backgrounds[0]) if backgrounds else None
+    
+    def current(self):
+        try:
+            return Path(os.readlink(self.current_link)).name
+        except OSError:
+            return None
+    
+    @staticmethod
+    def _swap_link(link, target):
+        """Point a symlink somewhere else in one rename, never leaving it missing"""
+        temporary = link.with_name(f".{link.name}.{os.getpid()}.tmp")
+        if temporary.is_symlink():
+            temporary.unlink()
+        os.symlink(target, temporary)
+        os.replace(temporary, link)
+    
+    def switch(self, theme, writer):
+        """Make a theme current and reload Hyprland once"""
+        self.current_dir.mkdir(parents=True, exist_ok=True)
+        self._swap_link(self.current_link, theme['path'])
+        background = self._first_background(theme['path'])
+        if background is not None:
+            self._swap_link(self.current_dir / "background", background)
+        writer._reload_hyprland()
+        print(f"🎨 Theme switched to {theme['name']}")
+
+
+class ThemeThumbnailCache:
+    """Scaled theme previews generated on worker threads and kept on disk
+    
+    Thumbnails live in ~/.cache/omarchy-settings/thumbnails, named by a hash
+    of the source path, mtime and size, so an unchanged image is never decoded
+    again. Results are handed back on the GLib main loop.
+    """
+    
+    WIDTH = 240
+    HEIGHT = 150
+    
+    def __init__(self, cache_dir=None, workers=4):
+        self.cache_dir = (Path(cache_dir) if cache_dir else cache_home()) / "thumbnails"
+        self.workers = workers
+        self._executor = None
+        self._waiting = {}
+        self._futures = {}
+    
+    def thumbnail_path(self, source):
+        stat = os.stat(source)
+        key = f"{source}:{stat.st_mtime_ns}:{stat.st_size}:{self.WIDTH}x{self.HEIGHT}"
+        return self.cache_dir / f"{hashlib.sha1(key.encode()).hexdigest()}.png"
+    
+    def request(self, source, callback):
+        """Call callback(path) with the thumbnail, generating it if needed"""
+        try:
+            target = self.thumbnail_path(source)
+        except OSError:
+            callback(None)
+            return
+        if target.exists():
+            callback(target)
+            return
+        if target in self._waiting:
+            self._waiting[target].append(callback)
+            return
+        self._waiting[target] = [callback]
+        self._submit(source, target)
+    
+    def _submit(self, source, target):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                thread_name_prefix="thumbnails")
+        future = self._executor.submit(self._generate, source, target)
+        self._futures[target] = (source, future)
+        future.add_done_callback(lambda f: GLib.idle_add(self._deliver, target, f))
+    
+    def _generate(self, source, target):
+        """Decode and scale one image; runs on a worker thread"""
+        pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(str(source), self.WIDTH, self.HEIGHT, True)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        temporary = target.with_suffix(f".{threading.get_ident()}.tmp")
+        pixbuf.savev(str(temporary), "png", [], [])
+        os.replace(temporary, target)
+        return target
+    
+    def _deliver(self, target, future):
+        if future.cancelled():
+            # Stopped by shutdown(); the callbacks wait for resume()
+            return GLib.SOURCE_REMOVE
+        self._futures.pop(target, None)
+        try:
+            path = future.result()
+        except Exception as e:
+            print(f"⚠️ Could not make thumbnail: {e}")
+            path = None
+        for callback in self._waiting.pop(target, ()):
+            callback(path)
+        return GLib.SOURCE_REMOVE
+    
+    def shutdown(self):
+        """Stop the workers; thumbnails not yet started wait for resume()"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    def resume(self):
+        """Queue again the thumbnails shutdown() cancelled"""
+        for target, (source, future) in list(self._futures.items()):
+            if future.cancelled():
+                self._submit(source, target)
+
+
+class ParsedFiles:
+    """Whole config documents parsed on the worker pool, handed over on the main loop
+    
+    parse() returns at once; get() calls back right away if a document has
+    already arrived, or from the main loop as soon as it does.
+    """
+    
+    def __init__(self):
+        self.documents = {}
+        self._waiting = {}
+    
+    def parse(self, paths):
+        """Start parsing paths concurrently, replacing any earlier result"""
+        for path in map(Path, paths):
+            self.documents.pop(path, None)
+            self._waiting.setdefault(path, [])
+            future = config_pool().submit(self._load, path)
+            future.add_done_callback(lambda f, path=path: GLib.idle_add(self._deliver, path, f))
+    
+    @staticmethod
+    def _load(path):
+        return HyprConfDocument.load(path) if path.exists() else HyprConfDocument('', path)
+    
+    def _deliver(self, path, future):
+        try:
+            document = future.result()
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"⚠️ Could not read {path}: {e}")
+            document = HyprConfDocument('', path)
+        self.documents[path] = document
+        for callback in self._waiting.pop(path, ()):
+            callback(document)
+        return GLib.SOURCE_REMOVE
+    
+    def get(self, path, callback):
+        """Call callback(document) once path has been parsed"""
+        path = Path(path)
+        if path in self.documents:
+            callback(self.documents[path])
+            return
+        if path not in self._waiting:
+            self.parse([path])
+        self._waiting[path].append(callback)
+
+
+class PendingChanges:
+    """What Apply would change, as a unified diff per config file
+    
+    Each file is parsed once per on-disk version and kept. A refresh discards
+    the queued edits, replays the pending values onto the kept documents and
+    diffs only the touched lines, so it stays cheap on very large configs.
+    """
+    
+    def __init__(self, writer):
+        self.writer = writer
+        self.documents = {}
+        self._stamps = {}
+    
+    def _drop_stale(self):
+        for path in list(self.documents):
+            try:
+                stat = path.stat()
+                stamp = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                stamp = None
+            if self._stamps.get(path) != stamp:
+                del self.documents[path]
+                self._stamps.pop(path, None)
+    
+    def _document(self, path):
+        if path not in self.documents:
+            self.documents[path] = (HyprConfDocument.load(path) if path.exists()
+                                    else HyprConfDocument('', path))
+        if path not in self._stamps and path.exists():
+            stat = path.stat()
+            self._stamps[path] = (stat.st_mtime_ns, stat.st_size)
+        return self.documents[path]
+    
+    @tracer.traced('pending.refresh', 'writer')
+    def refresh(self, settings=None, options=None, curves=None, monitors=None, removals=None,
+                devices=None, rules=None):
+        """Replay pending values and return {file name: diff} for changed files"""
+        self._drop_stale()
+        for document in self.documents.values():
+            document.discard()
+        
+        for file_path, paths in (removals or {}).items():
+            self.writer.plan_removals(self._document(Path(file_path)), paths)
+        
+        for key, value in (settings or {}).items():
+            if key not in SETTINGS_SCHEMA:
+                continue
+            path = self.writer._file_path(SETTINGS_SCHEMA[key]['file'])
+            if path.exists():
+                self._document(path).set(SETTINGS_SCHEMA[key]['path'], format_config_value(value))
+        
+        for option, value in (options or {}).items():
+            target = self.writer._file_for_option(option, self.documents)
+            self._document(target).set(option, format_config_value(value))
+        
+        if curves is not None and self.writer.looknfeel_path.exists():
+            self.writer.plan_animation_curves(self._document(self.writer.looknfeel_path), *curves)
+        
+        if monitors:
+            self.writer.plan_monitors(self._document(self.writer.config_dir / "monitors.conf"), monitors)
+        
+        if devices:
+            self.writer.plan_devices(self._document(self.writer.input_path), devices)
+        
+        if rules and (rules[0] or rules[1]):
+            try:
+                self.writer.plan_window_rules(self._document, *rules,
+                                              self.writer._rules_path(self.documents))
+            except ValueError as e:
+                print(f"⚠️ No preview for the window rules: {e}")
+        
+        return {
+            path.name: document.diff(path.name)
+            for path, document in sorted(self.documents.items()) if document.modified
+        }
+    
+    def preview(self, path, plan):
+        """Diff of plan(document) against one file, for pages outside refresh()"""
+        self._drop_stale()
+        path = Path(path)
+        document = self._document(path)
+        document.discard()
+        plan(document)
+        return {path.name: document.diff(path.name)} if document.modified else {}
+
+
+class SettingsSearchIndex:
+    """Prefix trie plus trigram index over every searchable setting
+    
+    Built once; each query walks the trie for exact prefixes and falls back
+    to trigram overlap for typos, so a keystroke costs a few set operations
+    rather than a scan over every row.
+    """
+    
+    ALIASES = {
+        'blur_size': ('radius', 'frosted'),
+        'blur_passes': ('quality', 'smoothness'),
+        'blur_noise': ('grain', 'texture'),
+        'blur_xray': ('transparency', 'see through'),
+        'rounding': ('corners', 'radius', 'round'),
+        'shadow_range': ('drop shadow',),
+        'gaps_in': ('spacing', 'padding', 'margin'),
+        'gaps_out': ('spacing', 'margin', 'edge'),
+        'border_size': ('frame', 'thickness', 'outline'),
+        'kb_layout': ('language', 'keyboard', 'xkb'),
+        'kb_options': ('switch', 'hotkey', 'toggle', 'shortcut'),
+        'repeat_rate': ('typematic', 'keyboard speed'),
+        'repeat_delay': ('typematic', 'hold'),
+        'sensitivity': ('mouse speed', 'pointer', 'acceleration', 'dpi'),
+        'touchpad_natural_scroll': ('reverse', 'macos', 'trackpad'),
+        'touchpad_scroll_factor': ('trackpad', 'scroll speed'),
+        'animations_enabled': ('motion', 'transitions'),
+    }
+    
+    WORD_RE = re.compile(r'[a-z0-9]+')
+    
+    def __init__(self):
+        self.entries = []
+        self._trie = {}
+        self._trigrams = {}
+        self._words = {}
+    
+    @classmethod
+    def _tokens(cls, text):
+        return cls.WORD_RE.findall(text.lower())
+    
+    @staticmethod
+    def _grams(word):
+        padded = f"  {word} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+    
+    def add(self, title, subtitle='', key='', path='', page='', target=None, aliases=()):
+        """Index one setting; returns its entry id"""
+        entry_id = len(self.entries)
+        aliases = tuple(aliases) + self.ALIASES.get(key, ())
+        self.entries.append({
+            'title': title.strip(), 'subtitle': subtitle or '', 'key': key,
+            'path': path, 'page': page, 'target': target,
+        })
+        weighted = [(title, 3), (' '.join(aliases), 2), (key, 2), (path, 1), (subtitle or '', 1)]
+        for text, weight in weighted:
+            for word in self._tokens(text):
+                self._add_word(word, entry_id, weight)
+        return entry_id
+    
+    def _add_word(self, word, entry_id, weight):
+        node = self._trie
+        for char in word:
+            node = node.setdefault(char, {'': {}})
+            ids = node['']
+            ids[entry_id] = max(ids.get(entry_id, 0), weight)
+        if word not in self._words:
+            self._words[word] = {}
+            for gram in self._grams(word):
+                self._trigrams.setdefault(gram, set()).add(word)
+        ids = self._words[word]
+        ids[entry_id] = max(ids.get(entry_id, 0), weight)
+    
+    def _prefix(self, token):
+        node = self._trie
+        for char in token:
+            node = node.get(char)
+            if node is None:
+                return {}
+        return node['']
+    
+    def _fuzzy(self, token):
+        """Entries containing a word that shares most trigrams with token"""
+        grams = self._grams(token)
+        counts = {}
+        for gram in grams:
+            for word in self._trigrams.get(gram, ()):
+                counts[word] = counts.get(word, 0) + 1
+        scores = {}
+        for word, shared in counts.items():
+            similarity = shared / max(len(grams), len(self._grams(word)))
+            if similarity < 0.4:
+                continue
+            for entry_id, weight in self._words[word].items():
+                scores[entry_id] = max(scores.get(entry_id, 0), weight * similarity)
+        return scores
+    
+    @tracer.traced('search.query', 'ui')
+    def search(self, query, limit=12):
+        """Return the best matching entries for a query"""
+        tokens = self._tokens(query)
+        if not tokens:
+            return []
+        total = None
+        for token in tokens:
+            scores = self._prefix(token)
+            if not scores and len(token) >= 3:
+                scores = self._fuzzy(token)
+            if total is None:
+                total = dict(scores)
+            else:
+                total = {i: total[i] + w for i, w in scores.items() if i in total}
+            if not total:
+                return []
+        ranked = sorted(total.items(), key=lambda item: (-item[1], self.entries[item[0]]['title']))
+        return [self.entries[entry_id] for entry_id, _ in ranked[:limit]]
+
+
+
+class HyprctlSnapshot:
+    """Cached result of one `hyprctl -j <command>` query
+    
+    The process runs once, asynchronously; later reads return the cached
+    data. The cache refreshes only when one of the given socket2 events
+    arrives, never per redraw or per page open.
+    """
+    
+    def __init__(self, command, events=None, refresh_on=()):
+        self.command = command
+        self.data = None
+        self.listeners = []
+        self._loading = False
+        self._watches = []
+        if events is not None:
+            for event in refresh_on:
+                events.subscribe(event, lambda event, data: self.refresh())
+    
+    def subscribe(self, callback, fetch=True):
+        """Call callback(data) whenever a fetch completes"""
+        self.listeners.append(callback)
+        if not fetch:
+            return callback
+        if self.data is not None:
+            callback(self.data)
+        elif not self._loading:
+            self.refresh()
+        return callback
+    
+    def refresh(self):
+        """Fetch the data again in the background"""
+        if self._loading:
+            return
+        self._loading = True
+        try:
+            process = Gio.Subprocess.new(
+                ['hyprctl', '-j', self.command],
+                Gio.SubprocessFlags.STDOUT_PIPE | Gio.SubprocessFlags.STDERR_SILENCE
+            )
+            process.communicate_utf8_async(None, None, self._on_finished, None)
+        except GLib.Error as e:
+            self._loading = False
+            print(f"⚠️ hyprctl {self.command} failed: {e.message}")
+    
+    def watch(self, path, delay_ms=500):
+        """Also refresh when entries appear in or vanish from a directory
+        
+        Hotplugging creates and removes nodes under /dev/input in bursts, so
+        the refresh waits until the directory has been quiet for delay_ms.
+        """
+        pending = {'source': 0}
+        
+        def on_timeout():
+            pending['source'] = 0
+            self.refresh()
+            return GLib.SOURCE_REMOVE
+        
+        def on_changed(monitor, file, other_file, event_type):
+            if event_type not in (Gio.FileMonitorEvent.CREATED, Gio.FileMonitorEvent.DELETED):
+                return
+            if pending['source']:
+                GLib.source_remove(pending['source'])
+            pending['source'] = GLib.timeout_add(delay_ms, on_timeout)
+        
+        try:
+            monitor = Gio.File.new_for_path(str(path)).monitor_directory(Gio.FileMonitorFlags.NONE, None)
+        except GLib.Error as e:
+            print(f"⚠️ Cannot watch {path}: {e.message}")
+            return None
+        monitor.connect("changed", on_changed)
+        self._watches.append(monitor)
+        return monitor
+    
+    def fetch_sync(self):
+        """Blocking fetch for headless callers without a main loop"""
+        try:
+            with tracer.span(f'hyprctl {self.command}', 'ipc'):
+                result = subprocess.run(
+                    ['hyprctl', '-j', self.command],
+                    check=False, capture_output=True, text=True, timeout=5
+                )
+            self.data = json.loads(result.stdout) if result.returncode == 0 else None
+        except (OSError, subprocess.TimeoutExpired, ValueError) as e:
+            print(f"⚠️ hyprctl {self.command} failed: {e}")
+            self.data = None
+        return self.data
+    
+    def _on_finished(self, process, result, user_data):
+        self._loading = False
+        try:
+            with tracer.span(f'hyprctl {self.command}', 'ipc'):
+                _, stdout, _ = process.communicate_utf8_finish(result)
+            self.data = json.loads(stdout) if stdout else None
+        except (GLib.Error, ValueError) as e:
+            print(f"⚠️ Could not read hyprctl {self.command}: {e}")
+            return
+        for callback in list(self.listeners):
+            callback(self.data)
+
+
+def read_autostart(layers, documents=None):
+    """Every autostart entry in the order Hyprland reads the files, as dicts
+    
+    The user's files are read whole so disabled (commented-out) entries are
+    listed too; documents can hand in files that are already parsed. Lines
+    from Omarchy's defaults and the theme come from the layered config.
+    """
+    documents = documents or {}
+    others = {}
+    for value in layers.assignments(*AUTOSTART_KEYWORDS):
+        if value.layer != 'user':
+            others.setdefault(value.file, []).append(value)
+    entries = []
+    for layer, path in layers.files():
+        if layer != 'user':
+            entries.extend(
+                {'layer': layer, 'file': path, 'line': value.line, 'keyword': value.path,
+                 'command': value.value, 'enabled': True}
+                for value in others.get(path, ())
+            )
+            continue
+        document = documents.get(path)
+        if document is None:
+            try:
+                document = HyprConfDocument.load(path)
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"⚠️ Could not read {path}: {e}")
+                continue
+        entries.extend(
+            {'layer': layer, 'file': path, 'line': node.line, 'keyword': keyword,
+             'command': command, 'enabled': enabled}
+            for node, keyword, command, enabled in autostart_entries(document)
+        )
+    return entries
+
+
+class AutostartProfiler:
+    """Dry-run autostart commands one at a time and measure what each costs
+    
+    Only the user's own enabled exec-once entries are profiled, inside
+    sandbox(): a private runtime directory with no Hyprland signature, no
+    session bus and no display of the live session, so a command cannot
+    reach Hyprland, systemd or the running programs. When weston is
+    installed it provides a headless display there. Each command starts
+    in a session of its own with stdin closed and its output discarded,
+    inside a `systemd-run --user --scope` unit when systemd is available.
+    It is watched through /proc until it goes quiet, and then the session
+    and the whole scope are killed. Time to ready is when the session last
+    used CPU before a quiet spell, or when all of it had exited; memory is
+    the peak RSS summed over the session.
+    """
+    
+    INTERVAL = 0.025
+    QUIET = 0.5
+    TIMEOUT = 10.0
+    HIDDEN_ENV = ('WAYLAND_DISPLAY', 'DISPLAY', 'HYPRLAND_INSTANCE_SIGNATURE', 'HYPRLAND_CMD',
+                  'DBUS_SESSION_BUS_ADDRESS', 'SWAYSOCK', 'XDG_SESSION_ID', 'XDG_VTNR')
+    DISPLAY_SOCKET = 'wayland-profile'
+    
+    def __init__(self, timeout=None, quiet=None):
+        self.timeout = timeout or self.TIMEOUT
+        self.quiet = quiet or self.QUIET
+        self.cancelled = threading.Event()
+        self._tick_ms = 1000 / os.sysconf('SC_CLK_TCK')
+        self._page_size = os.sysconf('SC_PAGE_SIZE')
+        self._process = None
+        self._unit = None
+        self._env = None
+        self._scopes = False
+        self._display = None
+        self._runs = 0
+        self._tracked = set()
+    
+    @staticmethod
+    def commands(entries):
+        """The user's own enabled exec-once commands, the only ones that are profiled"""
+        return list(dict.fromkeys(
+            entry['command'] for entry in entries
+            if entry['enabled'] and entry['layer'] == 'user' and entry['keyword'] == 'exec-once'
+        ))
+    
+    @contextlib.contextmanager
+    def sandbox(self):
+        """Set up the private runtime directory, and a headless display in it if possible"""
+        runtime = tempfile.mkdtemp(prefix='omarchy-profile-')
+        env = {key: value for key, value in os.environ.items() if key not in self.HIDDEN_ENV}
+        env.update(XDG_RUNTIME_DIR=runtime, DBUS_SESSION_BUS_ADDRESS=f"unix:path={runtime}/bus")
+        self._scopes = self._can_scope()
+        self._display = self._start_display(env, runtime)
+        if self._display is not None:
+            env['WAYLAND_DISPLAY'] = self.DISPLAY_SOCKET
+        self._env = env
+        try:
+            yield env
+        finally:
+            self._env = None
+            self._stop_display()
+            shutil.rmtree(runtime, ignore_errors=True)
+    
+    @staticmethod
+    def _can_scope():
+        if shutil.which('systemd-run') is None:
+            return False
+        try:
+            return subprocess.run(['systemctl', '--user', 'show-environment'], capture_output=True,
+                                  timeout=2).returncode == 0
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+    
+    def _start_display(self, env, runtime):
+        """Headless weston on the private runtime dir, or None without one"""
+        weston = shutil.which('weston')
+        if weston is None:
+            return None
+        try:
+            display = subprocess.Popen(
+                [weston, '--backend=headless-backend.so', f'--socket={self.DISPLAY_SOCKET}', '--idle-time=0'],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                start_new_session=True, env=env
+            )
+        except OSError as e:
+            print(f"⚠️ Could not start a headless display: {e}", file=sys.stderr)
+            return None
+        socket = Path(runtime) / self.DISPLAY_SOCKET
+        deadline = time.monotonic() + 3
+        while not socket.exists() and display.poll() is None and time.monotonic() < deadline:
+            time.sleep(self.INTERVAL)
+        if not socket.exists():
+            self._display = display
+            self._stop_display()
+            print("⚠️ The headless display did not come up, profiling without one", file=sys.stderr)
+            return None
+        return display
+    
+    def _stop_display(self):
+        display, self._display = self._display, None
+        if display is None:
+            return
+        with contextlib.suppress(ProcessLookupError, PermissionError):
+            os.killpg(display.pid, signal.SIGKILL)
+        with contextlib.suppress(subprocess.TimeoutExpired):
+            display.wait(timeout=1)
+    
+    def _session(self, session):
+        """(cpu ticks, rss pages, live pids) over a session and everything it started
+        
+        Children are remembered by parent, so one that moved to a session
+        of its own is still measured and stopped.
+        """
+        ticks = rss = 0
+        pids = []
+        alive = set()
+        for entry in os.scandir('/proc'):
+            if not entry.name.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry.name}/stat", 'rb') as f:
+                    fields = f.read().rpartition(b')')[2].split()
+            except OSError:
+                continue
+            pid = int(entry.name)
+            alive.add(pid)
+            if int(fields[3]) == session or int(fields[1]) in self._tracked:
+                self._tracked.add(pid)
+            elif pid not in self._tracked:
+                continue
+            # utime, stime and the reaped children's cutime, cstime
+            ticks += sum(int(field) for field in fields[11:15])
+            if fields[0] not in (b'Z', b'X'):
+                pids.append(pid)
+                rss += int(fields[21])
+        # A number freed by an exited process may be reused by an unrelated one
+        self._tracked &= alive
+        return ticks, rss, pids
+    
+    def profile(self, command):
+        """Start one command in the sandbox, measure it, stop it, and return the result dict"""
+        if self._env is None:
+            raise RuntimeError("AutostartProfiler.profile() runs only inside sandbox()")
+        result = {'command': command, 'outcome': 'failed', 'ready_ms': None, 'cpu_ms': 0,
+                  'rss': 0, 'status': None, 'error': None}
+        # systemd-run needs the real session to create the scope; only the command gets the sandbox
+        argv = ['env', '-i'] + [f"{key}={value}" for key, value in self._env.items()] + ['sh', '-c', command]
+        unit = None
+        if self._scopes:
+            self._runs += 1
+            unit = f"omarchy-profile-{os.getpid()}-{self._runs}"
+            argv = ['systemd-run', '--user', '--scope', '--quiet', '--collect', f'--unit={unit}', '--'] + argv
+        started = time.monotonic()
+        try:
+            process = subprocess.Popen(
+                argv, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL, start_new_session=True, cwd=Path.home()
+            )
+        except OSError as e:
+            result['error'] = str(e)
+            return result
+        self._tracked = {process.pid}
+        self._process = process
+        self._unit = unit
+        ticks = peak = 0
+        active = started
+        try:
+            while True:
+                time.sleep(self.INTERVAL)
+                now = time.monotonic()
+                process.poll()
+                total, rss, pids = self._session(process.pid)
+                peak = max(peak, rss)
+                if total > ticks:
+                    ticks, active = total, now
+                if not pids:
+                    outcome, ready = 'exited', now
+                elif now - active >= self.quiet:
+                    outcome, ready = 'ready', active
+                elif now - started >= self.timeout:
+                    outcome, ready = 'timeout', now
+                elif self.cancelled.is_set():
+                    outcome, ready = 'cancelled', now
+                else:
+                    continue
+                break
+        finally:
+            self._stop(process)
+            self._process = None
+            self._unit = None
+        result.update(outcome=outcome, ready_ms=round((ready - started) * 1000),
+                      cpu_ms=round(ticks * self._tick_ms), rss=peak * self._page_size,
+                      status=process.returncode if outcome == 'exited' else None)
+        return result
+    
+    def _kill_scope(self, unit):
+        """Kill every process in the command's scope, including ones that left its session"""
+        if unit is None:
+            return
+        with contextlib.suppress(OSError, subprocess.TimeoutExpired):
+            subprocess.run(['systemctl', '--user', 'kill', '--signal=SIGKILL', f'{unit}.scope'],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=2)
+    
+    def _stop(self, process):
+        """Terminate whatever is left of the command's session, then its scope"""
+        for signal_number in (signal.SIGTERM, signal.SIGKILL):
+            pids = self._session(process.pid)[2]
+            if not pids:
+                break
+            for pid in pids:
+                with contextlib.suppress(ProcessLookupError, PermissionError):
+                    os.kill(pid, signal_number)
+            deadline = time.monotonic() + 1
+            while time.monotonic() < deadline:
+                process.poll()
+                if not self._session(process.pid)[2]:
+                    break
+                time.sleep(self.INTERVAL)
+        self._kill_scope(self._unit)
+        with contextlib.suppress(subprocess.TimeoutExpired):
+            process.wait(timeout=1)
+    
+    def cancel(self):
+        """Stop profiling; the command being measured and the display are killed straight away"""
+        self.cancelled.set()
+        process = self._process
+        if process is not None:
+            for pid in self._session(process.pid)[2]:
+                with contextlib.suppress(ProcessLookupError, PermissionError):
+                    os.kill(pid, signal.SIGKILL)
+        self._kill_scope(self._unit)
+        self._stop_display()
+    
+    @staticmethod
+    def ranked(results):
+        """Results, slowest to get ready first, each with its share of the total time"""
+        total = sum(result['ready_ms'] or 0 for result in results)
+        return [
+            dict(result, share=(result['ready_ms'] or 0) / total if total else 0.0)
+            for result in sorted(results, key=lambda result: result['ready_ms'] or 0, reverse=True)
+        ]
+    
+    @staticmethod
+    def describe(result):
+        """One line such as 'ready after 1.20 s · 42 MB · 310 ms CPU'"""
+        if result['outcome'] == 'failed':
+            return f"could not start: {result['error']}"
+        seconds = result['ready_ms'] / 1000
+        text = {
+            'ready': f"ready after {seconds:.2f} s",
+            'exited': f"finished in {seconds:.2f} s",
+            'timeout': f"still busy after {seconds:.0f} s",
+            'cancelled': "cancelled",
+        }[result['outcome']]
+        if result['status']:
+            text += f" (exit status {result['status']})"
+        return f"{text} · {result['rss'] / (1024 * 1024):.0f} MB · {result['cpu_ms']} ms CPU"
+
+
+class ApplyTransaction:
+    """Write config changes, let Hyprland check them, and undo them if rejected
+    
+    Hyprland's current config errors are recorded first, then the files
+    about to change are snapshotted, the writes run with reloads held back,
+    and one `hyprctl reload` and a `hyprctl -j configerrors` query run
+    asynchronously. A failed write, a failed reload, a config error that
+    is new or points into one of the written files, or no answer within the
+    time budget restore every snapshot atomically and reload again. Errors
+    that were already there in files we did not touch are left alone. A
+    file someone else changed after our write is left with their version
+    rather than rolled back over it.
+    """
+    
+    BUDGET_MS = 4000
+    
+    def __init__(self, writer, paths, budget_ms=None, on_done=None, on_rejected=None):
+        self.writer = writer
+        self.paths = [Path(path) for path in paths]
+        self.budget_ms = budget_ms or self.BUDGET_MS
+        self.on_done = on_done
+        self.on_rejected = on_rejected
+        self.snapshots = {}
+        self.written = {}
+        self.baseline = set()
+        self.finished = False
+        self._deadline = 0
+        self._cancellable = Gio.Cancellable()
+        self._process = None
+    
+    def snapshot(self):
+        for path in self.paths:
+            try:
+                self.snapshots[path] = path.read_bytes()
+            except FileNotFoundError:
+                self.snapshots[path] = None
+    
+    def run(self, write):
+        """Record current errors, snapshot, call write() (returns success), then verify"""
+        self._write = write
+        self._deadline = GLib.timeout_add(self.budget_ms, self._on_timeout)
+        self._spawn(['hyprctl', '-j', 'configerrors'], self._on_baseline)
+    
+    def _on_baseline(self, ok, output):
+        if self.finished:
+            return
+        try:
+            self.baseline = set(self._parse_errors(output)) if ok else set()
+        except ValueError:
+            self.baseline = set()
+        self.snapshot()
+        try:
+            with self.writer.deferred_reload():
+                written = self._write()
+        except Exception as e:
+            print(f"⚠️ Writing config failed: {e}")
+            written = False
+        if not written:
+            self._fail(["Writing the config files failed"])
+            return
+        for path in self.paths:
+            with contextlib.suppress(OSError):
+                self.written[path] = path.read_bytes()
+        self._spawn(['hyprctl', 'reload'], self._on_reloaded)
+    
+    def _spawn(self, argv, callback):
+        try:
+            process = Gio.Subprocess.new(
+                argv, Gio.SubprocessFlags.STDOUT_PIPE | Gio.SubprocessFlags.STDERR_MERGE
+            )
+            self._process = process
+            process.communicate_utf8_async(None, self._cancellable, self._on_exited, callback)
+        except GLib.Error as e:
+            callback(False, e.message)
+    
+    def _on_exited(self, process, result, callback):
+        try:
+            _, stdout, _ = process.communicate_utf8_finish(result)
+            ok = process.get_successful()
+        except GLib.Error as e:
+            if self.finished:
+                return
+            stdout, ok = e.message, False
+        callback(ok, stdout or '')
+    
+    def _on_reloaded(self, ok, output):
+        if self.finished:
+            return
+        if not ok:
+            self._fail([f"hyprctl reload failed: {output.strip()}"])
+            return
+        self._spawn(['hyprctl', '-j', 'configerrors'], self._on_config_errors)
+    
+    def _on_config_errors(self, ok, output):
+        if self.finished:
+            return
+        try:
+            errors = self._parse_errors(output)
+        except ValueError:
+            errors = [f"Unreadable configerrors output: {output.strip()[:80]}"]
+        if not ok:
+            errors = errors or ["hyprctl configerrors failed"]
+        rejected = [e for e in errors if e not in self.baseline or self._touches(e)]
+        if rejected:
+            self._fail(rejected)
+            return
+        if errors:
+            print(f"⚠️ Ignoring {len(errors)} config error(s) that were there before Apply")
+        self._finish(True, [])
+    
+    @staticmethod
+    def _parse_errors(output):
+        """Non-empty error strings from `hyprctl -j configerrors`, ValueError if unreadable"""
+        errors = json.loads(output)
+        if not isinstance(errors, list):
+            raise ValueError("configerrors is not a list")
+        return [e for e in errors if isinstance(e, str) and e.strip()]
+    
+    def _touches(self, error):
+        """Whether a config error points into one of the files this Apply wrote"""
+        match = re.search(r'file (\S+) at line (\d+)', error)
+        if not match:
+            return False
+        try:
+            where = Path(match.group(1)).resolve()
+        except (OSError, RuntimeError):
+            return False
+        return any(where == path.resolve() for path in self.paths)
+    
+    def _on_timeout(self):
+        self._deadline = 0
+        self._cancellable.cancel()
+        if self._process is not None:
+            self._process.force_exit()
+        self._fail([f"Hyprland did not confirm the change within {self.budget_ms} ms"])
+        return GLib.SOURCE_REMOVE
+    
+    @staticmethod
+    def _current(path):
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+    
+    def rollback(self):
+        """Put every snapshotted file back exactly as it was"""
+        for path, data in self.snapshots.items():
+            try:
+                with config_lock(path):
+                    if path in self.written and self._current(path) != self.written[path]:
+                        print(f"⚠️ {path.name} was changed by another program, not rolled back")
+                        continue
+                    if data is None:
+                        path.unlink(missing_ok=True)
+                    else:
+                        atomic_write(path, data)
+            except OSError as e:
+                print(f"⚠️ Could not restore {path}: {e}")
+    
+    def _fail(self, errors):
+        if self.finished:
+            return
+        print(f"⚠️ Rolling back: {errors[0]}")
+        if self.on_rejected is not None:
+            self.on_rejected(errors)
+        if self.snapshots:
+            self.rollback()
+            try:
+                Gio.Subprocess.new(['hyprctl', 'reload'], Gio.SubprocessFlags.STDOUT_SILENCE
+                                   | Gio.SubprocessFlags.STDERR_SILENCE)
+            except GLib.Error as e:
+                print(f"⚠️ Could not reload after rollback: {e.message}")
+        self._finish(False, errors)
+    
+    def _finish(self, ok, errors):
+        self.finished = True
+        if self._deadline:
+            GLib.source_remove(self._deadline)
+            self._deadline = 0
+        if self.on_done is not None:
+            self.on_done(ok, errors)
+
+
+
+def create_scale_row(model, widgets, title, subtitle, min_val, max_val, step, setting_name, digits):
+    """Build an action row with a scale bound to a model setting"""
+    row = Adw.ActionRow()
+    row.set_title(title)
+    row.set_subtitle(subtitle)
+    
+    scale = Gtk.Scale(orientation=Gtk.Orientation.HORIZONTAL)
+    scale.set_range(min_val, max_val)
+    scale.set_increments(step, step * 10)
+    scale.set_digits(digits)
+    scale.set_hexpand(True)
+    scale.set_draw_value(True)
+    scale.set_value_pos(Gtk.PositionType.RIGHT)
+    scale.set_size_request(200, -1)
+    bind_setting(model, setting_name, scale)
+    widgets[setting_name] = scale
+    
+    row.add_suffix(scale)
+    return row
+
+
+
+class LanguageInputPage(Adw.PreferencesPage):
+    """Language and input configuration page"""
+    
+    __gsignals__ = {
+        'pending-changed': (GObject.SignalFlags.RUN_FIRST, None, ()),
+    }
+    
+    AVAILABLE_LANGUAGES = {
+        'us': ' English (US)',
+        'ara': ' Arabic',
         'uk': ' Ukrainian',
         'ru': ' Russian',
         'de': ' German',
@@ -454,20 +3953,32 @@ class LanguageInputPage(Adw.PreferencesPage):
         'grp:alt_space_toggle': 'Alt + Space',
     }
     
-    def __init__(self, parser, writer):
+    ACCEL_PROFILES = ('', 'adaptive', 'flat')
+    KIND_NAMES = {'mice': "Pointer", 'keyboards': "Keyboard"}
+    
+    def __init__(self, parser, writer, model, devices=None):
         super().__init__()
         self.parser = parser
         self.writer = writer
+        self.model = model
+        self.devices = devices
+        self.device_values = parser.parse_device_settings()
+        self.pending_devices = {}
+        self.device_rows = {}
+        self.devices_group = None
         
         self.set_title("Language & Input")
         self.set_icon_name("input-keyboard-symbolic")
         
-        self.settings = parser.parse_input_settings()
-        
-        current_layout = self.settings.get('kb_layout', 'us,ara')
-        self.selected_languages = current_layout.split(',')
-        
+        self.widgets = {}
         self._create_ui()
+        model.connect("notify::kb-layout", self._on_layouts_changed)
+        if devices is not None:
+            devices.subscribe(self._on_devices_loaded)
+    
+    @property
+    def selected_languages(self):
+        return [code.strip() for code in self.model.get_value('kb_layout').split(',') if code.strip()]
     
     def _create_ui(self):
         layout_group = Adw.PreferencesGroup()
@@ -480,18 +3991,13 @@ class LanguageInputPage(Adw.PreferencesPage):
         switch_row.set_title("Layout Switch Keybind")
         switch_row.set_subtitle("Hotkey to switch between languages")
         
-        switch_model = Gtk.StringList()
-        current_method = self.settings.get('kb_options', 'grp:alt_shift_toggle')
-        selected_index = 0
-        
-        for i, (method, label) in enumerate(self.SWITCH_METHODS.items()):
-            switch_model.append(label)
-            if method in current_method:
-                selected_index = i
-        
-        switch_row.set_model(switch_model)
-        switch_row.set_selected(selected_index)
-        switch_row.connect("notify::selected", self._on_switch_method_changed)
+        switch_row.set_model(Gtk.StringList.new(list(self.SWITCH_METHODS.values())))
+        self.model.bind_property(
+            'kb-options', switch_row, 'selected',
+            GObject.BindingFlags.BIDIRECTIONAL | GObject.BindingFlags.SYNC_CREATE,
+            self._method_index, self._options_with_method
+        )
+        self.widgets['kb_options'] = switch_row
         
         layout_group.add(switch_row)
         
@@ -503,7 +4009,6 @@ class LanguageInputPage(Adw.PreferencesPage):
             "Mouse Sensitivity",
             "Adjust pointer speed (-1.0 to 1.0)",
             -1.0, 1.0, 0.05,
-            self.settings.get('sensitivity', 0.0),
             'sensitivity',
             2
         )
@@ -511,15 +4016,14 @@ class LanguageInputPage(Adw.PreferencesPage):
         natural_scroll = Adw.SwitchRow()
         natural_scroll.set_title("Natural Scrolling")
         natural_scroll.set_subtitle("Reverse scroll direction (macOS style)")
-        natural_scroll.set_active(self.settings.get('touchpad_natural_scroll', False))
-        natural_scroll.connect("notify::active", lambda w, p: self._on_setting_changed('touchpad_natural_scroll', w.get_active()))
+        bind_setting(self.model, 'touchpad_natural_scroll', natural_scroll)
+        self.widgets['touchpad_natural_scroll'] = natural_scroll
         mouse_group.add(natural_scroll)
         
         scroll_factor_row = self._create_scale_row(
             "Scroll Speed",
             "Touchpad scrolling speed (0.1 to 2.0)",
             0.1, 2.0, 0.1,
-            self.settings.get('touchpad_scroll_factor', 0.4),
             'touchpad_scroll_factor',
             2
         )
@@ -533,32 +4037,148 @@ class LanguageInputPage(Adw.PreferencesPage):
         numlock = Adw.SwitchRow()
         numlock.set_title("Numlock on Startup")
         numlock.set_subtitle("Enable numlock by default")
-        numlock.set_active(self.settings.get('numlock_by_default', True))
-        numlock.connect("notify::active", lambda w, p: self._on_setting_changed('numlock_by_default', w.get_active()))
+        bind_setting(self.model, 'numlock_by_default', numlock)
+        self.widgets['numlock_by_default'] = numlock
         keyboard_group.add(numlock)
         
         repeat_rate = Adw.SpinRow()
         repeat_rate.set_title("Key Repeat Rate")
         repeat_rate.set_subtitle("How fast keys repeat (higher = faster)")
-        repeat_rate.set_adjustment(Gtk.Adjustment(
-            lower=10, upper=100, step_increment=5,
-            value=self.settings.get('repeat_rate', 40)
-        ))
-        repeat_rate.connect("changed", lambda w: self._on_setting_changed('repeat_rate', int(w.get_value())))
+        repeat_rate.set_adjustment(Gtk.Adjustment(lower=10, upper=100, step_increment=5))
+        bind_setting(self.model, 'repeat_rate', repeat_rate)
+        self.widgets['repeat_rate'] = repeat_rate
         keyboard_group.add(repeat_rate)
         
         repeat_delay = Adw.SpinRow()
         repeat_delay.set_title("Key Repeat Delay")
         repeat_delay.set_subtitle("Delay before key starts repeating (ms)")
-        repeat_delay.set_adjustment(Gtk.Adjustment(
-            lower=200, upper=1000, step_increment=50,
-            value=self.settings.get('repeat_delay', 600)
-        ))
-        repeat_delay.connect("changed", lambda w: self._on_setting_changed('repeat_delay', int(w.get_value())))
+        repeat_delay.set_adjustment(Gtk.Adjustment(lower=200, upper=1000, step_increment=50))
+        bind_setting(self.model, 'repeat_delay', repeat_delay)
+        self.widgets['repeat_delay'] = repeat_delay
         keyboard_group.add(repeat_delay)
         
         self.add(keyboard_group)
     
+    def _on_devices_loaded(self, data):
+        """Rebuild the device list after the first fetch or a hotplug"""
+        devices = input_devices(data)
+        if self.devices_group is not None:
+            self.remove(self.devices_group)
+        self.device_rows = {}
+        self.devices_group = Adw.PreferencesGroup()
+        self.devices_group.set_title(" Devices")
+        self.devices_group.set_description(
+            "Settings for one mouse or keyboard; they override the ones above"
+            if devices else "No input devices reported by hyprctl")
+        for device in devices:
+            self.devices_group.add(self._create_device_row(device))
+        self.add(self.devices_group)
+    
+    def _create_device_row(self, device):
+        name = device['name']
+        values = self._shown_values(name)
+        row = Adw.ExpanderRow()
+        row.set_title(name)
+        row.set_subtitle(self.KIND_NAMES.get(device['kind'], device['kind']))
+        row.set_show_enable_switch(True)
+        if name in self.pending_devices:
+            row.set_enable_expansion(self.pending_devices[name] is not None)
+        else:
+            row.set_enable_expansion(name in self.device_values)
+        widgets = {'row': row}
+        
+        if device['kind'] == 'mice':
+            speed = round(float(values.get('sensitivity', device.get('defaultSpeed', 0.0))), 2)
+            sensitivity = Adw.SpinRow()
+            sensitivity.set_title("Sensitivity")
+            sensitivity.set_digits(2)
+            sensitivity.set_adjustment(Gtk.Adjustment(
+                lower=-1.0, upper=1.0, step_increment=0.05, value=speed
+            ))
+            sensitivity.connect("changed", lambda w: self._on_device_changed(name))
+            row.add_row(sensitivity)
+            widgets['sensitivity'] = sensitivity
+            # Written only once it is set in the file or moved off the shown speed
+            widgets['speed'] = None if 'sensitivity' in values else speed
+            
+            accel = Adw.ComboRow()
+            accel.set_title("Acceleration Profile")
+            profile = values.get('accel_profile', '')
+            if profile in self.ACCEL_PROFILES:
+                accel.set_model(Gtk.StringList.new(["Default", "Adaptive", "Flat"]))
+                accel.set_selected(self.ACCEL_PROFILES.index(profile))
+                accel.connect("notify::selected", lambda w, pspec: self._on_device_changed(name))
+            else:
+                # A custom curve has no entry here; show it read-only and keep it
+                accel.set_model(Gtk.StringList.new([profile]))
+                accel.set_subtitle("Set in input.conf, edit the file to change it")
+                accel.set_sensitive(False)
+            row.add_row(accel)
+            widgets['accel_profile'] = accel
+        else:
+            layout = Adw.EntryRow()
+            layout.set_title("Layouts (comma separated, empty uses the global ones)")
+            layout.set_text(values.get('kb_layout', ''))
+            layout.connect("changed", lambda w: self._on_device_changed(name))
+            row.add_row(layout)
+            widgets['kb_layout'] = layout
+        
+        row.connect("notify::enable-expansion", lambda w, pspec: self._on_device_changed(name))
+        self.device_rows[name] = widgets
+        return row
+    
+    def _shown_values(self, name):
+        """A device's saved values with its pending edit on top"""
+        saved = self.device_values.get(name) or {}
+        pending = self.pending_devices.get(name)
+        if not pending:
+            return saved
+        return {key: value for key, value in {**saved, **pending}.items() if value not in (None, '')}
+    
+    def _device_values(self, name):
+        """The edit for a device's keys, or None when its override is switched off
+        
+        '' removes a key; keys the rows leave untouched are not included, so
+        a read-only custom profile stays in the file.
+        """
+        widgets = self.device_rows[name]
+        if not widgets['row'].get_enable_expansion():
+            return None
+        values = {}
+        if 'sensitivity' in widgets:
+            speed = round(widgets['sensitivity'].get_value(), 2)
+            if speed != widgets['speed']:
+                values['sensitivity'] = speed
+        if 'accel_profile' in widgets and widgets['accel_profile'].get_sensitive():
+            values['accel_profile'] = self.ACCEL_PROFILES[widgets['accel_profile'].get_selected()]
+        if 'kb_layout' in widgets:
+            layouts = widgets['kb_layout'].get_text().strip()
+            values['kb_layout'] = layouts
+            error = device_validator.validate('kb_layout', layouts) if layouts else None
+            mark_setting_widget(widgets['kb_layout'], error)
+        return values
+    
+    def _on_device_changed(self, name):
+        values = self._device_values(name)
+        saved = self.device_values.get(name)
+        if values is None:
+            unchanged = saved is None
+        else:
+            merged = {key: value for key, value in {**(saved or {}), **values}.items()
+                      if value not in (None, '')}
+            unchanged = saved is not None and merged == saved
+        if unchanged:
+            self.pending_devices.pop(name, None)
+        else:
+            self.pending_devices[name] = values
+        print(f"⚙️ Device changed: {name} {values}")
+        self.emit('pending-changed')
+    
+    def devices_applied(self):
+        """The pending device blocks are on disk now"""
+        self.device_values = self.parser.parse_device_settings()
+        self.pending_devices.clear()
+    
     def _create_language_selector(self, group):
         """Create language selection UI"""
         current_row = Adw.ActionRow()
@@ -645,304 +4265,2390 @@ class LanguageInputPage(Adw.PreferencesPage):
         button_box.set_margin_end(20)
         button_box.set_halign(Gtk.Align.END)
         
-        cancel_btn = Gtk.Button(label="Cancel")
-        cancel_btn.connect("clicked", lambda b: dialog.close())
-        button_box.append(cancel_btn)
+        cancel_btn = Gtk.Button(label="Cancel")
+        cancel_btn.connect("clicked", lambda b: dialog.close())
+        button_box.append(cancel_btn)
+        
+        apply_btn = Gtk.Button(label="Apply")
+        apply_btn.add_css_class("suggested-action")
+        apply_btn.connect("clicked", lambda b: self._on_language_picker_apply(dialog))
+        button_box.append(apply_btn)
+        
+        content_box.append(button_box)
+        
+        main_box.append(content_box)
+        dialog.present()
+    
+    def _on_language_picker_apply(self, dialog):
+        """Handle language picker apply"""
+        new_languages = []
+        for code, check in self.lang_checkboxes.items():
+            if check.get_active():
+                new_languages.append(code)
+        
+        if new_languages:
+            self.model.set_value('kb_layout', ','.join(new_languages[:4]))
+        
+        dialog.close()
+    
+    def _on_layouts_changed(self, model, pspec):
+        self.current_languages_row.set_subtitle(self._get_languages_display())
+    
+    def _method_index(self, binding, options, user_data=None):
+        """kb_options -> index of its grp: switch method"""
+        for i, method in enumerate(self.SWITCH_METHODS):
+            if method in options.split(','):
+                return i
+        return 0
+    
+    def _options_with_method(self, binding, index, user_data=None):
+        """Selected switch method -> kb_options, keeping non-grp: options"""
+        methods = list(self.SWITCH_METHODS)
+        if index >= len(methods):
+            return self.model.get_value('kb_options')
+        others = [option for option in self.model.get_value('kb_options').split(',')
+                  if option and not option.startswith('grp:')]
+        return ','.join([methods[index]] + others)
+    
+    def on_active_layout(self, event, data):
+        """Show which layout is active after a grp: hotkey switch"""
+        keyboard, _, layout = data.partition(',')
+        self.current_languages_row.set_subtitle(
+            f"{self._get_languages_display()}  •  Now: {layout.strip()}"
+        )
+    
+    def _create_scale_row(self, title, subtitle, min_val, max_val, step, setting_name, digits):
+        """Helper to create a row with a scale widget"""
+        return create_scale_row(self.model, self.widgets, title, subtitle,
+                                min_val, max_val, step, setting_name, digits)
+
+
+
+class BlurEffectsPage(Adw.PreferencesPage):
+    """Blur and glass effects configuration page"""
+    
+    def __init__(self, parser, writer, model):
+        super().__init__()
+        self.parser = parser
+        self.writer = writer
+        self.model = model
+        
+        self.set_title("Blur & Glass Effects")
+        self.set_icon_name("emblem-photos-symbolic")
+        
+        self.widgets = {}
+        self._create_ui()
+    
+    def _create_ui(self):
+        self.add(create_preview_group(self.model))
+        
+        blur_group = Adw.PreferencesGroup()
+        blur_group.set_title(" Liquid Glass Blur")
+        blur_group.set_description("Create the perfect frosted glass effect")
+        
+        enable_blur = Adw.SwitchRow()
+        enable_blur.set_title("Enable Blur")
+        enable_blur.set_subtitle("Master switch for all blur effects")
+        bind_setting(self.model, 'blur_enabled', enable_blur)
+        self.widgets['blur_enabled'] = enable_blur
+        blur_group.add(enable_blur)
+        
+        blur_size = Adw.SpinRow()
+        blur_size.set_title("Blur Radius")
+        blur_size.set_subtitle("Size of the blur effect (1-20)")
+        blur_size.set_adjustment(Gtk.Adjustment(lower=1, upper=20, step_increment=1))
+        bind_setting(self.model, 'blur_size', blur_size)
+        self.widgets['blur_size'] = blur_size
+        blur_group.add(blur_size)
+        
+        blur_passes = Adw.SpinRow()
+        blur_passes.set_title("Blur Quality")
+        blur_passes.set_subtitle("Higher = smoother (1-8, affects performance)")
+        blur_passes.set_adjustment(Gtk.Adjustment(lower=1, upper=8, step_increment=1))
+        bind_setting(self.model, 'blur_passes', blur_passes)
+        self.widgets['blur_passes'] = blur_passes
+        blur_group.add(blur_passes)
+        
+        optimizations = Adw.SwitchRow()
+        optimizations.set_title("Performance Optimizations")
+        optimizations.set_subtitle("Enable for better performance (recommended)")
+        bind_setting(self.model, 'blur_new_optimizations', optimizations)
+        self.widgets['blur_new_optimizations'] = optimizations
+        blur_group.add(optimizations)
+        
+        self.add(blur_group)
+        
+        advanced_group = Adw.PreferencesGroup()
+        advanced_group.set_title(" Advanced Glass Properties")
+        advanced_group.set_description("Fine-tune the liquid glass appearance")
+        
+        noise_row = self._create_scale_row(
+            "Glass Texture",
+            "Add subtle grain for realism (0.000-0.100)",
+            0, 0.1, 0.001,
+            'blur_noise',
+            3
+        )
+        advanced_group.add(noise_row)
+        
+        contrast_row = self._create_scale_row(
+            "Color Contrast",
+            "Make colors pop through glass (0.5-2.0)",
+            0.5, 2.0, 0.05,
+            'blur_contrast',
+            2
+        )
+        advanced_group.add(contrast_row)
+        
+        brightness_row = self._create_scale_row(
+            "Glass Brightness",
+            "Luminosity multiplier (0.5-1.5)",
+            0.5, 1.5, 0.05,
+            'blur_brightness',
+            2
+        )
+        advanced_group.add(brightness_row)
+        
+        vibrancy_row = self._create_scale_row(
+            "Vibrancy ",
+            "macOS-style color saturation (0.0-1.0)",
+            0, 1.0, 0.05,
+            'blur_vibrancy',
+            2
+        )
+        advanced_group.add(vibrancy_row)
+        
+        vib_dark_row = self._create_scale_row(
+            "Vibrancy Darkness",
+            "Dark tone preservation (0.0-1.0)",
+            0, 1.0, 0.05,
+            'blur_vibrancy_darkness',
+            2
+        )
+        advanced_group.add(vib_dark_row)
+        
+        xray = Adw.SwitchRow()
+        xray.set_title("X-Ray Transparency")
+        xray.set_subtitle("See through blur completely")
+        bind_setting(self.model, 'blur_xray', xray)
+        self.widgets['blur_xray'] = xray
+        advanced_group.add(xray)
+        
+        self.add(advanced_group)
+    
+    def _create_scale_row(self, title, subtitle, min_val, max_val, step, setting_name, digits):
+        """Helper to create a row with a scale widget"""
+        return create_scale_row(self.model, self.widgets, title, subtitle,
+                                min_val, max_val, step, setting_name, digits)
+
+
+
+class CurveNameList:
+    """Curve names shared by every animation row's dropdown"""
+    
+    def __init__(self, names):
+        self.model = Gtk.StringList.new(names)
+        self._names = list(names)
+    
+    def keys(self):
+        return self._names
+    
+    def append(self, name):
+        self._names.append(name)
+        self.model.append(name)
+
+
+class AppearancePreview(Gtk.Widget):
+    """Miniature desktop drawn with the model's current look settings
+    
+    Nothing is written and the compositor is not involved. The wallpaper
+    and its blurred copy are rendered to textures once per size and blur
+    strength and kept in a small LRU shared by every preview, so dragging a
+    slider only composites cached textures and a few rounded rectangles.
+    """
+    
+    KEYS = (
+        'rounding', 'gaps_in', 'gaps_out', 'border_size',
+        'shadow_enabled', 'shadow_range', 'shadow_power',
+        'blur_enabled', 'blur_size', 'blur_passes', 'blur_brightness', 'blur_contrast',
+    )
+    SCREEN_WIDTH = 1920
+    SCREEN_HEIGHT = 1080
+    CACHE_SIZE = 8
+    _surfaces = {}
+    
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+        self.set_hexpand(True)
+        self.set_overflow(Gtk.Overflow.HIDDEN)
+        self.set_size_request(320, int(320 * self.SCREEN_HEIGHT / self.SCREEN_WIDTH))
+        self.colors = {
+            name: self._rgba(spec) for name, spec in (
+                ('active', 'rgba(137, 180, 250, 1.0)'),
+                ('inactive', 'rgba(88, 91, 112, 0.9)'),
+                ('fill', 'rgba(30, 30, 46, 0.55)'),
+                ('content', 'rgba(205, 214, 244, 0.35)'),
+            )
+        }
+        for key in self.KEYS:
+            model.connect(f"notify::{model.property_name(key)}", lambda *args: self.queue_draw())
+    
+    @staticmethod
+    def _rgba(spec):
+        color = Gdk.RGBA()
+        color.parse(spec)
+        return color
+    
+    @staticmethod
+    def blur_radius(size, passes):
+        """Approximate Gaussian radius of Hyprland's dual-Kawase blur
+        
+        Every pass halves the resolution again, so the reach roughly doubles
+        per pass.
+        """
+        return min(250.0, size * 2 ** passes / 2)
+    
+    def _surface(self, key, build, bounds):
+        """A cached texture (or render node when there is no renderer yet)"""
+        surfaces = AppearancePreview._surfaces
+        if key in surfaces:
+            surfaces[key] = surfaces.pop(key)
+            return surfaces[key]
+        with tracer.span(f'preview.render {key[0]}', 'ui'):
+            node = build()
+            native = self.get_native()
+            renderer = native.get_renderer() if native is not None else None
+            surface = renderer.render_texture(node, bounds) if renderer is not None else node
+        surfaces[key] = surface
+        while len(surfaces) > self.CACHE_SIZE:
+            surfaces.pop(next(iter(surfaces)))
+        return surface
+    
+    @staticmethod
+    def _append(snapshot, surface, bounds):
+        if isinstance(surface, Gdk.Texture):
+            snapshot.append_texture(surface, bounds)
+        else:
+            snapshot.append_node(surface)
+    
+    def _wallpaper_node(self, width, height):
+        """Gradient with a few soft shapes, so blur and gaps are easy to see"""
+        snapshot = Gtk.Snapshot()
+        bounds = Graphene.Rect().init(0, 0, width, height)
+        stops = []
+        for offset, spec in ((0.0, 'rgb(49, 50, 68)'), (0.55, 'rgb(104, 116, 206)'), (1.0, 'rgb(212, 131, 203)')):
+            stop = Gsk.ColorStop()
+            stop.offset = offset
+            stop.color = self._rgba(spec)
+            stops.append(stop)
+        snapshot.append_linear_gradient(bounds, Graphene.Point().init(0, 0),
+                                        Graphene.Point().init(width, height), stops)
+        for fx, fy, fr, spec in ((0.2, 0.3, 0.18, 'rgba(250, 179, 135, 0.9)'),
+                                 (0.7, 0.65, 0.22, 'rgba(166, 227, 161, 0.8)'),
+                                 (0.55, 0.2, 0.1, 'rgba(249, 226, 175, 0.9)')):
+            r = fr * width
+            circle = Gsk.RoundedRect()
+            circle.init_from_rect(Graphene.Rect().init(fx * width - r, fy * height - r, 2 * r, 2 * r), r)
+            snapshot.push_rounded_clip(circle)
+            snapshot.append_color(self._rgba(spec), circle.bounds)
+            snapshot.pop()
+        return snapshot.to_node()
+    
+    @staticmethod
+    def _blur_node(wallpaper, bounds, radius):
+        """Blur a slightly enlarged wallpaper so the screen edges do not darken"""
+        snapshot = Gtk.Snapshot()
+        snapshot.push_clip(bounds)
+        snapshot.push_blur(radius)
+        if isinstance(wallpaper, Gdk.Texture):
+            snapshot.append_texture(wallpaper, Graphene.Rect().init(
+                -radius, -radius, bounds.get_width() + 2 * radius, bounds.get_height() + 2 * radius))
+        else:
+            snapshot.append_node(wallpaper)
+        snapshot.pop()
+        snapshot.pop()
+        return snapshot.to_node()
+    
+    def window_rects(self, width, height, values):
+        """Master window on the left, two stacked on the right, like dwindle"""
+        scale = width / self.SCREEN_WIDTH
+        outer = values['gaps_out'] * scale
+        inner = values['gaps_in'] * scale
+        area_w = max(0.0, width - 2 * outer)
+        area_h = max(0.0, height - 2 * outer)
+        half_w = max(0.0, area_w / 2 - inner)
+        half_h = max(0.0, area_h / 2 - inner)
+        right = outer + area_w / 2 + inner
+        return [
+            (outer, outer, half_w, area_h),
+            (right, outer, half_w, half_h),
+            (right, outer + area_h / 2 + inner, half_w, half_h),
+        ]
+    
+    def do_snapshot(self, snapshot):
+        width, height = self.get_width(), self.get_height()
+        if width <= 0 or height <= 0:
+            return
+        values = {key: self.model.get_value(key) for key in self.KEYS}
+        scale = width / self.SCREEN_WIDTH
+        bounds = Graphene.Rect().init(0, 0, width, height)
+        
+        wallpaper = self._surface(('wallpaper', width, height),
+                                  lambda: self._wallpaper_node(width, height), bounds)
+        self._append(snapshot, wallpaper, bounds)
+        
+        blurred = None
+        if values['blur_enabled']:
+            radius = round(self.blur_radius(values['blur_size'], values['blur_passes']) * scale, 1)
+            blurred = self._surface(('blur', width, height, radius),
+                                    lambda: self._blur_node(wallpaper, bounds, radius), bounds)
+        
+        for index, (x, y, w, h) in enumerate(self.window_rects(width, height, values)):
+            if w < 1 or h < 1:
+                continue
+            self._append_window(snapshot, Graphene.Rect().init(x, y, w, h), values, scale,
+                                blurred, bounds, active=index == 0)
+    
+    def _append_window(self, snapshot, rect, values, scale, blurred, bounds, active):
+        radius = min(values['rounding'] * scale, rect.get_width() / 2, rect.get_height() / 2)
+        outline = Gsk.RoundedRect()
+        outline.init_from_rect(rect, radius)
+        
+        if values['shadow_enabled'] and values['shadow_range'] > 0:
+            shadow = self._rgba(f"rgba(0, 0, 0, {min(0.9, 0.2 + 0.15 * values['shadow_power']):.2f})")
+            snapshot.append_outset_shadow(outline, shadow, 0, 0, 0, values['shadow_range'] * scale)
+        
+        snapshot.push_rounded_clip(outline)
+        if blurred is not None:
+            contrast = values['blur_contrast']
+            brightness = values['blur_brightness']
+            gain = contrast * brightness
+            offset = (0.5 - 0.5 * contrast) * brightness
+            matrix = Graphene.Matrix().init_from_float([
+                gain, 0, 0, 0,
+                0, gain, 0, 0,
+                0, 0, gain, 0,
+                0, 0, 0, 1,
+            ])
+            snapshot.push_color_matrix(matrix, Graphene.Vec4().init(offset, offset, offset, 0))
+            self._append(snapshot, blurred, bounds)
+            snapshot.pop()
+        snapshot.append_color(self.colors['fill'], rect)
+        line_height = max(2.0, 24 * scale)
+        for line in range(3):
+            top = rect.get_y() + radius / 2 + 4 + line * line_height * 2
+            if top + line_height > rect.get_y() + rect.get_height():
+                break
+            snapshot.append_color(self.colors['content'], Graphene.Rect().init(
+                rect.get_x() + radius / 2 + 4, top, rect.get_width() * (0.6 - 0.15 * line), line_height))
+        snapshot.pop()
+        
+        if values['border_size'] > 0:
+            width = max(1.0, values['border_size'] * scale)
+            frame = Gsk.RoundedRect()
+            frame.init_from_rect(Graphene.Rect().init(
+                rect.get_x() - width, rect.get_y() - width,
+                rect.get_width() + 2 * width, rect.get_height() + 2 * width), radius + width)
+            color = self.colors['active' if active else 'inactive']
+            snapshot.append_border(frame, [width] * 4, [color] * 4)
+
+
+
+def create_preview_group(model):
+    """Preferences group holding a live AppearancePreview"""
+    group = Adw.PreferencesGroup()
+    group.set_title(" Preview")
+    group.set_description("How windows will look; nothing changes until you press Apply")
+    preview = AppearancePreview(model)
+    preview.add_css_class("appearance-preview")
+    group.add(preview)
+    return group
+
+
+
+class BezierPreview(Gtk.DrawingArea):
+    """Draws an easing curve and a dot moving along it
+    
+    The curve outline and the dot position both come from the curve's cached
+    lookup table, so redraws while scrubbing or playing are table reads only.
+    """
+    
+    _instances = set()
+    
+    def __init__(self, curve, size):
+        super().__init__()
+        self.curve = curve
+        self.progress = None
+        self._tick = None
+        self._start = 0
+        self._duration = 0
+        self.set_content_width(size)
+        self.set_content_height(size)
+        self.set_valign(Gtk.Align.CENTER)
+        self.set_draw_func(self._draw)
+        # GTK4 never emits "destroy" for unparented widgets, so track only
+        # the previews that are on screen
+        self.connect("realize", BezierPreview._instances.add)
+        self.connect("unrealize", BezierPreview._instances.discard)
+    
+    @classmethod
+    def showing(cls, curve):
+        return [preview for preview in cls._instances if preview.curve is curve]
+    
+    def set_curve(self, curve):
+        self.curve = curve
+        self.queue_draw()
+    
+    def set_progress(self, progress):
+        self.progress = progress
+        self.queue_draw()
+    
+    def play(self, duration_ms):
+        """Run the dot along the curve over the animation's real duration"""
+        if self._tick is not None:
+            self.remove_tick_callback(self._tick)
+        self._duration = max(duration_ms, 1) * 1000
+        self._start = None
+        self._tick = self.add_tick_callback(self._on_tick)
+    
+    def _on_tick(self, widget, frame_clock):
+        now = frame_clock.get_frame_time()
+        if self._start is None:
+            self._start = now
+        elapsed = (now - self._start) / self._duration
+        self.set_progress(min(elapsed, 1.0))
+        if elapsed >= 1.0:
+            self._tick = None
+            return GLib.SOURCE_REMOVE
+        return GLib.SOURCE_CONTINUE
+    
+    def _draw(self, area, cr, width, height):
+        table = self.curve.table
+        low = min(0.0, min(table))
+        high = max(1.0, max(table))
+        pad = max(2, width // 10)
+        inner_w = width - 2 * pad
+        inner_h = height - 2 * pad
+        
+        def point(x, y):
+            return pad + x * inner_w, pad + (high - y) / (high - low) * inner_h
+        
+        cr.set_source_rgba(1, 1, 1, 0.12)
+        cr.set_line_width(1)
+        cr.move_to(*point(0, 0))
+        cr.line_to(*point(1, 1))
+        cr.stroke()
+        
+        step = max(1, (len(table) - 1) // max(8, inner_w))
+        cr.set_source_rgba(0.41, 0.45, 0.81, 1)
+        cr.set_line_width(2 if width > 60 else 1.5)
+        cr.move_to(*point(0, table[0]))
+        for i in range(step, len(table), step):
+            cr.line_to(*point(i / (len(table) - 1), table[i]))
+        cr.line_to(*point(1, table[-1]))
+        cr.stroke()
+        
+        if self.progress is not None:
+            cr.set_source_rgba(1, 1, 1, 0.9)
+            x, y = point(self.progress, self.curve.value_at(self.progress))
+            cr.arc(x, y, 3 if width > 60 else 2, 0, 6.2832)
+            cr.fill()
+
+
+class WindowAppearancePage(Adw.PreferencesPage):
+    """Window appearance and layout settings page"""
+    
+    __gsignals__ = {
+        'pending-changed': (GObject.SignalFlags.RUN_FIRST, None, ()),
+    }
+    
+    def __init__(self, parser, writer, model):
+        super().__init__()
+        self.parser = parser
+        self.writer = writer
+        self.model = model
+        
+        self.set_title("Window Appearance")
+        self.set_icon_name("view-grid-symbolic")
+        
+        curves = parser.parse_animation_curves()
+        self.beziers = curves['beziers']
+        self.animations = curves['animations']
+        self.curve_names = CurveNameList(['default'] + [c.name for c in self.beziers])
+        self.curves_changed = False
+        
+        self.widgets = {}
+        self._create_ui()
+    
+    def _create_ui(self):
+        self.add(create_preview_group(self.model))
+        
+        border_group = Adw.PreferencesGroup()
+        border_group.set_title(" Window Borders")
+        border_group.set_description("Customize window frames")
+        
+        border_size = Adw.SpinRow()
+        border_size.set_title("Border Thickness")
+        border_size.set_subtitle("Width of window borders (0-10 pixels)")
+        border_size.set_adjustment(Gtk.Adjustment(lower=0, upper=10, step_increment=1))
+        bind_setting(self.model, 'border_size', border_size)
+        self.widgets['border_size'] = border_size
+        border_group.add(border_size)
+        
+        rounding = Adw.SpinRow()
+        rounding.set_title("Corner Rounding")
+        rounding.set_subtitle("Radius of rounded corners (0-40 pixels)")
+        rounding.set_adjustment(Gtk.Adjustment(lower=0, upper=40, step_increment=1))
+        bind_setting(self.model, 'rounding', rounding)
+        self.widgets['rounding'] = rounding
+        border_group.add(rounding)
+        
+        self.add(border_group)
+        
+        gaps_group = Adw.PreferencesGroup()
+        gaps_group.set_title(" Window Spacing")
+        gaps_group.set_description("Configure gaps between windows")
+        
+        gaps_in = Adw.SpinRow()
+        gaps_in.set_title("Inner Gaps")
+        gaps_in.set_subtitle("Space between windows (0-30 pixels)")
+        gaps_in.set_adjustment(Gtk.Adjustment(lower=0, upper=30, step_increment=1))
+        bind_setting(self.model, 'gaps_in', gaps_in)
+        self.widgets['gaps_in'] = gaps_in
+        gaps_group.add(gaps_in)
+        
+        gaps_out = Adw.SpinRow()
+        gaps_out.set_title("Outer Gaps")
+        gaps_out.set_subtitle("Space from screen edges (0-30 pixels)")
+        gaps_out.set_adjustment(Gtk.Adjustment(lower=0, upper=30, step_increment=1))
+        bind_setting(self.model, 'gaps_out', gaps_out)
+        self.widgets['gaps_out'] = gaps_out
+        gaps_group.add(gaps_out)
+        
+        self.add(gaps_group)
+        
+        anim_group = Adw.PreferencesGroup()
+        anim_group.set_title(" Animations")
+        anim_group.set_description("Window motion effects")
+        
+        enable_anim = Adw.SwitchRow()
+        enable_anim.set_title("Enable Animations")
+        enable_anim.set_subtitle("Smooth window transitions")
+        bind_setting(self.model, 'animations_enabled', enable_anim)
+        self.widgets['animations_enabled'] = enable_anim
+        anim_group.add(enable_anim)
         
-        apply_btn = Gtk.Button(label="Apply")
-        apply_btn.add_css_class("suggested-action")
-        apply_btn.connect("clicked", lambda b: self._on_language_picker_apply(dialog))
-        button_box.append(apply_btn)
+        for animation in self.animations:
+            anim_group.add(self._create_animation_row(animation))
         
-        content_box.append(button_box)
+        self.add(anim_group)
         
-        main_box.append(content_box)
-        dialog.present()
-    
-    def _on_language_picker_apply(self, dialog):
-        """Handle language picker apply"""
-        new_languages = []
-        for code, check in self.lang_checkboxes.items():
-            if check.get_active():
-                new_languages.append(code)
+        curves_group = Adw.PreferencesGroup()
+        curves_group.set_title(" Curves")
+        curves_group.set_description("Bezier easing curves used by the animations above")
         
-        if new_languages:
-            self.selected_languages = new_languages[:4]
-            self._on_setting_changed('kb_layout', ','.join(self.selected_languages))
-            self.current_languages_row.set_subtitle(self._get_languages_display())
+        add_button = Gtk.Button(icon_name="list-add-symbolic", valign=Gtk.Align.CENTER)
+        add_button.add_css_class("flat")
+        add_button.set_tooltip_text("Add a curve")
+        add_button.connect("clicked", self._on_add_curve)
+        curves_group.set_header_suffix(add_button)
         
-        dialog.close()
+        for curve in self.beziers:
+            curves_group.add(self._create_curve_row(curve))
+        
+        self.curves_group = curves_group
+        self.add(curves_group)
     
-    def _on_switch_method_changed(self, combo_row, pspec):
-        """Handle switch method change"""
-        selected = combo_row.get_selected()
-        methods = list(self.SWITCH_METHODS.keys())
-        if selected < len(methods):
-            method = methods[selected]
-            self._on_setting_changed('kb_options', method)
+    def _create_curve_row(self, curve):
+        """Expander with a preview, four control points and a scrub slider"""
+        row = Adw.ExpanderRow()
+        row.set_title(curve.name)
+        row.set_subtitle(curve.to_config().split(',', 1)[1].strip())
+        
+        thumbnail = BezierPreview(curve, 40)
+        row.add_suffix(thumbnail)
+        
+        preview = BezierPreview(curve, 160)
+        preview.set_margin_top(8)
+        preview.set_margin_bottom(8)
+        preview_row = Adw.PreferencesRow()
+        preview_row.set_child(preview)
+        row.add_row(preview_row)
+        
+        previews = (thumbnail, preview)
+        for attr, title, lower, upper in (
+            ('x1', "Start Handle X", 0, 1), ('y1', "Start Handle Y", -1, 2),
+            ('x2', "End Handle X", 0, 1), ('y2', "End Handle Y", -1, 2),
+        ):
+            spin = Adw.SpinRow()
+            spin.set_title(title)
+            spin.set_digits(2)
+            spin.set_adjustment(Gtk.Adjustment(
+                lower=lower, upper=upper, step_increment=0.01, page_increment=0.1,
+                value=getattr(curve, attr)
+            ))
+            spin.connect("changed", self._on_curve_point_changed, curve, attr, row, previews)
+            row.add_row(spin)
+        
+        scrub = Gtk.Scale.new_with_range(Gtk.Orientation.HORIZONTAL, 0, 1, 0.01)
+        scrub.set_hexpand(True)
+        scrub.connect("value-changed", lambda w: preview.set_progress(w.get_value()))
+        play = Gtk.Button(icon_name="media-playback-start-symbolic", valign=Gtk.Align.CENTER)
+        play.add_css_class("flat")
+        play.connect("clicked", lambda _: preview.play(self._duration_for(curve.name)))
+        scrub_row = Adw.ActionRow()
+        scrub_row.set_title("Scrub")
+        scrub_row.add_suffix(scrub)
+        scrub_row.add_suffix(play)
+        row.add_row(scrub_row)
+        return row
     
-    def _create_scale_row(self, title, subtitle, min_val, max_val, step, value, setting_name, digits):
-        """Helper to create a row with a scale widget"""
+    def _create_animation_row(self, animation):
+        """One animation = line: on/off, speed and curve"""
         row = Adw.ActionRow()
-        row.set_title(title)
-        row.set_subtitle(subtitle)
-        
-        scale = Gtk.Scale(orientation=Gtk.Orientation.HORIZONTAL)
-        scale.set_range(min_val, max_val)
-        scale.set_value(value)
-        scale.set_digits(digits)
-        scale.set_hexpand(True)
-        scale.set_draw_value(True)
-        scale.set_value_pos(Gtk.PositionType.RIGHT)
-        scale.set_size_request(200, -1)
-        scale.connect("value-changed", lambda w: self._on_setting_changed(setting_name, round(w.get_value(), digits)))
-        
-        row.add_suffix(scale)
+        row.set_title(animation['name'])
+        if animation.get('style'):
+            row.set_subtitle(animation['style'])
+        
+        preview = BezierPreview(self._curve_named(animation['curve']), 40)
+        row.add_suffix(preview)
+        
+        enabled = Gtk.Switch(valign=Gtk.Align.CENTER, active=animation['enabled'])
+        enabled.connect("notify::active", lambda w, _: self._on_animation_changed(animation, 'enabled', w.get_active()))
+        row.add_suffix(enabled)
+        
+        speed = Gtk.SpinButton.new_with_range(0.1, 50, 0.1)
+        speed.set_digits(1)
+        speed.set_valign(Gtk.Align.CENTER)
+        speed.set_value(animation['speed'])
+        speed.set_tooltip_text("Speed in units of 100 ms")
+        speed.connect("value-changed", lambda w: self._on_animation_changed(animation, 'speed', round(w.get_value(), 2)))
+        row.add_suffix(speed)
+        
+        names = self.curve_names
+        if animation['curve'] not in names.keys():
+            names.append(animation['curve'])
+        curve = Gtk.DropDown(model=names.model, valign=Gtk.Align.CENTER)
+        curve.set_selected(names.keys().index(animation['curve']))
+        curve.connect("notify::selected", self._on_animation_curve_selected, animation, preview)
+        row.add_suffix(curve)
+        
+        play = Gtk.Button(icon_name="media-playback-start-symbolic", valign=Gtk.Align.CENTER)
+        play.add_css_class("flat")
+        play.connect("clicked", lambda _: preview.play(animation['speed'] * 100))
+        row.add_suffix(play)
         return row
     
-    def _on_setting_changed(self, setting_name, value):
-        """Handle any setting change"""
-        self.settings[setting_name] = value
-        print(f"⚙️ Setting changed: {setting_name} = {value}")
+    def _curve_named(self, name):
+        for curve in self.beziers:
+            if curve.name == name:
+                return curve
+        return BezierCurve.DEFAULT
+    
+    def _duration_for(self, curve_name):
+        """Preview duration of the first animation using a curve, in ms"""
+        for animation in self.animations:
+            if animation['curve'] == curve_name:
+                return animation['speed'] * 100
+        return 500
+    
+    def _on_curve_point_changed(self, spin, curve, attr, row, previews):
+        setattr(curve, attr, round(spin.get_value(), 3))
+        row.set_subtitle(curve.to_config().split(',', 1)[1].strip())
+        self.curves_changed = True
+        for preview in previews:
+            preview.queue_draw()
+        for preview in BezierPreview.showing(curve):
+            preview.queue_draw()
+        print(f"⚙️ Curve changed: {curve.to_config()}")
+        self.emit('pending-changed')
+    
+    def _on_add_curve(self, button):
+        taken = {curve.name for curve in self.beziers}
+        index = len(self.beziers) + 1
+        while f"curve{index}" in taken:
+            index += 1
+        curve = BezierCurve(f"curve{index}", 0.25, 0.1, 0.25, 1.0)
+        self.beziers.append(curve)
+        self.curve_names.append(curve.name)
+        self.curves_changed = True
+        self.curves_group.add(self._create_curve_row(curve))
+        self.emit('pending-changed')
+    
+    def _on_animation_changed(self, animation, field, value):
+        animation[field] = value
+        self.curves_changed = True
+        print(f"⚙️ Animation changed: {format_animation_line(animation)}")
+        self.emit('pending-changed')
+    
+    def _on_animation_curve_selected(self, dropdown, _, animation, preview):
+        name = self.curve_names.keys()[dropdown.get_selected()]
+        preview.set_curve(self._curve_named(name))
+        self._on_animation_changed(animation, 'curve', name)
 
 
 
-class BlurEffectsPage(Adw.PreferencesPage):
-    """Blur and glass effects configuration page"""
+class MonitorLayoutCanvas(Gtk.Fixed):
+    """Drag-to-arrange monitor layout
+    
+    Each output is its own child widget, so dragging one only re-renders that
+    tile; GTK reuses the cached render nodes of everything else.
+    """
+    
+    PADDING = 16
+    SNAP_DISTANCE = 40
+    
+    def __init__(self, on_moved):
+        super().__init__()
+        self.on_moved = on_moved
+        self.set_size_request(640, 300)
+        self.add_css_class("monitor-canvas")
+        self.tiles = {}
+        self.monitors = {}
+        self.ratio = 1.0
+        self.origin = (0, 0)
+        self._drag_start = None
+    
+    @staticmethod
+    def logical_size(monitor):
+        scale = float(monitor.get('scale') or 1.0)
+        width, height = monitor['width'], monitor['height']
+        if int(monitor.get('transform', 0)) % 2:
+            width, height = height, width
+        return width / scale, height / scale
+    
+    def set_monitors(self, monitors):
+        """Rebuild tiles; only called when the monitor set itself changes"""
+        for tile in self.tiles.values():
+            self.remove(tile)
+        self.tiles = {}
+        self.monitors = {m['name']: dict(m) for m in monitors if not m.get('disabled')}
+        if not self.monitors:
+            return
+        
+        self._compute_transform()
+        for name, monitor in self.monitors.items():
+            width, height = self.logical_size(monitor)
+            tile = Gtk.Button(label=f"{name}\n{monitor['width']}×{monitor['height']}")
+            tile.add_css_class("monitor-tile")
+            tile.set_size_request(max(24, int(width * self.ratio)), max(16, int(height * self.ratio)))
+            drag = Gtk.GestureDrag()
+            drag.connect("drag-begin", self._on_drag_begin, name)
+            drag.connect("drag-update", self._on_drag_update, name)
+            drag.connect("drag-end", self._on_drag_end, name)
+            tile.add_controller(drag)
+            self.put(tile, *self._to_canvas(monitor['x'], monitor['y']))
+            self.tiles[name] = tile
+    
+    def _compute_transform(self):
+        boxes = [(m['x'], m['y'], *self.logical_size(m)) for m in self.monitors.values()]
+        min_x = min(b[0] for b in boxes)
+        min_y = min(b[1] for b in boxes)
+        span_x = max(b[0] + b[2] for b in boxes) - min_x
+        span_y = max(b[1] + b[3] for b in boxes) - min_y
+        width, height = self.get_size_request()
+        self.ratio = min((width - 2 * self.PADDING) / (span_x * 1.5),
+                         (height - 2 * self.PADDING) / (span_y * 1.5))
+        self.origin = (min_x - span_x * 0.25, min_y - span_y * 0.25)
+    
+    def _to_canvas(self, x, y):
+        return (self.PADDING + (x - self.origin[0]) * self.ratio,
+                self.PADDING + (y - self.origin[1]) * self.ratio)
+    
+    def _to_logical(self, cx, cy):
+        return (round((cx - self.PADDING) / self.ratio + self.origin[0]),
+                round((cy - self.PADDING) / self.ratio + self.origin[1]))
+    
+    def _on_drag_begin(self, gesture, start_x, start_y, name):
+        self._drag_start = self.get_child_position(self.tiles[name])
+    
+    def _on_drag_update(self, gesture, offset_x, offset_y, name):
+        if self._drag_start is None:
+            return
+        self.move(self.tiles[name], self._drag_start[0] + offset_x, self._drag_start[1] + offset_y)
+    
+    def _on_drag_end(self, gesture, offset_x, offset_y, name):
+        if self._drag_start is None:
+            return
+        x, y = self._to_logical(self._drag_start[0] + offset_x, self._drag_start[1] + offset_y)
+        self._drag_start = None
+        x, y = self._snap(name, x, y)
+        monitor = self.monitors[name]
+        monitor['x'], monitor['y'] = x, y
+        self.move(self.tiles[name], *self._to_canvas(x, y))
+        self.on_moved(name, x, y)
     
-    def __init__(self, parser, writer):
+    def _snap(self, name, x, y):
+        """Snap to the nearest edge of another output so there are no gaps"""
+        width, height = self.logical_size(self.monitors[name])
+        best_x, best_y = (self.SNAP_DISTANCE, x), (self.SNAP_DISTANCE, y)
+        for other_name, other in self.monitors.items():
+            if other_name == name:
+                continue
+            other_width, other_height = self.logical_size(other)
+            for candidate in (other['x'], other['x'] + other_width, other['x'] - width,
+                              other['x'] + other_width - width):
+                if abs(candidate - x) < best_x[0]:
+                    best_x = (abs(candidate - x), candidate)
+            for candidate in (other['y'], other['y'] + other_height, other['y'] - height,
+                              other['y'] + other_height - height):
+                if abs(candidate - y) < best_y[0]:
+                    best_y = (abs(candidate - y), candidate)
+        return int(best_x[1]), int(best_y[1])
+
+
+
+class DisplaysPage(Adw.PreferencesPage):
+    """Monitor arrangement, resolution and scale page"""
+    
+    __gsignals__ = {
+        'pending-changed': (GObject.SignalFlags.RUN_FIRST, None, ()),
+    }
+    
+    def __init__(self, parser, writer, monitors):
         super().__init__()
         self.parser = parser
         self.writer = writer
+        self.monitors = monitors
+        self.pending_monitors = {}
+        self.current = {}
         
-        self.set_title("Blur & Glass Effects")
-        self.set_icon_name("emblem-photos-symbolic")
-        self.settings = parser.parse_decoration_settings()
+        self.set_title("Displays")
+        self.set_icon_name("video-display-symbolic")
         
         self._create_ui()
+        self.monitors.subscribe(self._on_monitors_loaded)
     
     def _create_ui(self):
-        blur_group = Adw.PreferencesGroup()
-        blur_group.set_title(" Liquid Glass Blur")
-        blur_group.set_description("Create the perfect frosted glass effect")
-        
-        enable_blur = Adw.SwitchRow()
-        enable_blur.set_title("Enable Blur")
-        enable_blur.set_subtitle("Master switch for all blur effects")
-        enable_blur.set_active(self.settings.get('blur_enabled', True))
-        enable_blur.connect("notify::active", lambda w, p: self._on_setting_changed('blur_enabled', w.get_active()))
-        blur_group.add(enable_blur)
+        layout_group = Adw.PreferencesGroup()
+        layout_group.set_title(" Arrangement")
+        layout_group.set_description("Drag displays to match their physical layout")
         
-        blur_size = Adw.SpinRow()
-        blur_size.set_title("Blur Radius")
-        blur_size.set_subtitle("Size of the blur effect (1-20)")
-        blur_size.set_adjustment(Gtk.Adjustment(
-            lower=1, upper=20, step_increment=1, 
-            value=self.settings.get('blur_size', 10)
-        ))
-        blur_size.connect("changed", lambda w: self._on_setting_changed('blur_size', int(w.get_value())))
-        blur_group.add(blur_size)
+        self.canvas = MonitorLayoutCanvas(self._on_monitor_moved)
+        layout_group.add(self.canvas)
+        self.add(layout_group)
         
-        blur_passes = Adw.SpinRow()
-        blur_passes.set_title("Blur Quality")
-        blur_passes.set_subtitle("Higher = smoother (1-8, affects performance)")
-        blur_passes.set_adjustment(Gtk.Adjustment(
-            lower=1, upper=8, step_increment=1,
-            value=self.settings.get('blur_passes', 4)
+        self.outputs_group = None
+    
+    def _on_monitors_loaded(self, data):
+        """Rebuild after the first fetch or a hotplug event"""
+        monitors = data or []
+        self.current = {m['name']: dict(m) for m in monitors}
+        for name in list(self.pending_monitors):
+            if name not in self.current:
+                del self.pending_monitors[name]
+        self.canvas.set_monitors([self.pending_monitors.get(m['name'], m) for m in monitors])
+        
+        if self.outputs_group is not None:
+            self.remove(self.outputs_group)
+        self.outputs_group = Adw.PreferencesGroup()
+        self.outputs_group.set_title(" Outputs")
+        if not monitors:
+            self.outputs_group.set_description("No monitors reported by hyprctl")
+        for monitor in monitors:
+            self.outputs_group.add(self._create_output_row(monitor))
+        self.add(self.outputs_group)
+    
+    def _create_output_row(self, monitor):
+        name = monitor['name']
+        row = Adw.ExpanderRow()
+        row.set_title(name)
+        row.set_subtitle(monitor.get('description', ''))
+        
+        modes = monitor.get('availableModes') or [
+            f"{monitor['width']}x{monitor['height']}@{monitor['refreshRate']:.2f}Hz"
+        ]
+        mode_row = Adw.ComboRow()
+        mode_row.set_title("Resolution")
+        mode_model = Gtk.StringList()
+        selected = 0
+        current_mode = f"{monitor['width']}x{monitor['height']}@{monitor['refreshRate']:.2f}Hz"
+        for i, mode in enumerate(modes):
+            mode_model.append(mode)
+            if mode == current_mode:
+                selected = i
+        mode_row.set_model(mode_model)
+        mode_row.set_selected(selected)
+        mode_row.connect("notify::selected", self._on_mode_changed, name, modes)
+        row.add_row(mode_row)
+        
+        scale_row = Adw.SpinRow()
+        scale_row.set_title("Scale")
+        scale_row.set_digits(2)
+        scale_row.set_adjustment(Gtk.Adjustment(
+            lower=0.5, upper=3.0, step_increment=0.25,
+            value=float(monitor.get('scale', 1.0))
         ))
-        blur_passes.connect("changed", lambda w: self._on_setting_changed('blur_passes', int(w.get_value())))
-        blur_group.add(blur_passes)
-        
-        optimizations = Adw.SwitchRow()
-        optimizations.set_title("Performance Optimizations")
-        optimizations.set_subtitle("Enable for better performance (recommended)")
-        optimizations.set_active(self.settings.get('blur_new_optimizations', True))
-        optimizations.connect("notify::active", lambda w, p: self._on_setting_changed('blur_new_optimizations', w.get_active()))
-        blur_group.add(optimizations)
-        
-        self.add(blur_group)
-        
-        advanced_group = Adw.PreferencesGroup()
-        advanced_group.set_title(" Advanced Glass Properties")
-        advanced_group.set_description("Fine-tune the liquid glass appearance")
-        
-        noise_row = self._create_scale_row(
-            "Glass Texture",
-            "Add subtle grain for realism (0.000-0.100)",
-            0, 0.1, 0.001,
-            self.settings.get('blur_noise', 0.01),
-            'blur_noise',
-            3
-        )
-        advanced_group.add(noise_row)
-        
-        contrast_row = self._create_scale_row(
-            "Color Contrast",
-            "Make colors pop through glass (0.5-2.0)",
-            0.5, 2.0, 0.05,
-            self.settings.get('blur_contrast', 1.3),
-            'blur_contrast',
-            2
-        )
-        advanced_group.add(contrast_row)
-        
-        brightness_row = self._create_scale_row(
-            "Glass Brightness",
-            "Luminosity multiplier (0.5-1.5)",
-            0.5, 1.5, 0.05,
-            self.settings.get('blur_brightness', 1.1),
-            'blur_brightness',
-            2
-        )
-        advanced_group.add(brightness_row)
-        
-        vibrancy_row = self._create_scale_row(
-            "Vibrancy ",
-            "macOS-style color saturation (0.0-1.0)",
-            0, 1.0, 0.05,
-            self.settings.get('blur_vibrancy', 0.6),
-            'blur_vibrancy',
-            2
-        )
-        advanced_group.add(vibrancy_row)
-        
-        vib_dark_row = self._create_scale_row(
-            "Vibrancy Darkness",
-            "Dark tone preservation (0.0-1.0)",
-            0, 1.0, 0.05,
-            self.settings.get('blur_vibrancy_darkness', 0.2),
-            'blur_vibrancy_darkness',
-            2
-        )
-        advanced_group.add(vib_dark_row)
-        
-        xray = Adw.SwitchRow()
-        xray.set_title("X-Ray Transparency")
-        xray.set_subtitle("See through blur completely")
-        xray.set_active(self.settings.get('blur_xray', False))
-        xray.connect("notify::active", lambda w, p: self._on_setting_changed('blur_xray', w.get_active()))
-        advanced_group.add(xray)
-        
-        self.add(advanced_group)
-        
-    def _create_scale_row(self, title, subtitle, min_val, max_val, step, value, setting_name, digits):
-        """Helper to create a row with a scale widget"""
-        row = Adw.ActionRow()
+        scale_row.connect("changed", lambda w: self._update_monitor(name, scale=round(w.get_value(), 2)))
+        row.add_row(scale_row)
+        return row
+    
+    def _on_mode_changed(self, combo_row, pspec, name, modes):
+        match = re.match(r'(\d+)x(\d+)@([\d.]+)', modes[combo_row.get_selected()])
+        if match:
+            self._update_monitor(name, width=int(match.group(1)), height=int(match.group(2)),
+                                 refreshRate=float(match.group(3)))
+    
+    def _on_monitor_moved(self, name, x, y):
+        self._update_monitor(name, x=x, y=y)
+    
+    def _update_monitor(self, name, **changes):
+        monitor = self.pending_monitors.setdefault(name, dict(self.current[name]))
+        monitor.update(changes)
+        print(f"⚙️ Monitor changed: {name} {changes}")
+        self.emit('pending-changed')
+
+
+
+class SettingDescriptor(GObject.Object):
+    """List model item describing one setting shown by a recycled row"""
+    
+    def __init__(self, option, value):
+        super().__init__()
+        self.option = option
+        self.path = option['path']
+        self.value = value
+        self.error = None
+        self.row = None
+
+
+
+class SettingRowWidget(Gtk.Box):
+    """A reusable row: one editor of each kind, only the matching one shown
+    
+    Rows are created by the list factory for the visible range only and are
+    rebound to other descriptors as the user scrolls.
+    """
+    
+    def __init__(self, on_changed):
+        super().__init__(orientation=Gtk.Orientation.HORIZONTAL, spacing=12)
+        self.on_changed = on_changed
+        self.descriptor = None
+        self.binding = False
+        self.add_css_class("setting-row")
+        self.set_margin_start(12)
+        self.set_margin_end(12)
+        self.set_margin_top(8)
+        self.set_margin_bottom(8)
+        
+        labels = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=2)
+        labels.set_hexpand(True)
+        labels.set_valign(Gtk.Align.CENTER)
+        self.title = Gtk.Label(xalign=0)
+        self.subtitle = Gtk.Label(xalign=0)
+        self.subtitle.add_css_class("dim-label")
+        self.subtitle.add_css_class("caption")
+        self.subtitle.set_wrap(True)
+        self.subtitle.set_lines(2)
+        self.subtitle.set_ellipsize(Pango.EllipsizeMode.END)
+        labels.append(self.title)
+        labels.append(self.subtitle)
+        self.append(labels)
+        
+        self.switch = Gtk.Switch(valign=Gtk.Align.CENTER)
+        self.switch.connect("notify::active", lambda w, p: self._emit(w.get_active()))
+        self.spin = Gtk.SpinButton(valign=Gtk.Align.CENTER)
+        self.spin.connect("value-changed", self._on_spin_changed)
+        self.dropdown = Gtk.DropDown(valign=Gtk.Align.CENTER)
+        self.dropdown.connect("notify::selected", self._on_dropdown_changed)
+        self.entry = Gtk.Entry(valign=Gtk.Align.CENTER)
+        self.entry.set_width_chars(18)
+        self.entry.connect("activate", lambda w: self._emit(w.get_text()))
+        self.editors = {
+            'bool': self.switch, 'number': self.spin,
+            'choice': self.dropdown, 'text': self.entry,
+        }
+        for editor in self.editors.values():
+            editor.set_visible(False)
+            self.append(editor)
+    
+    @staticmethod
+    def editor_kind(option):
+        if option['type'] == 'bool':
+            return 'bool'
+        if option['type'] in ('int', 'float') and option.get('min') is not None and option.get('max') is not None:
+            return 'number'
+        if option['type'] == 'choice':
+            return 'choice'
+        return 'text'
+    
+    def bind(self, descriptor):
+        """Show a descriptor in this row without emitting change callbacks"""
+        self.binding = True
+        self.descriptor = descriptor
+        descriptor.row = self
+        option = descriptor.option
+        value = descriptor.value
+        self.title.set_label(option['name'].split(':')[-1].replace('_', ' ').capitalize())
+        self.subtitle.set_label(f"{option['path']} — {option['description']}")
+        self.set_tooltip_text(descriptor.error or option['description'])
+        
+        kind = self.editor_kind(option)
+        for name, editor in self.editors.items():
+            editor.set_visible(name == kind)
+        
+        if kind == 'bool':
+            self.switch.set_active(str(value).strip().lower() in ('true', '1', 'yes', 'on'))
+        elif kind == 'number':
+            digits = 0 if option['type'] == 'int' else 2
+            self.spin.set_digits(digits)
+            self.spin.set_adjustment(Gtk.Adjustment(
+                lower=option['min'], upper=option['max'],
+                step_increment=1 if digits == 0 else 0.05,
+            ))
+            try:
+                self.spin.set_value(float(value))
+            except (TypeError, ValueError):
+                self.spin.set_value(float(option['min']))
+        elif kind == 'choice':
+            choices = option.get('choices') or ['']
+            self.dropdown.set_model(Gtk.StringList.new([c or '(default)' for c in choices]))
+            self.dropdown.set_selected(choices.index(str(value)) if str(value) in choices else 0)
+        else:
+            self.entry.set_text('' if value is None else str(value))
+        
+        self.show_error(descriptor.error)
+        self.binding = False
+    
+    def unbind(self):
+        if self.descriptor is not None and self.descriptor.row is self:
+            self.descriptor.row = None
+        self.descriptor = None
+    
+    def show_error(self, error):
+        if error:
+            self.add_css_class("error")
+        else:
+            self.remove_css_class("error")
+        self.set_tooltip_text(error or (self.descriptor.option['description'] if self.descriptor else None))
+    
+    def _on_spin_changed(self, spin):
+        if self.descriptor is None:
+            return
+        if self.descriptor.option['type'] == 'int':
+            self._emit(int(spin.get_value()))
+        else:
+            self._emit(round(spin.get_value(), 4))
+    
+    def _on_dropdown_changed(self, dropdown, pspec):
+        if self.descriptor is None:
+            return
+        choices = self.descriptor.option.get('choices') or ['']
+        selected = dropdown.get_selected()
+        if selected < len(choices):
+            self._emit(choices[selected])
+    
+    def _emit(self, value):
+        if self.binding or self.descriptor is None:
+            return
+        self.descriptor.value = value
+        self.on_changed(self.descriptor, value)
+
+
+
+class OptionSectionPage(Gtk.ScrolledWindow):
+    """All catalogue options of one section in a virtualized, recycled list"""
+    
+    def __init__(self, section, options, current_values, on_changed):
+        super().__init__()
+        self.section = section
+        self.options = options
+        self.current_values = current_values
+        self.on_changed = on_changed
+        self.descriptors = {}
+        self.model = None
+        self.list_view = None
+        self.built = False
+        self.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+        self.set_vexpand(True)
+    
+    def get_title(self):
+        return self.section.replace('_', ' ').title()
+    
+    def _current(self, option):
+        value = self.current_values.get(option['path'])
+        if value is None:
+            value = option.get('current')
+        return option.get('default') if value is None else value
+    
+    @tracer.traced('page.option_section.build', 'ui')
+    def ensure_built(self):
+        """Create the model now; row widgets only exist for the visible range"""
+        if self.built:
+            return
+        self.built = True
+        self.model = Gio.ListStore(item_type=SettingDescriptor)
+        for option in self.options:
+            descriptor = SettingDescriptor(option, self._current(option))
+            self.descriptors[option['path']] = descriptor
+            self.model.append(descriptor)
+        
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self._on_setup)
+        factory.connect("bind", lambda f, item: item.get_child().bind(item.get_item()))
+        factory.connect("unbind", lambda f, item: item.get_child().unbind())
+        
+        self.list_view = Gtk.ListView(model=Gtk.NoSelection(model=self.model), factory=factory)
+        self.list_view.add_css_class("boxed-list")
+        self.list_view.set_margin_start(20)
+        self.list_view.set_margin_end(20)
+        self.list_view.set_margin_top(12)
+        self.list_view.set_margin_bottom(12)
+        self.set_child(self.list_view)
+    
+    def _on_setup(self, factory, list_item):
+        list_item.set_activatable(False)
+        list_item.set_child(SettingRowWidget(self.on_changed))
+    
+    def show_error(self, path, error):
+        descriptor = self.descriptors.get(path)
+        if descriptor is None:
+            return
+        descriptor.error = error
+        if descriptor.row is not None:
+            descriptor.row.show_error(error)
+    
+    def scroll_to(self, path):
+        descriptor = self.descriptors.get(path)
+        if descriptor is None:
+            return
+        position = self.options.index(descriptor.option)
+        self.list_view.scroll_to(position, Gtk.ListScrollFlags.FOCUS, None)
+
+
+
+class HyprlandOptionsPage(Gtk.Box):
+    """Auto-generated pages for every option in the Hyprland catalogue
+    
+    Nothing is loaded until the page is first shown; each section page then
+    builds its rows only when it becomes visible.
+    """
+    
+    __gsignals__ = {
+        'pending-changed': (GObject.SignalFlags.RUN_FIRST, None, ()),
+    }
+    
+    def __init__(self, parser, writer, catalog):
+        super().__init__(orientation=Gtk.Orientation.HORIZONTAL)
+        self.parser = parser
+        self.writer = writer
+        self.catalog = catalog
+        self.pending = {}
+        self.section_pages = {}
+        self.validator = None
+        self.loaded = False
+        
+        self.stack = Gtk.Stack()
+        self.stack.set_hexpand(True)
+        self.stack.set_transition_type(Gtk.StackTransitionType.CROSSFADE)
+        self.stack.connect("notify::visible-child", self._on_section_shown)
+        
+        sidebar = Gtk.StackSidebar()
+        sidebar.set_stack(self.stack)
+        sidebar.set_size_request(180, -1)
+        
+        self.append(sidebar)
+        self.append(self.stack)
+        self.connect("map", lambda w: self.ensure_loaded())
+    
+    def _current_values(self):
+        """Effective values of the user's config files, read once"""
+        values = {}
+        for path in sorted(self.parser.config_dir.glob("*.conf")):
+            try:
+                document = HyprConfDocument.load(path)
+            except (OSError, UnicodeDecodeError):
+                continue
+            for key, node in document.items():
+                values[key] = node.value
+        return values
+    
+    def ensure_loaded(self):
+        if self.loaded:
+            return
+        self.loaded = True
+        with tracer.span('page.options.load', 'ui'):
+            sections = self.catalog.sections()
+            self.validator = SettingsValidator(self.catalog.schema())
+            current_values = self._current_values()
+            for section, options in sections.items():
+                page = OptionSectionPage(section, options, current_values, self._on_descriptor_changed)
+                self.section_pages[section] = page
+                self.stack.add_titled(page, section, page.get_title())
+        self._on_section_shown(self.stack, None)
+    
+    def _on_section_shown(self, stack, pspec):
+        page = stack.get_visible_child()
+        if page is not None:
+            page.ensure_built()
+    
+    def show_option(self, path):
+        """Reveal the row for an option path"""
+        self.ensure_loaded()
+        section = path.split(':', 1)[0]
+        page = self.section_pages.get(section)
+        if page is None:
+            return
+        self.stack.set_visible_child(page)
+        page.ensure_built()
+        page.scroll_to(path)
+    
+    def _on_descriptor_changed(self, descriptor, value):
+        path = descriptor.path
+        error = self.validator.validate(path, value) if self.validator else None
+        section = self.section_pages.get(path.split(':', 1)[0])
+        if section is not None:
+            section.show_error(path, error)
+        self.pending[path] = value
+        print(f"⚙️ Option changed: {path} = {value}")
+        self.emit('pending-changed')
+
+
+
+class WindowRulesPage(Adw.PreferencesPage):
+    """windowrule/windowrulev2 editor with a live match tester
+    
+    Rules are read from every config layer; only the user's own lines are
+    editable. The windows each rule matches are kept per rule, so editing a
+    rule re-parses and re-evaluates just that rule against the open windows.
+    """
+    
+    __gsignals__ = {
+        'pending-changed': (GObject.SignalFlags.RUN_FIRST, None, ()),
+    }
+    
+    def __init__(self, parser, clients):
+        super().__init__()
+        self.parser = parser
+        self.clients_snapshot = clients
+        self.clients = []
+        self.columns = WindowRule.columns([])
+        self.entries = []
+        self.rules = []
+        self.matches = []
+        self.rule_rows = []
+        self.client_rows = []
+        self.pending_edits = {}
+        self.added = {}
+        self.rules_group = None
+        self.clients_group = None
+        self.loaded = False
+        
+        self.set_title("Window Rules")
+        self.set_icon_name("preferences-system-windows-symbolic")
+        self.connect("map", lambda w: self.ensure_loaded())
+    
+    @property
+    def pending_additions(self):
+        return [(rule.keyword, rule.text) for _, rule in sorted(self.added.items())]
+    
+    def ensure_loaded(self):
+        if self.loaded:
+            return
+        self.loaded = True
+        with tracer.span('page.rules.load', 'ui'):
+            self._load_rules()
+        self.clients_snapshot.subscribe(self._on_clients_loaded)
+    
+    def _load_rules(self):
+        """(Re)build the rule list from the config layers"""
+        if self.rules_group is not None:
+            self.remove(self.rules_group)
+        self.entries = self.parser.layers.assignments(*WindowRule.KEYWORDS)
+        self.rules = [WindowRule(entry.path, entry.value) for entry in self.entries]
+        self.matches = [rule.matching(self.clients, self.columns) for rule in self.rules]
+        self.rule_rows = []
+        self.pending_edits = {}
+        self.added = {}
+        
+        self.rules_group = Adw.PreferencesGroup()
+        self.rules_group.set_title(" Rules")
+        self.rules_group.set_description(
+            f"{len(self.rules)} rules from Omarchy, the theme and your files; yours can be edited")
+        
+        add_row = Adw.EntryRow()
+        add_row.set_title("New rule, e.g. float, class:^(org.pulseaudio.pavucontrol)$")
+        add_row.set_show_apply_button(True)
+        add_row.connect("apply", self._on_rule_added)
+        self.rules_group.add(add_row)
+        
+        for index in range(len(self.rules)):
+            self.rules_group.add(self._create_rule_row(index))
+        self.add(self.rules_group)
+        if self.clients_group is not None:
+            self.remove(self.clients_group)
+            self.add(self.clients_group)
+    
+    def _create_rule_row(self, index):
+        entry = self.entries[index]
+        rule = self.rules[index]
+        where = f"{rule.keyword} · {entry.file.name}:{entry.line}" if entry else f"{rule.keyword} · new"
+        if entry is None or entry.layer == 'user':
+            row = Adw.EntryRow()
+            row.set_title(where)
+            row.set_text(rule.text)
+            row.connect("changed", lambda w: self._on_rule_edited(index, w.get_text()))
+            delete = Gtk.Button.new_from_icon_name("user-trash-symbolic")
+            delete.add_css_class("flat")
+            delete.set_valign(Gtk.Align.CENTER)
+            delete.set_tooltip_text("Delete this rule")
+            delete.connect("clicked", lambda b: self._on_rule_deleted(index))
+            row.add_suffix(delete)
+        else:
+            row = Adw.ActionRow()
+            row.set_use_markup(False)
+            row.set_title(rule.text)
+            row.set_subtitle(f"{where} ({entry.layer})")
+        
+        count = Gtk.Label()
+        count.add_css_class("dim-label")
+        row.add_suffix(count)
+        self.rule_rows.append((row, count))
+        self._show_rule(index)
+        return row
+    
+    def _show_rule(self, index):
+        row, count = self.rule_rows[index]
+        rule = self.rules[index]
+        mark_setting_widget(row, f"Invalid rule: {rule.error}" if rule.error else None)
+        matched = self.matches[index]
+        count.set_label("invalid" if rule.error else f"{len(matched)} window(s)")
+        count.set_tooltip_text('\n'.join(
+            f"{self.clients[i].get('class', '')}: {self.clients[i].get('title', '')}" for i in matched
+        ) or None)
+    
+    def _on_rule_edited(self, index, text):
+        rule = self.rules[index]
+        if text == rule.text:
+            return
+        self.rules[index] = WindowRule(rule.keyword, text)
+        self.matches[index] = self.rules[index].matching(self.clients, self.columns)
+        entry = self.entries[index]
+        if entry is None:
+            self.added[index] = self.rules[index]
+        elif text == entry.value:
+            self.pending_edits.pop((entry.file, entry.line, entry.value), None)
+        else:
+            self.pending_edits[(entry.file, entry.line, entry.value)] = text
+        self._show_rule(index)
+        self._show_client_counts()
+        self.emit('pending-changed')
+    
+    def _on_rule_added(self, entry_row):
+        text = entry_row.get_text().strip()
+        if not text:
+            return
+        index = len(self.rules)
+        self.entries.append(None)
+        self.rules.append(WindowRule('windowrulev2', text))
+        self.matches.append(self.rules[index].matching(self.clients, self.columns))
+        self.added[index] = self.rules[index]
+        self.rules_group.add(self._create_rule_row(index))
+        entry_row.set_text("")
+        self._show_client_counts()
+        self.emit('pending-changed')
+    
+    def _on_rule_deleted(self, index):
+        entry = self.entries[index]
+        if entry is None:
+            self.added.pop(index, None)
+        else:
+            self.pending_edits[(entry.file, entry.line, entry.value)] = None
+        self.rules[index] = WindowRule(self.rules[index].keyword, '')
+        self.matches[index] = []
+        self.rule_rows[index][0].set_visible(False)
+        self._show_client_counts()
+        self.emit('pending-changed')
+    
+    def _on_clients_loaded(self, data):
+        """Open windows changed; every rule is evaluated once against them"""
+        self.clients = [client for client in (data or []) if isinstance(client, dict)]
+        with tracer.span('rules.evaluate', 'ui'):
+            self.columns = WindowRule.columns(self.clients)
+            self.matches = [rule.matching(self.clients, self.columns) for rule in self.rules]
+        for index in range(len(self.rule_rows)):
+            self._show_rule(index)
+        
+        if self.clients_group is not None:
+            self.remove(self.clients_group)
+        self.clients_group = Adw.PreferencesGroup()
+        self.clients_group.set_title(" Open Windows")
+        self.clients_group.set_description(
+            "Expand a window to see the rules that apply to it"
+            if self.clients else "No windows reported by hyprctl")
+        self.client_rows = []
+        for index, client in enumerate(self.clients):
+            row = Adw.ExpanderRow()
+            row.set_use_markup(False)
+            row.set_title(client.get('class') or "(no class)")
+            row.set_subtitle(client.get('title', ''))
+            count = Gtk.Label()
+            count.add_css_class("dim-label")
+            row.add_suffix(count)
+            row.connect("notify::expanded", self._on_client_expanded, index)
+            self.client_rows.append({'row': row, 'count': count, 'children': []})
+            self.clients_group.add(row)
+        self.add(self.clients_group)
+        self._show_client_counts()
+    
+    def _rules_for_client(self, index):
+        return [rule_index for rule_index, matched in enumerate(self.matches) if index in matched]
+    
+    def _show_client_counts(self):
+        counts = [0] * len(self.clients)
+        for matched in self.matches:
+            for index in matched:
+                counts[index] += 1
+        for index, info in enumerate(self.client_rows):
+            info['count'].set_label(f"{counts[index]} rule(s)")
+            if info['row'].get_expanded():
+                self._fill_client_row(index)
+    
+    def _on_client_expanded(self, row, pspec, index):
+        if row.get_expanded():
+            self._fill_client_row(index)
+    
+    def _fill_client_row(self, index):
+        info = self.client_rows[index]
+        for child in info['children']:
+            info['row'].remove(child)
+        info['children'] = []
+        for rule_index in self._rules_for_client(index):
+            rule = self.rules[rule_index]
+            entry = self.entries[rule_index]
+            child = Adw.ActionRow()
+            child.set_use_markup(False)
+            child.set_title(rule.effect)
+            child.set_subtitle(f"{entry.file.name}:{entry.line}" if entry else "new rule")
+            info['row'].add_row(child)
+            info['children'].append(child)
+    
+    def rules_applied(self):
+        """The edits are on disk; read the rules again"""
+        self._load_rules()
+
+
+
+class ThemeItem(GObject.Object):
+    """List model item for one theme in the gallery grid"""
+    
+    def __init__(self, theme, current):
+        super().__init__()
+        self.theme = theme
+        self.current = current
+
+
+
+class ToolConfigPage(Adw.PreferencesPage):
+    """Page for the hyprlang config of another Hypr tool, such as hyprlock
+    
+    The file is parsed on the config pool at startup and the rows fill in
+    when it arrives. Apply reaches the page through the page hooks
+    (pending_paths, apply, applied, pending_diffs), like a plugin page.
+    """
+    
+    __gsignals__ = {
+        'pending-changed': (GObject.SignalFlags.RUN_FIRST, None, ()),
+    }
+    
+    NAME = None
+    TITLE = None
+    ICON = None
+    SCHEMA = {}
+    # (group title, [(option path, row title, row subtitle)])
+    GROUPS = ()
+    
+    def __init__(self, writer, files):
+        super().__init__()
+        self.writer = writer
+        self.path = writer.config_dir / f"{self.NAME}.conf"
+        self.validator = SettingsValidator(self.SCHEMA)
+        self.preview = PendingChanges(writer)
+        self.widgets = {}
+        self.shown = {}
+        self.loaded_listeners = None
+        self._loading = True
+        
+        self.set_title(self.TITLE)
+        self.set_icon_name(self.ICON)
+        self._create_ui()
+        files.get(self.path, self._on_document)
+    
+    def _create_ui(self):
+        for title, fields in self.GROUPS:
+            group = Adw.PreferencesGroup()
+            group.set_title(title)
+            for path, row_title, subtitle in fields:
+                group.add(self._create_row(path, row_title, subtitle))
+            self.add(group)
+    
+    def _create_row(self, path, title, subtitle):
+        spec = self.SCHEMA[path]
+        if spec['type'] == 'bool':
+            row = Adw.SwitchRow()
+            row.connect("notify::active", lambda w, pspec: self._on_changed())
+        elif spec['type'] == 'int':
+            row = Adw.SpinRow()
+            row.set_adjustment(Gtk.Adjustment(lower=spec.get('min', 0), upper=spec.get('max', 100),
+                                              step_increment=1))
+            row.connect("changed", lambda w: self._on_changed())
+        else:
+            row = Adw.EntryRow()
+            row.connect("changed", lambda w: self._on_changed())
         row.set_title(title)
-        row.set_subtitle(subtitle)
-        
-        scale = Gtk.Scale(orientation=Gtk.Orientation.HORIZONTAL)
-        scale.set_range(min_val, max_val)
-        scale.set_value(max(min_val, value))
-        scale.set_digits(digits)
-        scale.set_hexpand(True)
-        scale.set_draw_value(True)
-        scale.set_value_pos(Gtk.PositionType.RIGHT)
-        scale.set_size_request(200, -1)
-        scale.connect("value-changed", lambda w: self._on_setting_changed(setting_name, round(w.get_value(), digits)))
-        
-        row.add_suffix(scale)
+        if subtitle and not isinstance(row, Adw.EntryRow):
+            row.set_subtitle(subtitle)
+        row.set_sensitive(False)
+        self.widgets[path] = row
         return row
     
-    def _on_setting_changed(self, setting_name, value):
-        """Handle any setting change"""
-        self.settings[setting_name] = value
-        print(f"⚙️ Setting changed: {setting_name} = {value}")
-
+    def _on_document(self, document):
+        """The parsed file arrived from the pool; show its values"""
+        self._loading = True
+        for path, widget in self.widgets.items():
+            kind = self.SCHEMA[path]['type']
+            text = document.get_value(path)
+            try:
+                value = parse_config_value(text, kind) if text is not None else None
+            except ValueError as e:
+                print(f"⚠️ Ignoring {path} in {self.path.name}: {e}")
+                value = None
+            if kind == 'bool':
+                widget.set_active(bool(value))
+            elif kind == 'int':
+                widget.set_value(value if value is not None else self.SCHEMA[path].get('min', 0))
+            else:
+                widget.set_text(value or '')
+            widget.set_sensitive(True)
+        self._on_loaded(document)
+        self._loading = False
+        self.shown = self.values()
+    
+    def _on_loaded(self, document):
+        """Hook for subclasses with more than plain values"""
+    
+    def values(self):
+        values = {}
+        for path, widget in self.widgets.items():
+            kind = self.SCHEMA[path]['type']
+            if kind == 'bool':
+                values[path] = widget.get_active()
+            elif kind == 'int':
+                values[path] = int(widget.get_value())
+            else:
+                values[path] = widget.get_text().strip()
+        return values
+    
+    def pending_values(self):
+        if self._loading:
+            return {}
+        return {path: value for path, value in self.values().items() if value != self.shown.get(path)}
+    
+    def pending_listeners(self):
+        return None
+    
+    def _on_changed(self):
+        if self._loading:
+            return
+        for path, value in self.values().items():
+            mark_setting_widget(self.widgets[path], self.validator.validate(path, value))
+        self.emit('pending-changed')
+    
+    def pending_paths(self):
+        if self.pending_values() or self.pending_listeners() is not None:
+            return [self.path]
+        return []
+    
+    def pending_diffs(self):
+        if not self.pending_paths():
+            return {}
+        try:
+            return self.preview.preview(self.path, lambda document: self.writer.plan_tool_config(
+                document, self.pending_values(), self.pending_listeners(), self.loaded_listeners))
+        except ValueError as e:
+            print(f"⚠️ No preview for {self.path.name}: {e}")
+            return {}
+    
+    def apply(self):
+        return self.writer.update_tool_config(self.NAME, self.pending_values(), self.validator,
+                                              self.pending_listeners(), self.loaded_listeners)
+    
+    def applied(self):
+        """The pending values are on disk now"""
+        self.shown = self.values()
+
+
+class HyprlockPage(ToolConfigPage):
+    """Lock screen settings in hyprlock.conf"""
+    
+    NAME = "hyprlock"
+    TITLE = "Lock Screen"
+    ICON = "system-lock-screen-symbolic"
+    SCHEMA = HYPRLOCK_SCHEMA
+    GROUPS = (
+        (" Behaviour", [
+            ('general:grace', "Grace Period", "Seconds after locking in which input unlocks without a password"),
+            ('general:hide_cursor', "Hide Cursor", "Hide the mouse pointer on the lock screen"),
+            ('general:ignore_empty_input', "Ignore Empty Input", "Do not try to unlock with an empty password"),
+            ('auth:fingerprint:enabled', "Fingerprint", "Also unlock with a fingerprint reader"),
+        ]),
+        (" Background", [
+            ('background:blur_passes', "Blur Passes", "0 turns the blur off"),
+            ('background:blur_size', "Blur Size", "Blur radius per pass"),
+        ]),
+        (" Password Field", [
+            ('input-field:placeholder_text', "Placeholder Text", None),
+            ('input-field:fail_text', "Failure Text", None),
+        ]),
+    )
+
+
+class HypridlePage(ToolConfigPage):
+    """Idle timeouts and sleep hooks in hypridle.conf"""
+    
+    NAME = "hypridle"
+    TITLE = "Idle & Sleep"
+    ICON = "preferences-desktop-screensaver-symbolic"
+    SCHEMA = HYPRIDLE_SCHEMA
+    GROUPS = (
+        (" Commands", [
+            ('general:lock_cmd', "Lock Command", None),
+            ('general:before_sleep_cmd', "Before Sleep", None),
+            ('general:after_sleep_cmd', "After Sleep", None),
+            ('general:ignore_dbus_inhibit', "Ignore Inhibitors",
+             "Go idle even while apps such as video players ask to stay awake"),
+        ]),
+    )
+    
+    def _create_ui(self):
+        super()._create_ui()
+        self.listeners = []
+        self.shown_listeners = []
+        self.listeners_group = Adw.PreferencesGroup()
+        self.listeners_group.set_title(" Idle Listeners")
+        self.listeners_group.set_description("Commands run after a stretch of inactivity, and on resume")
+        add_button = Gtk.Button.new_from_icon_name("list-add-symbolic")
+        add_button.add_css_class("flat")
+        add_button.set_tooltip_text("Add listener")
+        add_button.connect("clicked", lambda b: self._add_listener({'timeout': 300}, expanded=True))
+        self.listeners_group.set_header_suffix(add_button)
+        self.add(self.listeners_group)
+    
+    def _on_loaded(self, document):
+        for listener in self.listeners:
+            self.listeners_group.remove(listener['row'])
+        self.listeners = []
+        existing = idle_listeners(document)
+        self.loaded_listeners = [listener_source(nodes) for _, nodes in existing]
+        for index, (block, nodes) in enumerate(existing):
+            values = {'index': index}
+            for key, spec in IDLE_LISTENER_SCHEMA.items():
+                if key in nodes:
+                    try:
+                        values[key] = parse_config_value(nodes[key].value, spec['type'])
+                    except ValueError as e:
+                        print(f"⚠️ Ignoring {key} of the listener on line {nodes[key].line}: {e}")
+            self._add_listener(values)
+        self.shown_listeners = self.listener_values()
+    
+    def _add_listener(self, values, expanded=False):
+        row = Adw.ExpanderRow()
+        row.set_expanded(expanded)
+        timeout = Adw.SpinRow()
+        timeout.set_title("After (seconds)")
+        timeout.set_adjustment(Gtk.Adjustment(lower=1, upper=86400, step_increment=30,
+                                              value=values.get('timeout', 300)))
+        on_timeout = Adw.EntryRow()
+        on_timeout.set_title("Run")
+        on_timeout.set_text(values.get('on-timeout', ''))
+        on_resume = Adw.EntryRow()
+        on_resume.set_title("On resume")
+        on_resume.set_text(values.get('on-resume', ''))
+        for child in (timeout, on_timeout, on_resume):
+            row.add_row(child)
+        
+        listener = {'index': values.get('index'), 'row': row, 'timeout': timeout,
+                    'on-timeout': on_timeout, 'on-resume': on_resume}
+        remove_button = Gtk.Button.new_from_icon_name("user-trash-symbolic")
+        remove_button.add_css_class("flat")
+        remove_button.set_valign(Gtk.Align.CENTER)
+        remove_button.set_tooltip_text("Remove listener")
+        remove_button.connect("clicked", lambda b: self._remove_listener(listener))
+        row.add_suffix(remove_button)
+        
+        timeout.connect("changed", lambda w: self._update_listener_title(listener))
+        on_timeout.connect("changed", lambda w: self._update_listener_title(listener))
+        on_resume.connect("changed", lambda w: self._on_changed())
+        self.listeners.append(listener)
+        self.listeners_group.add(row)
+        self._update_listener_title(listener)
+    
+    def _remove_listener(self, listener):
+        self.listeners.remove(listener)
+        self.listeners_group.remove(listener['row'])
+        self._on_changed()
+    
+    def _update_listener_title(self, listener):
+        listener['row'].set_title(f"After {int(listener['timeout'].get_value())} s")
+        listener['row'].set_subtitle(listener['on-timeout'].get_text() or "No command")
+        self._on_changed()
+    
+    def listener_values(self):
+        return [
+            {'index': listener['index'], 'timeout': int(listener['timeout'].get_value()),
+             'on-timeout': listener['on-timeout'].get_text().strip(),
+             'on-resume': listener['on-resume'].get_text().strip()}
+            for listener in self.listeners
+        ]
+    
+    def pending_listeners(self):
+        if self._loading:
+            return None
+        listeners = self.listener_values()
+        return listeners if listeners != self.shown_listeners else None
+    
+    def applied(self):
+        """Re-read the listeners so new blocks get their index, then restart hypridle"""
+        super().applied()
+        self._loading = True
+        self._on_loaded(HyprConfDocument.load(self.path))
+        self._loading = False
+        self.writer.restart_hypridle()
 
 
-class WindowAppearancePage(Adw.PreferencesPage):
-    """Window appearance and layout settings page"""
+class AutostartPage(Adw.PreferencesPage):
+    """exec-once/exec manager with a startup cost profiler
+    
+    The user's files are parsed on the config pool. Their entries can be
+    switched off (commented out), moved within their file, removed and
+    added; Omarchy's and the theme's are listed read-only. Profile asks
+    first, then dry-runs the user's enabled exec-once entries in the
+    profiler's sandbox on a worker thread and ranks them by time to ready.
+    Apply reaches the page through the page hooks.
+    """
+    
+    __gsignals__ = {
+        'pending-changed': (GObject.SignalFlags.RUN_FIRST, None, ()),
+    }
+    DESCRIPTION = "exec-once runs at login, exec on every reload; switched-off entries are commented out"
     
-    def __init__(self, parser, writer):
+    def __init__(self, parser, writer, files):
         super().__init__()
         self.parser = parser
         self.writer = writer
-        
-        self.set_title("Window Appearance")
-        self.set_icon_name("view-grid-symbolic")
-        
-        self.settings = parser.parse_general_settings()
-        self.decoration_settings = parser.parse_decoration_settings()
-        
+        self.files = files
+        self.preview = PendingChanges(writer)
+        self.profiler = AutostartProfiler()
+        atexit.register(self.profiler.cancel)
+        self.target = writer.config_dir / "autostart.conf"
+        self.entries = []
+        self.shown = {}
+        self.results = {}
+        self.rows = []
+        self.cost_rows = []
+        self.profiling = False
+        
+        self.set_title("Autostart")
+        self.set_icon_name("system-run-symbolic")
         self._create_ui()
+        self._load()
     
     def _create_ui(self):
-        border_group = Adw.PreferencesGroup()
-        border_group.set_title(" Window Borders")
-        border_group.set_description("Customize window frames")
-        
-        border_size = Adw.SpinRow()
-        border_size.set_title("Border Thickness")
-        border_size.set_subtitle("Width of window borders (0-10 pixels)")
-        border_size.set_adjustment(Gtk.Adjustment(
-            lower=0, upper=10, step_increment=1,
-            value=self.settings.get('border_size', 2)
-        ))
-        border_size.connect("changed", lambda w: self._on_general_setting_changed('border_size', int(w.get_value())))
-        border_group.add(border_size)
-        
-        rounding = Adw.SpinRow()
-        rounding.set_title("Corner Rounding")
-        rounding.set_subtitle("Radius of rounded corners (0-40 pixels)")
-        rounding.set_adjustment(Gtk.Adjustment(
-            lower=0, upper=40, step_increment=1,
-            value=self.decoration_settings.get('rounding', 20)
-        ))
-        rounding.connect("changed", lambda w: self._on_decoration_setting_changed('rounding', int(w.get_value())))
-        border_group.add(rounding)
-        
-        self.add(border_group)
-        
-        gaps_group = Adw.PreferencesGroup()
-        gaps_group.set_title(" Window Spacing")
-        gaps_group.set_description("Configure gaps between windows")
-        
-        gaps_in = Adw.SpinRow()
-        gaps_in.set_title("Inner Gaps")
-        gaps_in.set_subtitle("Space between windows (0-30 pixels)")
-        gaps_in.set_adjustment(Gtk.Adjustment(
-            lower=0, upper=30, step_increment=1,
-            value=self.settings.get('gaps_in', 5)
-        ))
-        gaps_in.connect("changed", lambda w: self._on_general_setting_changed('gaps_in', int(w.get_value())))
-        gaps_group.add(gaps_in)
-        
-        gaps_out = Adw.SpinRow()
-        gaps_out.set_title("Outer Gaps")
-        gaps_out.set_subtitle("Space from screen edges (0-30 pixels)")
-        gaps_out.set_adjustment(Gtk.Adjustment(
-            lower=0, upper=30, step_increment=1,
-            value=self.settings.get('gaps_out', 10)
-        ))
-        gaps_out.connect("changed", lambda w: self._on_general_setting_changed('gaps_out', int(w.get_value())))
-        gaps_group.add(gaps_out)
-        
-        self.add(gaps_group)
-        
-        anim_group = Adw.PreferencesGroup()
-        anim_group.set_title(" Animations")
-        anim_group.set_description("Window motion effects")
-        
-        anim_settings = self.parser.parse_animations_settings()
-        
-        enable_anim = Adw.SwitchRow()
-        enable_anim.set_title("Enable Animations")
-        enable_anim.set_subtitle("Smooth window transitions")
-        enable_anim.set_active(anim_settings.get('animations_enabled', True))
-        anim_group.add(enable_anim)
-        
-        self.add(anim_group)
+        self.user_group = Adw.PreferencesGroup()
+        self.user_group.set_title(" Your Programs")
+        self.user_group.set_description(self.DESCRIPTION)
+        self.add_row = Adw.EntryRow()
+        self.add_row.set_title(f"New exec-once command, added to {self.target.name}")
+        self.add_row.set_show_apply_button(True)
+        self.add_row.set_sensitive(False)
+        self.add_row.connect("apply", self._on_entry_added)
+        self.user_group.add(self.add_row)
+        self.reload_button = Gtk.Button(label="Reload")
+        self.reload_button.add_css_class("flat")
+        self.reload_button.set_tooltip_text("Read the files again; edits not yet applied are lost")
+        self.reload_button.set_visible(False)
+        self.reload_button.connect("clicked", self._on_reload)
+        self.user_group.set_header_suffix(self.reload_button)
+        self.add(self.user_group)
+        
+        self.system_group = Adw.PreferencesGroup()
+        self.system_group.set_title(" From Omarchy and the Theme")
+        self.system_group.set_description("Read-only; edit them by overriding in your own files")
+        self.add(self.system_group)
+        
+        self.cost_group = Adw.PreferencesGroup()
+        self.cost_group.set_title(" Startup Cost")
+        self.cost_group.set_description(
+            "Profile starts each of your enabled exec-once entries on its own, away from this "
+            "session, measures it and stops it again")
+        self.profile_button = Gtk.Button(label="Profile")
+        self.profile_button.add_css_class("flat")
+        self.profile_button.connect("clicked", self._on_profile)
+        self.cost_group.set_header_suffix(self.profile_button)
+        self.add(self.cost_group)
+    
+    def _load(self):
+        """Parse the user's files on the pool; the rows fill in once all arrived"""
+        paths = [path for layer, path in self.parser.layers.files() if layer == 'user']
+        documents = {}
+        
+        def arrived(document, path):
+            documents[path] = document
+            if len(documents) == len(paths):
+                self._on_documents(documents)
+        
+        if not paths:
+            self._on_documents(documents)
+        for path in paths:
+            self.files.get(path, functools.partial(arrived, path=path))
+    
+    def _on_documents(self, documents):
+        with tracer.span('page.autostart.load', 'ui'):
+            self.entries = read_autostart(self.parser.layers, documents)
+        self.shown = self._wanted()
+        self.add_row.set_sensitive(True)
+        self._show_entries()
+    
+    @staticmethod
+    def _user_entry(entry):
+        return {key: entry[key] for key in ('line', 'keyword', 'command', 'enabled')}
+    
+    def _wanted(self):
+        """{user file: [entry]} as the page currently has it"""
+        wanted = {}
+        for entry in self.entries:
+            if entry['layer'] == 'user':
+                wanted.setdefault(entry['file'], []).append(self._user_entry(entry))
+        return wanted
+    
+    def pending_files(self):
+        wanted = self._wanted()
+        return {path: wanted.get(path, []) for path in set(wanted) | set(self.shown)
+                if wanted.get(path, []) != self.shown.get(path, [])}
+    
+    def _show_entries(self):
+        for group, row in self.rows:
+            group.remove(row)
+        self.rows = []
+        for index, entry in enumerate(self.entries):
+            group = self.user_group if entry['layer'] == 'user' else self.system_group
+            row = self._create_entry_row(index, entry)
+            group.add(row)
+            self.rows.append((group, row))
+    
+    def _create_entry_row(self, index, entry):
+        row = Adw.ActionRow()
+        row.set_use_markup(False)
+        row.set_title(entry['command'])
+        where = f"{entry['file'].name}:{entry['line']}" if entry['line'] else f"{entry['file'].name}, new"
+        row.set_subtitle(f"{entry['keyword']} · {where}"
+                         + ("" if entry['layer'] == 'user' else f" ({entry['layer']})"))
+        cost = Gtk.Label()
+        cost.add_css_class("dim-label")
+        if entry['command'] in self.results:
+            cost.set_label(self.results[entry['command']]['describe'])
+        row.add_suffix(cost)
+        if entry['layer'] != 'user':
+            return row
+        
+        for icon, step, tooltip in (("go-up-symbolic", -1, "Start earlier"),
+                                    ("go-down-symbolic", 1, "Start later")):
+            button = Gtk.Button.new_from_icon_name(icon)
+            button.add_css_class("flat")
+            button.set_valign(Gtk.Align.CENTER)
+            button.set_tooltip_text(tooltip)
+            button.set_sensitive(self._neighbour(index, step) is not None)
+            button.connect("clicked", lambda b, step=step: self._on_entry_moved(entry, step))
+            row.add_suffix(button)
+        switch = Gtk.Switch()
+        switch.set_valign(Gtk.Align.CENTER)
+        switch.set_active(entry['enabled'])
+        switch.set_tooltip_text("Run this entry")
+        switch.connect("notify::active", lambda w, pspec: self._on_entry_toggled(entry, w.get_active()))
+        row.add_suffix(switch)
+        delete = Gtk.Button.new_from_icon_name("user-trash-symbolic")
+        delete.add_css_class("flat")
+        delete.set_valign(Gtk.Align.CENTER)
+        delete.set_tooltip_text("Remove this entry")
+        delete.connect("clicked", lambda b: self._on_entry_removed(entry))
+        row.add_suffix(delete)
+        return row
+    
+    def _neighbour(self, index, step):
+        """Index of the next entry in the same file in direction step, if any"""
+        file = self.entries[index]['file']
+        other = index + step
+        while 0 <= other < len(self.entries):
+            if self.entries[other]['file'] == file:
+                return other
+            other += step
+        return None
+    
+    def _on_entry_moved(self, entry, step):
+        index = self.entries.index(entry)
+        other = self._neighbour(index, step)
+        if other is None:
+            return
+        self.entries[index], self.entries[other] = self.entries[other], self.entries[index]
+        self._show_entries()
+        self.emit('pending-changed')
+    
+    def _on_entry_toggled(self, entry, active):
+        entry['enabled'] = active
+        self.emit('pending-changed')
+    
+    def _on_entry_removed(self, entry):
+        self.entries.remove(entry)
+        self._show_entries()
+        self.emit('pending-changed')
+    
+    def _on_entry_added(self, entry_row):
+        command = entry_row.get_text().strip()
+        if not command:
+            return
+        self.entries.append({'layer': 'user', 'file': self.target, 'line': None,
+                             'keyword': 'exec-once', 'command': command, 'enabled': True})
+        entry_row.set_text("")
+        self._show_entries()
+        self.emit('pending-changed')
+    
+    def pending_paths(self):
+        return list(self.pending_files())
+    
+    def _loaded(self):
+        """{user file: autostart_source()} as the page read the files"""
+        return {path: [(entry['line'], entry['keyword'], entry['command'], entry['enabled'])
+                       for entry in entries if entry['line'] is not None]
+                for path, entries in self.shown.items()}
+    
+    def pending_diffs(self):
+        diffs = {}
+        loaded = self._loaded()
+        for path, entries in self.pending_files().items():
+            try:
+                diffs.update(self.preview.preview(path, functools.partial(
+                    self.writer.plan_autostart, entries=entries, loaded=loaded.get(path, []))))
+            except ValueError as e:
+                print(f"⚠️ No preview for {Path(path).name}: {e}")
+        return diffs
+    
+    def apply(self):
+        loaded = self._loaded()
+        if self.writer.update_autostart(self.pending_files(), loaded):
+            return True
+        for path in self.pending_files():
+            try:
+                current = autostart_source(HyprConfDocument.load(path)) if Path(path).exists() else []
+            except (OSError, UnicodeDecodeError):
+                continue
+            if current != loaded.get(path, []):
+                self.user_group.set_description(
+                    f"{Path(path).name} was changed by another program; reload to see its "
+                    "version before editing")
+                self.reload_button.set_visible(True)
+                break
+        return False
+    
+    def _on_reload(self, button):
+        button.set_visible(False)
+        self.user_group.set_description(self.DESCRIPTION)
+        self.add_row.set_sensitive(False)
+        self.files.parse(path for layer, path in self.parser.layers.files() if layer == 'user')
+        self._load()
+        self.emit('pending-changed')
+    
+    def applied(self):
+        """The files changed; parse them again so line numbers are current"""
+        self.add_row.set_sensitive(False)
+        self.files.parse(path for path in self.pending_files())
+        self._load()
+    
+    def _on_profile(self, button):
+        commands = AutostartProfiler.commands(self.entries)
+        if self.profiling:
+            return
+        if not commands:
+            self.cost_group.set_description("None of your own exec-once entries is switched on")
+            return
+        dialog = Adw.MessageDialog(
+            transient_for=self.get_root(), heading=f"Run {len(commands)} autostart commands?",
+            body="Each one runs on its own for up to "
+                 f"{self.profiler.timeout:.0f} seconds, without access to Hyprland, the session "
+                 "bus or your display, and is stopped afterwards. Files it writes stay written.\n\n"
+                 + "\n".join(commands))
+        dialog.add_response('cancel', "Cancel")
+        dialog.add_response('profile', "Profile")
+        dialog.set_response_appearance('profile', Adw.ResponseAppearance.SUGGESTED)
+        dialog.set_default_response('cancel')
+        dialog.connect("response", self._on_profile_response, commands)
+        dialog.present()
+    
+    def _on_profile_response(self, dialog, response, commands):
+        if response != 'profile' or self.profiling:
+            return
+        self.profiling = True
+        self.results = {}
+        self.profile_button.set_sensitive(False)
+        self.cost_group.set_description(f"Profiling 1 of {len(commands)}: {commands[0]}")
+        threading.Thread(target=self._profile_worker, args=(commands,), daemon=True).start()
+    
+    def _profile_worker(self, commands):
+        """Runs on a worker thread; every result is handed to the main loop"""
+        with self.profiler.sandbox():
+            for index, command in enumerate(commands):
+                if self.profiler.cancelled.is_set():
+                    break
+                result = self.profiler.profile(command)
+                GLib.idle_add(self._on_profiled, index, commands, result)
+        GLib.idle_add(self._on_profiling_done)
+    
+    def _on_profiled(self, index, commands, result):
+        result['describe'] = AutostartProfiler.describe(result)
+        self.results[result['command']] = result
+        if index + 1 < len(commands):
+            self.cost_group.set_description(
+                f"Profiling {index + 2} of {len(commands)}: {commands[index + 1]}")
+        self._show_entries()
+        return GLib.SOURCE_REMOVE
+    
+    def _on_profiling_done(self):
+        self.profiling = False
+        self.profile_button.set_sensitive(True)
+        for row in self.cost_rows:
+            self.cost_group.remove(row)
+        self.cost_rows = []
+        ranked = AutostartProfiler.ranked(list(self.results.values()))
+        total = sum(result['ready_ms'] or 0 for result in ranked) / 1000
+        self.cost_group.set_description(
+            f"{len(ranked)} entries took {total:.1f} s to get ready one after another; "
+            "at login they start together and share the CPU")
+        for rank, result in enumerate(ranked, 1):
+            row = Adw.ActionRow()
+            row.set_use_markup(False)
+            row.set_title(f"{rank}. {result['command']}")
+            row.set_subtitle(result['describe'])
+            share = Gtk.Label(label=f"{result['share']:.0%}")
+            share.add_css_class("dim-label")
+            row.add_suffix(share)
+            self.cost_group.add(row)
+            self.cost_rows.append(row)
+        return GLib.SOURCE_REMOVE
+
+
+
+class ThemeGalleryPage(Gtk.ScrolledWindow):
+    """Grid of installed Omarchy themes; activating one switches to it
+    
+    The theme directories are scanned on first show. Tiles are recycled by
+    the grid and ask for their thumbnail only when bound, so only visible
+    themes ever touch the thumbnail cache.
+    """
+    
+    def __init__(self, writer, themes=None, thumbnails=None):
+        super().__init__()
+        self.writer = writer
+        self.themes = themes or OmarchyThemes()
+        self.thumbnails = thumbnails or ThemeThumbnailCache()
+        self.loaded = False
+        self.model = Gio.ListStore(item_type=ThemeItem)
+        
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self._on_setup)
+        factory.connect("bind", self._on_bind)
+        factory.connect("unbind", self._on_unbind)
+        
+        self.grid = Gtk.GridView(model=Gtk.SingleSelection(model=self.model), factory=factory)
+        self.grid.set_max_columns(6)
+        self.grid.set_single_click_activate(True)
+        self.grid.connect("activate", self._on_activate)
+        self.grid.add_css_class("theme-grid")
+        self.set_child(self.grid)
+        # GTK4 skips "destroy" for hidden-on-close windows, but hiding still
+        # unmaps the page, so the workers stop whenever it leaves the screen
+        self.connect("map", self._on_map)
+        self.connect("unmap", lambda w: self.thumbnails.shutdown())
+    
+    def _on_map(self, widget):
+        self.ensure_loaded()
+        self.thumbnails.resume()
+    
+    def ensure_loaded(self):
+        if self.loaded:
+            return
+        self.loaded = True
+        with tracer.span('page.themes.load', 'ui'):
+            current = self.themes.current()
+            self.model.splice(0, 0, [ThemeItem(theme, theme['name'] == current)
+                                     for theme in self.themes.scan()])
+    
+    def _on_setup(self, factory, list_item):
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
+        box.add_css_class("theme-tile")
+        picture = Gtk.Picture()
+        picture.set_size_request(ThemeThumbnailCache.WIDTH, ThemeThumbnailCache.HEIGHT)
+        picture.set_content_fit(Gtk.ContentFit.COVER)
+        label = Gtk.Label()
+        box.append(picture)
+        box.append(label)
+        box.picture = picture
+        box.label = label
+        box.source = None
+        list_item.set_child(box)
+    
+    def _on_bind(self, factory, list_item):
+        box = list_item.get_child()
+        item = list_item.get_item()
+        box.label.set_label(f"✓ {item.theme['name']}" if item.current else item.theme['name'])
+        box.picture.set_paintable(None)
+        box.source = item.theme['preview']
+        if box.source is None:
+            return
+        
+        def show(path, source=box.source):
+            if path is not None and box.source == source:
+                box.picture.set_filename(str(path))
+        
+        self.thumbnails.request(box.source, show)
+    
+    def _on_unbind(self, factory, list_item):
+        list_item.get_child().source = None
+    
+    def _on_activate(self, grid, position):
+        item = self.model.get_item(position)
+        if item.current:
+            return
+        try:
+            self.themes.switch(item.theme, self.writer)
+        except OSError as e:
+            print(f"⚠️ Could not switch theme: {e}")
+            return
+        for index in range(self.model.get_n_items()):
+            other = self.model.get_item(index)
+            if other.current or other is item:
+                other.current = other is item
+                self.model.items_changed(index, 1, 1)
+
+
+
+class PendingChangesPanel(Gtk.Revealer):
+    """Side panel with the unified diff Apply would write
+    
+    It re-diffs when revealed, and while revealed whenever the settings
+    model changes or a page emits pending-changed; edits in the same
+    main-loop iteration share one refresh. The text is only replaced when
+    the diff actually changed.
+    """
+    
+    def __init__(self, collect):
+        super().__init__()
+        self.collect = collect
+        self.text = None
+        self._refresh_source = 0
+        self.set_transition_type(Gtk.RevealerTransitionType.SLIDE_LEFT)
+        
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
+        box.set_size_request(420, -1)
+        box.add_css_class("pending-changes")
+        
+        title = Gtk.Label(label="Review changes", xalign=0)
+        title.add_css_class("title-4")
+        title.set_margin_top(12)
+        title.set_margin_start(12)
+        box.append(title)
+        
+        self.buffer = Gtk.TextBuffer()
+        for name, color in (('added', '#8ff0a4'), ('removed', '#f66151'), ('hunk', '#99c1f1')):
+            self.buffer.create_tag(name, foreground=color)
+        self.buffer.create_tag('file', weight=Pango.Weight.BOLD)
+        view = Gtk.TextView(buffer=self.buffer, editable=False, monospace=True, cursor_visible=False)
+        view.set_left_margin(12)
+        view.set_right_margin(12)
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_vexpand(True)
+        scrolled.set_child(view)
+        box.append(scrolled)
+        self.set_child(box)
+        self.connect("notify::reveal-child", self._on_revealed)
+    
+    def _on_revealed(self, revealer, _):
+        if self.get_reveal_child():
+            self.refresh()
+    
+    def queue_refresh(self):
+        """Re-diff once on the next idle if the panel is open"""
+        if self.get_reveal_child() and not self._refresh_source:
+            self._refresh_source = GLib.idle_add(self.refresh)
+    
+    def refresh(self):
+        self._refresh_source = 0
+        try:
+            diffs = self.collect()
+        except Exception as e:
+            diffs = {'': f"Could not compute changes: {e}\n"}
+        text = ''.join(diffs.values()) or "No pending changes\n"
+        if text != self.text:
+            self.text = text
+            self._show(text)
+        return GLib.SOURCE_REMOVE
+    
+    def _show(self, text):
+        self.buffer.set_text('')
+        for line in text.splitlines():
+            if line.startswith(('---', '+++')):
+                tag = 'file'
+            elif line.startswith('@@'):
+                tag = 'hunk'
+            elif line.startswith('+'):
+                tag = 'added'
+            elif line.startswith('-'):
+                tag = 'removed'
+            else:
+                tag = None
+            end = self.buffer.get_end_iter()
+            if tag:
+                self.buffer.insert_with_tags_by_name(end, line + '\n', tag)
+            else:
+                self.buffer.insert(end, line + '\n')
+
+
+
+class PageSpec:
+    """Sidebar entry for a settings page, described without importing it
+    
+    loader returns the page factory; it only runs when the page is first
+    shown (or at startup for eager built-ins). The factory is called with
+    the settings window and returns the page widget.
+    """
+    
+    __slots__ = ('name', 'title', 'label', 'loader', 'order', 'source', 'eager')
+    
+    def __init__(self, name, title, loader, label=None, order=500, source='builtin', eager=False):
+        self.name = name
+        self.title = title
+        self.label = label or f" {title}"
+        self.loader = loader
+        self.order = order
+        self.source = source
+        self.eager = eager
+    
+    @property
+    def builtin(self):
+        return self.source == 'builtin'
     
-    def _on_general_setting_changed(self, setting_name, value):
-        """Handle general setting changes"""
-        self.settings[setting_name] = value
-        print(f"⚙️ Setting changed: {setting_name} = {value}")
+    def __repr__(self):
+        return f"<PageSpec {self.name} from {self.source}>"
+
+
+def _load_plugin_file(path, attribute):
+    """Import one plugin module from the plugin directory and fetch its factory"""
+    spec = importlib.util.spec_from_file_location(f"omarchy_settings_plugins.{path.stem}", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return getattr(module, attribute)
+
+
+class PageRegistry:
+    """Settings pages: the built-in ones plus third-party plugins
+    
+    Plugins are found through the 'omarchy_settings.pages' entry point
+    group (name = page id, value = module:factory) and through JSON
+    manifests in the plugin directory, for example hyprlock.json:
+    
+        {"title": "Lock Screen", "entry": "hyprlock.py:HyprlockPage", "order": 150}
+    
+    Discovery only reads metadata; no plugin code is imported until its
+    page is opened. A plugin page may define pending_paths() (files its
+    apply() will write), apply() -> bool and applied(), and then takes
+    part in Apply and its rollback like the built-in pages.
+    """
+    
+    ENTRY_POINT_GROUP = 'omarchy_settings.pages'
     
-    def _on_decoration_setting_changed(self, setting_name, value):
-        """Handle decoration setting changes"""
-        self.decoration_settings[setting_name] = value
-        print(f"⚙️ Setting changed: {setting_name} = {value}")
+    def __init__(self, plugin_dir=None):
+        self.plugin_dir = Path(plugin_dir) if plugin_dir else self.default_plugin_dir()
+        self.specs = {}
+    
+    @staticmethod
+    def default_plugin_dir():
+        """Plugin manifests, overridable with OMARCHY_PLUGIN_DIR"""
+        override = os.environ.get('OMARCHY_PLUGIN_DIR')
+        if override:
+            return Path(override).expanduser()
+        base = os.environ.get('XDG_DATA_HOME') or str(Path.home() / ".local" / "share")
+        return Path(base) / "omarchy-settings" / "plugins"
+    
+    def register(self, spec):
+        """Add a page; a later registration with the same name is ignored"""
+        if spec.name in self.specs:
+            print(f"⚠️ Page {spec.name} from {spec.source} clashes with {self.specs[spec.name].source}, skipped")
+            return
+        self.specs[spec.name] = spec
+    
+    @tracer.traced('pages.discover', 'app')
+    def discover(self):
+        """Register every installed plugin page from its metadata alone"""
+        try:
+            entry_points = importlib.metadata.entry_points(group=self.ENTRY_POINT_GROUP)
+        except Exception as e:
+            print(f"⚠️ Could not list plugin entry points: {e}")
+            entry_points = ()
+        for entry_point in entry_points:
+            self.register(PageSpec(
+                entry_point.name, entry_point.name.replace('_', ' ').title(), entry_point.load,
+                source=f"entry point {entry_point.value}"
+            ))
+        
+        if self.plugin_dir.is_dir():
+            for manifest in sorted(self.plugin_dir.glob('*.json')):
+                try:
+                    data = json.loads(manifest.read_text())
+                    file_name, _, attribute = data['entry'].partition(':')
+                    self.register(PageSpec(
+                        manifest.stem, data.get('title') or manifest.stem.title(),
+                        functools.partial(_load_plugin_file, manifest.parent / file_name, attribute),
+                        label=data.get('label'), order=int(data.get('order', 500)),
+                        source=str(manifest)
+                    ))
+                except (OSError, ValueError, KeyError, TypeError) as e:
+                    print(f"⚠️ Ignoring plugin manifest {manifest.name}: {e}")
+        return self
+    
+    def pages(self):
+        """Every page in sidebar order"""
+        return sorted(self.specs.values(), key=lambda spec: spec.order)
+
+
+BUILTIN_PAGES = (
+    PageSpec("language", "Language & Input", lambda: lambda window: LanguageInputPage(
+        window.parser, window.writer, window.model, window.get_application().devices
+    ), label=" Language / input", order=10, eager=True),
+    PageSpec("blur", "Blur & Glass", lambda: lambda window: BlurEffectsPage(
+        window.parser, window.writer, window.model
+    ), label=" Blur/Glass", order=20, eager=True),
+    PageSpec("appearance", "Window Appearance", lambda: lambda window: WindowAppearancePage(
+        window.parser, window.writer, window.model
+    ), order=30, eager=True),
+    PageSpec("displays", "Displays", lambda: lambda window: DisplaysPage(
+        window.parser, window.writer, window.get_application().monitors
+    ), order=40, eager=True),
+    PageSpec("rules", "Window Rules", lambda: lambda window: WindowRulesPage(
+        window.parser, window.get_application().clients
+    ), order=50, eager=True),
+    PageSpec("lock", "Lock Screen", lambda: lambda window: HyprlockPage(window.writer, window.files),
+             order=52),
+    PageSpec("idle", "Idle & Sleep", lambda: lambda window: HypridlePage(window.writer, window.files),
+             order=54),
+    PageSpec("autostart", "Autostart", lambda: lambda window: AutostartPage(
+        window.parser, window.writer, window.files
+    ), order=56),
+    PageSpec("options", "Hyprland Options", lambda: lambda window: HyprlandOptionsPage(
+        window.parser, window.writer, window.get_application().catalog
+    ), order=60, eager=True),
+    PageSpec("themes", "Themes", lambda: lambda window: ThemeGalleryPage(window.writer),
+             order=70, eager=True),
+)
 
 
 
@@ -952,9 +6658,16 @@ class OmarchySettingsWindow(Adw.ApplicationWindow):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         
-        self.config_path = Path.home() / ".config" / "hypr"
-        self.parser = OmarchyConfigParser(self.config_path)
-        self.writer = OmarchyConfigWriter(self.config_path)
+        app = self.get_application()
+        self.files = app.files
+        self.files.parse(app.config_dir / f"{page.NAME}.conf" for page in (HyprlockPage, HypridlePage))
+        self.store = app.store
+        self.config_path = self.store.config_dir
+        self.parser = self.store.parser
+        self.writer = self.store.writer
+        self.layers = self.parser.layers
+        self.page_registry = self.get_application().pages
+        self.model = OmarchySettingsModel(self.store.values)
         
         self.set_default_size(1100, 750)
         self.set_title("Omarchy Settings")
@@ -970,8 +6683,149 @@ class OmarchySettingsWindow(Adw.ApplicationWindow):
         self.toast_overlay = Adw.ToastOverlay()
         self.main_box.append(self.toast_overlay)
         
-        self._setup_navigation()
+        with tracer.span('window.setup_navigation', 'ui'):
+            self._setup_navigation()
+        self.reset_buttons = {}
+        self._setup_provenance()
         
+        self.events = self.get_application().events
+        self.events.subscribe('activelayout', self.language_page.on_active_layout)
+        self.store.subscribe(self._on_store_changed)
+        self.model.connect("changed", self._on_model_changed)
+        
+        self.apply_transaction = None
+    
+    def _setting_widgets(self):
+        widgets = {}
+        for page in (self.language_page, self.blur_page, self.appearance_page):
+            widgets.update(page.widgets)
+        return widgets
+    
+    def _setup_provenance(self):
+        """Give every setting row a reset button for its Omarchy default"""
+        for key, widget in self._setting_widgets().items():
+            row = widget if isinstance(widget, Adw.ActionRow) else widget.get_ancestor(Adw.ActionRow)
+            if row is None:
+                continue
+            button = Gtk.Button.new_from_icon_name("edit-undo-symbolic")
+            button.add_css_class("flat")
+            button.set_valign(Gtk.Align.CENTER)
+            button.connect("clicked", self._on_reset_clicked, key)
+            row.add_suffix(button)
+            self.reset_buttons[key] = button
+            self._update_provenance(key)
+    
+    def _default_value(self, key):
+        """Typed value of a setting in the layers below the user's files"""
+        spec = SETTINGS_SCHEMA[key]
+        default = self.layers.default(spec['path'])
+        if default is None:
+            return None, None
+        try:
+            return parse_config_value(default.value, spec.get('type')), default
+        except ValueError:
+            return None, default
+    
+    def _update_provenance(self, key):
+        """Show the reset button only while the user overrides the default"""
+        button = self.reset_buttons.get(key)
+        if button is None:
+            return
+        value, default = self._default_value(key)
+        overrides = self.layers.overrides(SETTINGS_SCHEMA[key]['path'])
+        overridden = False
+        if value is not None and key not in self.model.resets():
+            edited = self.model.get_value(key) != OmarchySettingsModel._coerce(key, value)
+            overridden = bool(overrides) or edited
+        button.set_visible(overridden)
+        if overridden:
+            where = f"set in {overrides[-1].location}" if overrides else "edited"
+            button.set_tooltip_text(
+                f"Reset to {default.layer} value {default.value} ({default.location}); {where}")
+    
+    def _on_reset_clicked(self, button, key):
+        value, _ = self._default_value(key)
+        if value is not None:
+            self.model.reset(key, value)
+    
+    def _reset_removals(self):
+        """{file: [keys]} of the user overrides the pending resets delete"""
+        removals = {}
+        for key in self.model.resets():
+            for value in self.layers.overrides(SETTINGS_SCHEMA[key]['path']):
+                paths = removals.setdefault(value.file, [])
+                if value.path not in paths:
+                    paths.append(value.path)
+        return removals
+    
+    def _on_model_changed(self, model, changes):
+        """One batch per main-loop iteration of edited settings"""
+        widgets = self._setting_widgets()
+        for key, value in changes.items():
+            print(f"⚙️ Setting changed: {key} = {value}")
+            if key in widgets:
+                mark_setting_widget(widgets[key], settings_validator.validate(key, value))
+            self._update_provenance(key)
+        self.review_panel.queue_refresh()
+    
+    def _collect_pending_diffs(self):
+        """Diff every page's pending values against the files on disk"""
+        settings = self.model.changes()
+        curves = None
+        if self.appearance_page.curves_changed:
+            curves = (self.appearance_page.beziers, self.appearance_page.animations)
+        diffs = self.pending_changes.refresh(settings, self.options_page.pending, curves,
+                                             self.displays_page.pending_monitors.values(),
+                                             self._reset_removals(),
+                                             self.language_page.pending_devices,
+                                             (self.rules_page.pending_edits,
+                                              self.rules_page.pending_additions))
+        for spec, page in self._hooked_pages():
+            if hasattr(page, 'pending_diffs'):
+                diffs.update(page.pending_diffs())
+        return diffs
+    
+    def _validate_pages(self):
+        """Check the values about to be written; untouched settings never block Apply"""
+        errors = settings_validator.validate_all(self.model.changes())
+        widgets = self._setting_widgets()
+        for key, error in errors.items():
+            if key in widgets:
+                mark_setting_widget(widgets[key], error)
+        return errors
+    
+    def _on_config_errors(self, data):
+        """Show errors Hyprland reported after an apply next to their rows"""
+        errors = [e for e in (data or []) if isinstance(e, str) and e.strip()]
+        if not errors:
+            return
+        documents = {}
+        widgets = self._setting_widgets()
+        for error in errors:
+            match = re.search(r'file (\S+) at line (\d+)', error)
+            if not match:
+                continue
+            path = match.group(1)
+            try:
+                document = documents.get(path) or HyprConfDocument.load(path)
+            except OSError:
+                continue
+            documents[path] = document
+            node = document.node_at_line(int(match.group(2)))
+            key = SCHEMA_KEYS_BY_PATH.get(node.path) if node is not None else None
+            if key in widgets:
+                mark_setting_widget(widgets[key], error)
+        toast = Adw.Toast(title=f" Hyprland reported {len(errors)} config error(s): {errors[0][:80]}")
+        toast.set_timeout(6)
+        self.toast_overlay.add_toast(toast)
+    
+    def _on_store_changed(self, key, value):
+        """Settings changed elsewhere; bound widgets follow the model"""
+        if key in SETTINGS_SCHEMA:
+            self.model.load(key, value)
+            self._update_provenance(key)
+        
+    @tracer.traced('window.load_css', 'ui')
     def _apply_liquid_glass_style(self):
         """Apply the liquid glass CSS styling - SHADOW REMOVED"""
         css_provider = Gtk.CssProvider()
@@ -1146,6 +7000,45 @@ class OmarchySettingsWindow(Adw.ApplicationWindow):
         scrollbar slider:hover {
             background: rgba(255, 255, 255, 0.25);
         }
+        
+        .setting-row.error label {
+            color: #f66151;
+        }
+        
+        .pending-changes {
+            background: rgba(0, 0, 0, 0.25);
+            border-left: 1px solid rgba(255, 255, 255, 0.08);
+        }
+        
+        .theme-tile {
+            padding: 8px;
+            border-radius: 12px;
+        }
+        
+        .appearance-preview {
+            border-radius: 12px;
+        }
+        
+        .search-hit {
+            background: rgba(104, 116, 206, 0.30);
+            border-radius: 12px;
+        }
+        
+        .monitor-canvas {
+            background: rgba(255, 255, 255, 0.04);
+            border-radius: 16px;
+            border: 1px solid rgba(255, 255, 255, 0.1);
+        }
+        
+        .monitor-tile {
+            background: linear-gradient(135deg,
+                rgba(104, 116, 206, 0.45) 0%,
+                rgba(104, 116, 206, 0.25) 100%);
+            border: 1.5px solid rgba(104, 116, 206, 0.8);
+            border-radius: 8px;
+            color: white;
+            padding: 0;
+        }
         """
         
         css_provider.load_from_data(css.encode())
@@ -1169,12 +7062,37 @@ class OmarchySettingsWindow(Adw.ApplicationWindow):
         menu_button.set_menu_model(menu)
         header.pack_start(menu_button)
         
+        self.search_index = None
+        self.search_entry = Gtk.SearchEntry()
+        self.search_entry.set_placeholder_text("Search settings")
+        self.search_entry.set_size_request(320, -1)
+        self.search_entry.set_key_capture_widget(self)
+        self.search_entry.connect("search-changed", self._on_search_changed)
+        self.search_entry.connect("activate", self._on_search_activate)
+        self.search_entry.connect("stop-search", lambda e: self.search_popover.popdown())
+        header.set_title_widget(self.search_entry)
+        
+        self.search_results = Gtk.ListBox()
+        self.search_results.add_css_class("boxed-list")
+        self.search_results.set_selection_mode(Gtk.SelectionMode.NONE)
+        self.search_results.connect("row-activated", lambda box, row: self._open_search_result(row.entry))
+        self.search_popover = Gtk.Popover()
+        self.search_popover.set_child(self.search_results)
+        self.search_popover.set_autohide(False)
+        self.search_popover.set_has_arrow(False)
+        self.search_popover.set_parent(self.search_entry)
+        
         apply_btn = Gtk.Button(label=" Apply ")
         apply_btn.add_css_class("glass-button")
         apply_btn.add_css_class("suggested-action")
         apply_btn.connect("clicked", self._on_apply_settings)
         header.pack_end(apply_btn)
         
+        self.review_button = Gtk.ToggleButton()
+        self.review_button.set_icon_name("document-edit-symbolic")
+        self.review_button.set_tooltip_text("Review changes")
+        header.pack_end(self.review_button)
+        
         reload_btn = Gtk.Button()
         reload_btn.set_icon_name("view-refresh-symbolic")
         reload_btn.set_tooltip_text("Reload Hyprland")
@@ -1198,7 +7116,16 @@ class OmarchySettingsWindow(Adw.ApplicationWindow):
         
         self._add_pages()
         
-        split_view.set_content(self.view_stack)
+        self.pending_changes = PendingChanges(self.writer)
+        self.review_panel = PendingChangesPanel(self._collect_pending_diffs)
+        self.review_button.bind_property("active", self.review_panel, "reveal-child",
+                                         GObject.BindingFlags.DEFAULT)
+        content = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL)
+        self.view_stack.set_hexpand(True)
+        content.append(self.view_stack)
+        content.append(self.review_panel)
+        
+        split_view.set_content(content)
         self.toast_overlay.set_child(split_view)
     
     def _create_sidebar(self):
@@ -1235,11 +7162,7 @@ class OmarchySettingsWindow(Adw.ApplicationWindow):
         separator.set_margin_end(20)
         sidebar_box.append(separator)
         
-        nav_items = [
-            (" Language / input", "language"),
-            (" Blur/Glass", "blur"),
-            (" Window Appearance", "appearance"),
-        ]
+        nav_items = [(spec.label, spec.name) for spec in self.page_registry.pages()]
         
         self.nav_buttons = {}
         for label, page_name in nav_items:
@@ -1266,8 +7189,75 @@ class OmarchySettingsWindow(Adw.ApplicationWindow):
         
         return sidebar_box
     
+    def _build_search_index(self):
+        """Index the title, subtitle, key path and aliases of every setting row"""
+        index = SettingsSearchIndex()
+        for page_name, page in self._searchable_pages():
+            for key, widget in page.widgets.items():
+                row = widget if isinstance(widget, Adw.ActionRow) else widget.get_ancestor(Adw.ActionRow)
+                if row is None:
+                    continue
+                index.add(row.get_title(), row.get_subtitle(), key,
+                          SETTINGS_SCHEMA.get(key, {}).get('path', ''), page_name, row)
+            index.add(page.get_title(), '', '', '', page_name, None, ('page',))
+        for option in self.options_page.catalog.load():
+            title = option['name'].split(':')[-1].replace('_', ' ')
+            index.add(title, option['description'], option['name'], option['path'], "options")
+        return index
+    
+    def _searchable_pages(self):
+        return (
+            ("language", self.language_page),
+            ("blur", self.blur_page),
+            ("appearance", self.appearance_page),
+        )
+    
+    def _on_search_changed(self, entry):
+        if self.search_index is None:
+            with tracer.span('search.build_index', 'ui'):
+                self.search_index = self._build_search_index()
+        
+        child = self.search_results.get_first_child()
+        while child is not None:
+            self.search_results.remove(child)
+            child = self.search_results.get_first_child()
+        
+        query = entry.get_text()
+        results = self.search_index.search(query) if query.strip() else []
+        for result in results:
+            row = Adw.ActionRow()
+            row.set_title(result['title'])
+            row.set_subtitle(result['path'] or result['subtitle'])
+            row.set_activatable(True)
+            row.entry = result
+            self.search_results.append(row)
+        
+        if results:
+            self.search_popover.popup()
+        else:
+            self.search_popover.popdown()
+    
+    def _on_search_activate(self, entry):
+        first = self.search_results.get_row_at_index(0)
+        if first is not None:
+            self._open_search_result(first.entry)
+    
+    def _open_search_result(self, result):
+        """Jump to the page and row of a search result"""
+        self.search_popover.popdown()
+        self._switch_page(result['page'])
+        if result['page'] == "options":
+            self.options_page.show_option(result['path'])
+        target = result['target']
+        if target is not None:
+            target.grab_focus()
+            target.add_css_class("search-hit")
+            GLib.timeout_add(1500, lambda: target.remove_css_class("search-hit") or GLib.SOURCE_REMOVE)
+    
     def _switch_page(self, page_name):
         """Switch to a different page and update nav buttons"""
+        if page_name not in self.loaded_pages:
+            self._load_page(self.page_registry.specs[page_name])
         self.view_stack.set_visible_child_name(page_name)
         
         for name, btn in self.nav_buttons.items():
@@ -1277,72 +7267,153 @@ class OmarchySettingsWindow(Adw.ApplicationWindow):
                 btn.remove_css_class("active")
     
     def _add_pages(self):
-        """Add all configuration pages"""
-        self.language_page = LanguageInputPage(self.parser, self.writer)
-        self.view_stack.add_titled(
-            self.language_page, "language", "Language & Input"
-        )
-        
-        self.blur_page = BlurEffectsPage(self.parser, self.writer)
-        self.view_stack.add_titled(
-            self.blur_page, "blur", "Blur & Glass"
-        )
-        self.appearance_page = WindowAppearancePage(self.parser, self.writer)
-        self.view_stack.add_titled(
-            self.appearance_page, "appearance", "Window Appearance"
-        )
+        """Build the eager built-in pages; the rest are built when first shown"""
+        self.loaded_pages = {}
+        for spec in self.page_registry.pages():
+            if spec.eager:
+                self._load_page(spec)
+    
+    def _load_page(self, spec):
+        """Import and construct one page and add it to the view stack"""
+        with tracer.span(f'page.{spec.name}', 'ui'):
+            if spec.builtin:
+                page = spec.loader()(self)
+                setattr(self, f"{spec.name}_page", page)
+            else:
+                try:
+                    page = spec.loader()(self)
+                except Exception as e:
+                    print(f"⚠️ Plugin page {spec.name} ({spec.source}) failed to load: {e}")
+                    page = Adw.StatusPage(title=spec.title, description=f"This page failed to load: {e}",
+                                          icon_name="dialog-error-symbolic")
+        if GObject.signal_lookup('pending-changed', type(page)):
+            page.connect('pending-changed', lambda p: self.review_panel.queue_refresh())
+        self.loaded_pages[spec.name] = page
+        self.view_stack.add_titled(page, spec.name, spec.title)
+        return page
+    
+    def _hooked_pages(self):
+        """Loaded pages that take part in Apply through the page hooks"""
+        return [
+            (self.page_registry.specs[name], page) for name, page in self.loaded_pages.items()
+            if hasattr(page, 'apply') and hasattr(page, 'pending_paths')
+        ]
     
+    @tracer.traced('window.apply', 'app')
     def _on_apply_settings(self, button):
-        """Apply all settings to Hyprland configuration"""
-        success_count = 0
+        """Apply all settings, rolling back if Hyprland rejects them"""
         error_messages = []
         
-        try:
-            if hasattr(self.language_page, 'settings'):
-                if self.writer.update_input_settings(self.language_page.settings):
-                    success_count += 1
+        invalid = self._validate_pages()
+        if invalid:
+            details = ', '.join(f"{key} {error}" for key, error in invalid.items())
+            toast = Adw.Toast(title=f" Nothing applied, fix invalid settings first: {details}")
+            toast.set_timeout(5)
+            self.toast_overlay.add_toast(toast)
+            return
+        
+        if self.apply_transaction is not None and not self.apply_transaction.finished:
+            return
+        
+        def write():
+            changes = self.model.changes()
+            if changes:
+                for key, value in changes.items():
+                    self.store.set(key, value)
+                if self.store.apply():
+                    counts['settings'] = len(changes)
                 else:
-                    error_messages.append("Input settings")
-            if hasattr(self.blur_page, 'settings'):
-                if self.writer.update_blur_settings(self.blur_page.settings):
-                    success_count += 1
-                if self.writer.update_decoration_settings(self.blur_page.settings):
-                    success_count += 1
+                    error_messages.append("Settings")
+            removals = self._reset_removals()
+            if removals:
+                if self.writer.remove_assignments(removals):
+                    counts['resets'] = len(removals)
                 else:
-                    error_messages.append("Blur settings")
-            if hasattr(self.appearance_page, 'settings'):
-                if self.writer.update_general_settings(self.appearance_page.settings):
-                    success_count += 1
+                    error_messages.append("Reset to defaults")
+            if self.appearance_page.curves_changed:
+                if self.writer.update_animation_curves(self.appearance_page.beziers,
+                                                       self.appearance_page.animations):
+                    counts['curves'] = 1
                 else:
-                    error_messages.append("General settings")
-            
-            if hasattr(self.appearance_page, 'decoration_settings'):
-                if self.writer.update_decoration_settings(self.appearance_page.decoration_settings):
-                    success_count += 1
-            if error_messages:
-                toast = Adw.Toast(title=f" Applied {success_count} settings, failed: {', '.join(error_messages)}")
-                toast.set_timeout(4)
-            else:
+                    error_messages.append("Animation curves")
+            if self.options_page.pending:
+                if self.writer.update_options(self.options_page.pending, self.options_page.validator):
+                    counts['options'] = 1
+                else:
+                    error_messages.append("Hyprland options")
+            if self.displays_page.pending_monitors:
+                if self.writer.update_monitors(self.displays_page.pending_monitors.values()):
+                    counts['monitors'] = 1
+                else:
+                    error_messages.append("Monitor settings")
+            if self.language_page.pending_devices:
+                if self.writer.update_devices(self.language_page.pending_devices):
+                    counts['devices'] = 1
+                else:
+                    error_messages.append("Device settings")
+            if self.rules_page.pending_edits or self.rules_page.added:
+                if self.writer.update_window_rules(self.rules_page.pending_edits,
+                                                   self.rules_page.pending_additions):
+                    counts['rules'] = 1
+                else:
+                    error_messages.append("Window rules")
+            for spec, page in self._hooked_pages():
+                if not page.pending_paths():
+                    continue
+                if page.apply():
+                    counts[f"page:{spec.name}"] = 1
+                else:
+                    error_messages.append(spec.title)
+            return not error_messages
+        
+        def done(ok, errors):
+            if ok:
+                if 'resets' in counts:
+                    self.model.commit_resets()
+                    for key in self.reset_buttons:
+                        self._update_provenance(key)
+                if 'curves' in counts:
+                    self.appearance_page.curves_changed = False
+                if 'options' in counts:
+                    self.options_page.pending.clear()
+                if 'monitors' in counts:
+                    self.displays_page.pending_monitors.clear()
+                if 'devices' in counts:
+                    self.language_page.devices_applied()
+                if 'rules' in counts:
+                    self.rules_page.rules_applied()
+                for spec, page in self._hooked_pages():
+                    if f"page:{spec.name}" in counts and hasattr(page, 'applied'):
+                        page.applied()
                 toast = Adw.Toast(title=" All settings applied successfully!")
                 toast.set_timeout(3)
-            
-            self.toast_overlay.add_toast(toast)
-            
-        except Exception as e:
-            toast = Adw.Toast(title=f" Error: {str(e)}")
-            toast.set_timeout(4)
+            elif error_messages:
+                toast = Adw.Toast(title=f" Nothing applied, failed: {', '.join(error_messages)}")
+                toast.set_timeout(5)
+            else:
+                toast = Adw.Toast(title=f" Hyprland rejected the change, previous config restored: {errors[0][:80]}")
+                toast.set_timeout(6)
             self.toast_overlay.add_toast(toast)
+        
+        counts = {}
+        touched = [self.writer.config_dir / name for name in self._collect_pending_diffs()]
+        for spec, page in self._hooked_pages():
+            touched.extend(Path(path) for path in page.pending_paths())
+        self.apply_transaction = ApplyTransaction(self.writer, touched, on_done=done,
+                                                  on_rejected=self._on_config_errors)
+        self.apply_transaction.run(write)
     
     def _on_reload_hyprland(self, button):
         """Manually reload Hyprland"""
         try:
-            result = subprocess.run(
-                ['hyprctl', 'reload'],
-                check=False,
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
+            with tracer.span('hyprctl reload', 'ipc'):
+                result = subprocess.run(
+                    ['hyprctl', 'reload'],
+                    check=False,
+                    capture_output=True,
+                    text=True,
+                    timeout=5
+                )
             
             if result.returncode == 0:
                 toast = Adw.Toast(title=" Omarchy reloaded successfully")
@@ -1374,17 +7445,114 @@ class OmarchySettingsWindow(Adw.ApplicationWindow):
 
 
 class OmarchySettingsApp(Adw.Application):
-    """Main application class"""
+    """Main application class
     
-    def __init__(self):
-        super().__init__(application_id='com.omarchy.settings')
+    In daemon mode the process stays alive after its window closes, keeping the
+    parsed settings, file watchers and the hidden window in memory. Later
+    launches and CLI calls then talk to it over D-Bus instead of starting cold.
+    """
+    
+    APP_ID = SETTINGS_APP_ID
+    OBJECT_PATH = SETTINGS_OBJECT_PATH
+    
+    def __init__(self, daemon=False, config_dir=None):
+        super().__init__(application_id=self.APP_ID)
+        self.daemon = daemon
+        self.config_dir = Path(config_dir) if config_dir else default_config_dir()
+        self._store = None
+        self._events = None
+        self._monitors = None
+        self._devices = None
+        self._clients = None
+        self._pages = None
+        self.files = ParsedFiles()
+        self.catalog = HyprlandOptionCatalog()
+        self.service = None
         self.create_action('quit', self.on_quit, ['<primary>q'])
         self.create_action('about', self.on_about)
+    
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = OmarchySettingsStore(self.config_dir)
+            self._store.watch_files()
+        return self._store
+    
+    @property
+    def events(self):
+        if self._events is None:
+            self._events = HyprlandEventStream()
+            self._events.start()
+        return self._events
+    
+    @property
+    def monitors(self):
+        if self._monitors is None:
+            self._monitors = HyprctlSnapshot(
+                'monitors', self.events,
+                refresh_on=('monitoradded', 'monitoraddedv2', 'monitorremoved', 'monitorremovedv2')
+            )
+        return self._monitors
+    
+    @property
+    def devices(self):
+        """Input devices, re-queried only when something is plugged in or out"""
+        if self._devices is None:
+            self._devices = HyprctlSnapshot('devices')
+            self._devices.watch('/dev/input')
+        return self._devices
+    
+    @property
+    def clients(self):
+        """Open windows, refreshed when windows open, close or change state"""
+        if self._clients is None:
+            self._clients = HyprctlSnapshot(
+                'clients', self.events,
+                refresh_on=('openwindow', 'closewindow', 'windowtitlev2', 'movewindowv2',
+                            'changefloatingmode', 'fullscreen', 'pin')
+            )
+        return self._clients
+    
+    @property
+    def pages(self):
+        """Built-in pages plus installed plugins, found from metadata only"""
+        if self._pages is None:
+            self._pages = PageRegistry()
+            for spec in BUILTIN_PAGES:
+                self._pages.register(spec)
+            self._pages.discover()
+        return self._pages
+    
+    def do_startup(self):
+        Adw.Application.do_startup(self)
+        self.events.subscribe('configreloaded', self._on_config_reloaded)
+        if self.daemon:
+            self.hold()
+            self.store.watch_files()
+            print(f"🛰️ Omarchy settings daemon running on {self.APP_ID}")
+    
+    def _on_config_reloaded(self, event, data):
+        """Another tool reloaded Hyprland; pick up whatever it changed"""
+        self.store.reload()
+    
+    def do_dbus_register(self, connection, object_path):
+        Adw.Application.do_dbus_register(self, connection, object_path)
+        self.service = OmarchySettingsService(self.store)
+        self.service.register(connection, object_path)
+        return True
+    
+    def do_dbus_unregister(self, connection, object_path):
+        if self.service:
+            self.service.unregister()
+            self.service = None
+        Adw.Application.do_dbus_unregister(self, connection, object_path)
         
     def do_activate(self):
-        win = self.props.active_window
+        win = self.props.active_window or next(iter(self.get_windows()), None)
         if not win:
-            win = OmarchySettingsWindow(application=self)
+            with tracer.span('window.build', 'ui'):
+                win = OmarchySettingsWindow(application=self)
+            win.set_hide_on_close(self.daemon)
         win.present()
         
     def on_quit(self, action, param):
@@ -1404,11 +7572,238 @@ class OmarchySettingsApp(Adw.Application):
 
 
 
+def load_fleet_profile(path):
+    """Read a fleet profile and return (settings, errors)
+    
+    A profile is a JSON object whose keys are setting names such as
+    gaps_in or raw option paths such as misc:vfr. Everything is validated
+    here, once, before any root is touched.
+    """
+    try:
+        profile = json.loads(Path(path).read_text())
+    except (OSError, ValueError) as e:
+        return None, {'profile': str(e)}
+    if not isinstance(profile, dict) or not profile:
+        return None, {'profile': "must be a non-empty JSON object"}
+    errors = settings_validator.validate_all(
+        {key: value for key, value in profile.items() if key in SETTINGS_SCHEMA}
+    )
+    options = {key: value for key, value in profile.items() if key not in SETTINGS_SCHEMA}
+    if options:
+        errors.update(SettingsValidator(HyprlandOptionCatalog().schema()).validate_all(options))
+    return profile, errors
+
+
+def read_fleet_roots(path):
+    """Parse a roots file: one directory per line, optionally followed by reload
+    
+    `reload` reloads the Hyprland instance of the calling session after the
+    write; `reload=<instance signature>` targets another instance.
+    """
+    roots = []
+    for line in Path(path).read_text().splitlines():
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        root, _, flag = line.partition(' ')
+        flag = flag.strip()
+        if flag and flag != 'reload' and not flag.startswith('reload='):
+            raise ValueError(f"unknown flag {flag!r} for {root}")
+        roots.append((root, flag.partition('=')[2] or bool(flag)))
+    return roots
+
+
+def fleet_root(job):
+    """Parse, diff and write one config root; runs in a fleet worker process"""
+    root, profile, reload, dry_run = job
+    started = time.perf_counter()
+    report = {'root': root, 'changed': {}, 'skipped': {}, 'errors': [], 'diff': {},
+              'bytes': 0, 'reloaded': False}
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            _fleet_apply(Path(root).expanduser(), profile, reload, dry_run, report)
+    except Exception as e:
+        report['errors'].append(f"{type(e).__name__}: {e}")
+    report['errors'].extend(line.strip() for line in log.getvalue().splitlines()
+                            if line.startswith(('⚠️', 'Error')))
+    report['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 3)
+    return report
+
+
+def _fleet_apply(root, profile, reload, dry_run, report):
+    if not root.is_dir():
+        report['errors'].append("config directory does not exist")
+        return
+    writer = OmarchyConfigWriter(root)
+    pending = PendingChanges(writer)
+    settings = {}
+    options = {}
+    for key, value in profile.items():
+        if key in SETTINGS_SCHEMA:
+            path = writer._file_path(SETTINGS_SCHEMA[key]['file'])
+            if not path.exists():
+                report['skipped'][key] = f"no {path.name}"
+                continue
+            current = pending._document(path).get_value(SETTINGS_SCHEMA[key]['path'])
+            target = settings
+        else:
+            current = pending._document(writer._file_for_option(key, pending.documents)).get_value(key)
+            target = options
+        value_text = format_config_value(value)
+        if current == value_text:
+            report['skipped'][key] = "already set"
+            continue
+        target[key] = value
+        report['changed'][key] = [current, value_text]
+    
+    report['diff'] = pending.refresh(settings, options)
+    report['bytes'] = sum(len(document.text) for document in pending.documents.values())
+    if dry_run or not report['changed']:
+        return
+    with writer.deferred_reload():
+        written = ((not settings or writer.update_settings(settings))
+                   and (not options or writer.update_options(options)))
+    if not written:
+        report['errors'].append("writing failed")
+        return
+    if reload:
+        argv = ['hyprctl'] + (['-i', reload] if isinstance(reload, str) else []) + ['reload']
+        result = subprocess.run(argv, check=False, capture_output=True, text=True, timeout=10)
+        if result.returncode == 0:
+            report['reloaded'] = True
+        else:
+            report['errors'].append(f"reload failed: {(result.stderr or result.stdout).strip()}")
+
+
+def run_fleet(args):
+    """Apply one profile to many config roots in parallel and report per root"""
+    profile, errors = load_fleet_profile(args.profile)
+    if errors:
+        for key, error in errors.items():
+            print(f"⚠️ Rejected {key}: {error}", file=sys.stderr)
+        return 2
+    try:
+        roots = [(root, args.reload) for root in args.roots]
+        if args.roots_from:
+            roots += [(root, reload or args.reload) for root, reload in read_fleet_roots(args.roots_from)]
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Could not read roots: {e}", file=sys.stderr)
+        return 2
+    if not roots:
+        print("⚠️ No config roots given", file=sys.stderr)
+        return 2
+    
+    jobs = [(root, profile, reload, args.dry_run) for root, reload in roots]
+    workers = max(1, min(args.jobs or os.cpu_count() or 1, len(jobs)))
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        reports = []
+        for report in executor.map(fleet_root, jobs, chunksize=max(1, len(jobs) // (workers * 4))):
+            reports.append(report)
+            if report['errors']:
+                print(f"⚠️ {report['root']}: {report['errors'][0]}")
+            elif report['changed']:
+                reloaded = ", reloaded" if report['reloaded'] else ""
+                print(f"✅ {report['root']}: {len(report['changed'])} changed, "
+                      f"{len(report['skipped'])} skipped{reloaded}")
+            else:
+                print(f"·  {report['root']}: unchanged")
+            if args.diff:
+                for diff in report['diff'].values():
+                    print(diff, end='')
+    elapsed = time.perf_counter() - started
+    
+    failed = sum(1 for report in reports if report['errors'])
+    changed = sum(1 for report in reports if report['changed'] and not report['errors'])
+    megabytes = sum(report['bytes'] for report in reports) / (1024 * 1024)
+    summary = {
+        'roots': len(reports), 'changed': changed, 'unchanged': len(reports) - changed - failed,
+        'failed': failed, 'keys_changed': sum(len(report['changed']) for report in reports),
+        'workers': workers, 'dry_run': args.dry_run, 'seconds': round(elapsed, 3),
+        'roots_per_second': round(len(reports) / elapsed, 1) if elapsed else None,
+        'mb_per_second': round(megabytes / elapsed, 2) if elapsed else None,
+    }
+    print(f"{'Dry run' if args.dry_run else 'Fleet'}: {summary['roots']} roots in {elapsed:.2f} s "
+          f"with {workers} worker{'s' if workers != 1 else ''} ({summary['roots_per_second']} roots/s, "
+          f"{summary['mb_per_second']} MB/s) - {changed} changed, {summary['unchanged']} unchanged, "
+          f"{failed} failed")
+    if args.report:
+        Path(args.report).write_text(json.dumps({'summary': summary, 'roots': reports}, indent=2) + "\n")
+    return 1 if failed else 0
+
+
+def run_autostart(args):
+    """List the autostart entries, or dry-run and rank them with --profile"""
+    config_dir = Path(args.config_dir).expanduser() if args.config_dir else default_config_dir()
+    entries = read_autostart(LayeredConfig(config_dir))
+    if not args.profile:
+        for entry in entries:
+            where = f"{entry['file'].name}:{entry['line']}"
+            state = 'on ' if entry['enabled'] else 'off'
+            print(f"{state}  {entry['layer']:<7}  {entry['keyword']:<9}  {where:<22}  {entry['command']}")
+        return 0
+    
+    commands = AutostartProfiler.commands(entries)
+    if not commands:
+        print("⚠️ None of your own exec-once entries is enabled", file=sys.stderr)
+        return 1
+    if not args.yes:
+        print("These commands will run one at a time, without access to Hyprland, the session bus "
+              "or your display:", file=sys.stderr)
+        for command in commands:
+            print(f"  {command}", file=sys.stderr)
+        if not sys.stdin.isatty():
+            print("⚠️ Not a terminal; pass --yes to profile anyway", file=sys.stderr)
+            return 1
+        try:
+            answer = input("Profile them? [y/N] ")
+        except EOFError:
+            answer = ''
+        if answer.strip().lower() not in ('y', 'yes'):
+            return 1
+    profiler = AutostartProfiler(timeout=args.timeout)
+    results = []
+    try:
+        with profiler.sandbox():
+            for index, command in enumerate(commands, 1):
+                print(f"[{index}/{len(commands)}] {command}", file=sys.stderr, flush=True)
+                results.append(profiler.profile(command))
+    except KeyboardInterrupt:
+        profiler.cancel()
+        print("⚠️ Interrupted, showing what was measured", file=sys.stderr)
+    ranked = AutostartProfiler.ranked(results)
+    if args.json:
+        print(json.dumps(ranked, indent=2))
+        return 0
+    print(f"{'#':>3}  {'ready':>8}  {'CPU':>8}  {'RSS':>7}  {'share':>5}  command")
+    for rank, result in enumerate(ranked, 1):
+        ready = f"{result['ready_ms'] / 1000:.2f} s" if result['ready_ms'] is not None else "-"
+        if result['outcome'] == 'timeout':
+            ready = f">{ready}"
+        print(f"{rank:>3}  {ready:>8}  {result['cpu_ms']:>5} ms  {result['rss'] / (1024 * 1024):>4.0f} MB  "
+              f"{result['share']:>5.0%}  {result['command']}")
+        if result['outcome'] in ('failed', 'timeout') or result['status']:
+            print(f"{'':>3}  {AutostartProfiler.describe(result)}")
+    total = sum(result['ready_ms'] or 0 for result in ranked) / 1000
+    print(f"{len(ranked)} entries took {total:.2f} s to get ready one after another")
+    return 0
+
+
 def main():
     """Main entry point"""
-    app = OmarchySettingsApp()
-    return app.run(sys.argv)
+    args, remaining = build_arg_parser().parse_known_args(sys.argv[1:])
+    
+    if args.command == 'fleet':
+        return run_fleet(args)
+    if args.command == 'autostart':
+        return run_autostart(args)
+    if args.command:
+        return run_client(args)
+    
+    app = OmarchySettingsApp(daemon=args.daemon, config_dir=args.config_dir)
+    return app.run([sys.argv[0]] + remaining)
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Omarchy Settings - Parser/Writer Benchmark
+Generates synthetic Hyprland config corpora and measures OmarchyConfigParser
+and OmarchyConfigWriter. Runs offline against the stub hyprctl in tools/.
+
+Usage:
+    python3 tools/bench_config.py
+    python3 tools/bench_config.py --sizes 1K,100K --output bench_output.json
+    python3 tools/bench_config.py --compare old.json
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+TOOLS_DIR = Path(__file__).resolve().parent
+REPO_DIR = TOOLS_DIR.parent
+APP_PATH = REPO_DIR / "omarchy-control.py"
+
+DEFAULT_SIZES = "1K,10K,100K,1M,10M"
+
+LOOKNFEEL_HEAD = """\
+# Omarchy look and feel (synthetic benchmark corpus)
+general {
+    gaps_in = 5
+    gaps_out = 10
+    border_size = 2
+}
+
+decoration {
+    rounding = 20
+    rounding_power = 2
+
+    blur {
+        enabled = true
+        size = 10
+        passes = 4
+        noise = 0.0100
+        contrast = 1.3000
+        brightness = 1.1000
+        vibrancy = 0.6000
+        vibrancy_darkness = 0.2000
+        xray = false
+        new_optimizations = true
+    }
+
+    shadow {
+        enabled = true
+        range = 30
+        render_power = 3
+    }
+}
+
+animations {
+    enabled = true
+}
+"""
+
+INPUT_HEAD = """\
+# Omarchy input (synthetic benchmark corpus)
+input {
+    kb_layout = us,ara
+    kb_options = grp:alt_shift_toggle
+    repeat_rate = 40
+    repeat_delay = 600
+    numlock_by_default = true
+    sensitivity = 0.0
+
+    touchpad {
+        natural_scroll = false
+        scroll_factor = 0.4
+    }
+}
+"""
+
+APPLY_SETTINGS = {
+    'input': {
+        'kb_layout': 'us,de',
+        'kb_options': 'grp:caps_toggle',
+        'repeat_rate': 45,
+        'repeat_delay': 550,
+        'numlock_by_default': False,
+        'sensitivity': 0.25,
+        'touchpad_natural_scroll': True,
+        'touchpad_scroll_factor': 0.6,
+    },
+    'decoration': {
+        'blur_enabled': True,
+        'blur_size': 8,
+        'blur_passes': 3,
+        'blur_noise': 0.02,
+        'blur_contrast': 1.2,
+        'blur_brightness': 1.0,
+        'blur_vibrancy': 0.5,
+        'blur_vibrancy_darkness': 0.1,
+        'blur_xray': True,
+        'blur_new_optimizations': True,
+        'rounding': 12,
+        'shadow_enabled': False,
+        'shadow_range': 20,
+        'shadow_power': 2,
+    },
+    'general': {
+        'gaps_in': 4,
+        'gaps_out': 8,
+        'border_size': 1,
+    },
+}
+
+
+def load_app_module():
+    """Import omarchy-control.py as a module"""
+    spec = importlib.util.spec_from_file_location("omarchy_control", APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def parse_size(label):
+    """Turn a label like 10K or 1M into a byte count"""
+    label = label.strip().upper()
+    multiplier = 1
+    if label.endswith('K'):
+        multiplier = 1024
+        label = label[:-1]
+    elif label.endswith('M'):
+        multiplier = 1024 * 1024
+        label = label[:-1]
+    return int(float(label) * multiplier)
+
+
+def _filler_chunk(index):
+    """One block of comments, binds, includes and deeply nested sections"""
+    lines = [
+        f"# ---- generated section {index} ----",
+        "# Lorem ipsum comment lines mimic heavily documented dotfiles,",
+        "# including = signs, {braces} and key names like gaps_in = 99",
+        f"source = ~/.config/hypr/generated/part-{index}.conf",
+        f"source = ~/.local/share/omarchy/default/hypr/extra-{index}.conf",
+    ]
+    for n in range(16):
+        lines.append(f"bind = SUPER SHIFT, code:{10 + n}, exec, notify-send 'bench {index}.{n}'  # bind {n}")
+    lines.append(f"bindd = SUPER ALT, F{index % 12 + 1}, Bench {index}, exec, true")
+    depth = 6
+    for level in range(depth):
+        lines.append("    " * level + f"plugin_{index}_{level} {{")
+        lines.append("    " * (level + 1) + f"option_{level} = {index * level}  # nested")
+    for level in reversed(range(depth)):
+        lines.append("    " * level + "}")
+    lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+def build_corpus(root, target_bytes):
+    """Write a config directory whose looknfeel.conf is about target_bytes"""
+    root.mkdir(parents=True, exist_ok=True)
+
+    looknfeel = [LOOKNFEEL_HEAD]
+    size = len(LOOKNFEEL_HEAD)
+    index = 0
+    while size < target_bytes:
+        chunk = _filler_chunk(index)
+        looknfeel.append(chunk)
+        size += len(chunk)
+        index += 1
+    looknfeel_text = "".join(looknfeel)
+
+    input_parts = [INPUT_HEAD]
+    input_size = len(INPUT_HEAD)
+    input_target = max(target_bytes // 4, len(INPUT_HEAD))
+    while input_size < input_target:
+        chunk = _filler_chunk(index)
+        input_parts.append(chunk)
+        input_size += len(chunk)
+        index += 1
+    input_text = "".join(input_parts)
+
+    hyprland_text = "".join(
+        f"source = ~/.config/hypr/{name}.conf\n"
+        for name in ("monitors", "input", "bindings", "looknfeel", "autostart")
+    )
+
+    (root / "looknfeel.conf").write_text(looknfeel_text)
+    (root / "input.conf").write_text(input_text)
+    (root / "hyprland.conf").write_text(hyprland_text)
+    (root / "bindings.conf").write_text("".join(_filler_chunk(i) for i in range(64)))
+    return len(looknfeel_text) + len(input_text)
+
+
+def _timeit(func, repeat):
+    """Run func repeat times and return the durations in milliseconds"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def _summary(durations):
+    ordered = sorted(durations)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    return {
+        'median_ms': round(statistics.median(ordered), 4),
+        'p95_ms': round(ordered[p95_index], 4),
+        'min_ms': round(ordered[0], 4),
+        'runs': len(ordered),
+    }
+
+
+def parse_all(parser):
+    """Parse every section the GUI reads at startup"""
+    parser.parse_input_settings()
+    parser.parse_decoration_settings()
+    parser.parse_general_settings()
+    parser.parse_animations_settings()
+
+
+def apply_all(writer):
+    """Mirror the write sequence of OmarchySettingsWindow._on_apply_settings"""
+    writer.update_input_settings(APPLY_SETTINGS['input'])
+    writer.update_blur_settings(APPLY_SETTINGS['decoration'])
+    writer.update_decoration_settings(APPLY_SETTINGS['decoration'])
+    writer.update_general_settings(APPLY_SETTINGS['general'])
+    writer.update_decoration_settings({'rounding': APPLY_SETTINGS['decoration']['rounding']})
+
+
+def startup_parse(app, root, cache_dir):
+    """Parse the way a fresh launch does: new parser, on-disk cache only"""
+    parser = app.OmarchyConfigParser(root)
+    parser.layers.cache = app.ParseCache(cache_dir)
+    parse_all(parser)
+
+
+def bench_size(app, label, target_bytes, repeat, workdir):
+    """Run every measurement against one corpus size"""
+    root = workdir / label
+    corpus_bytes = build_corpus(root, target_bytes)
+    parser = app.OmarchyConfigParser(root)
+    writer = app.OmarchyConfigWriter(root)
+
+    parse_times = _timeit(lambda: parse_all(parser), repeat)
+    parse_median_s = statistics.median(parse_times) / 1000
+
+    cache_dir = workdir / f"{label}-cache"
+
+    def cold_start():
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        startup_parse(app, root, cache_dir)
+
+    cold_times = _timeit(cold_start, repeat)
+    cached_times = _timeit(lambda: startup_parse(app, root, cache_dir), repeat)
+
+    counter = iter(range(10 ** 9))
+    update_times = _timeit(
+        lambda: writer.update_general_settings({'gaps_in': next(counter) % 20}),
+        repeat
+    )
+    apply_times = _timeit(lambda: apply_all(writer), repeat)
+
+    build_corpus(root, target_bytes)
+    tracemalloc.start()
+    parse_all(parser)
+    apply_all(writer)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'size': label,
+        'bytes': corpus_bytes,
+        'parse': dict(_summary(parse_times), mb_per_s=round(
+            corpus_bytes / (1024 * 1024) / parse_median_s, 3) if parse_median_s else None),
+        'cold_start_parse': _summary(cold_times),
+        'cached_start_parse': _summary(cached_times),
+        'single_key_update': _summary(update_times),
+        'full_apply': _summary(apply_times),
+        'peak_memory_kib': round(peak / 1024, 1),
+    }
+
+
+def _git_revision():
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=REPO_DIR, capture_output=True, text=True, timeout=5, check=False
+        )
+        return result.stdout.strip() or None
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+
+
+def print_report(report, baseline=None):
+    """Print a readable table, with deltas against a previous run if given"""
+    previous = {}
+    if baseline:
+        previous = {r['size']: r for r in baseline.get('results', [])}
+
+    print(f"{'size':>6} {'bytes':>10} {'parse MB/s':>11} {'parse ms':>10} {'cold ms':>10} "
+          f"{'cached ms':>10} {'update ms':>10} {'apply ms':>10} {'peak KiB':>10}")
+    for r in report['results']:
+        line = (f"{r['size']:>6} {r['bytes']:>10} {r['parse']['mb_per_s'] or 0:>11.2f} "
+                f"{r['parse']['median_ms']:>10.3f} {r['cold_start_parse']['median_ms']:>10.3f} "
+                f"{r['cached_start_parse']['median_ms']:>10.3f} {r['single_key_update']['median_ms']:>10.3f} "
+                f"{r['full_apply']['median_ms']:>10.3f} {r['peak_memory_kib']:>10.1f}")
+        old = previous.get(r['size'])
+        if old:
+            def delta(new, before):
+                return f"{(new - before) / before * 100:+.1f}%" if before else "n/a"
+            line += (f"   parse {delta(r['parse']['median_ms'], old['parse']['median_ms'])}"
+                     f" update {delta(r['single_key_update']['median_ms'], old['single_key_update']['median_ms'])}"
+                     f" apply {delta(r['full_apply']['median_ms'], old['full_apply']['median_ms'])}"
+                     f" peak {delta(r['peak_memory_kib'], old['peak_memory_kib'])}")
+        print(line)
+
+
+def main():
+    """Main entry point"""
+    arg_parser = argparse.ArgumentParser(description=__doc__,
+                                         formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                            help=f"comma separated corpus sizes (default {DEFAULT_SIZES})")
+    arg_parser.add_argument('--repeat', type=int, default=5,
+                            help="runs per measurement (default 5)")
+    arg_parser.add_argument('--output', default='bench_output.json',
+                            help="where to save the JSON results")
+    arg_parser.add_argument('--compare', metavar='JSON',
+                            help="previous results file to compare against")
+    args = arg_parser.parse_args()
+
+    os.environ['PATH'] = f"{TOOLS_DIR}{os.pathsep}{os.environ.get('PATH', '')}"
+
+    app = load_app_module()
+    labels = [s for s in args.sizes.split(',') if s.strip()]
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="omarchy-bench-") as tmp:
+        for label in labels:
+            print(f"⏱️ Benchmarking {label} corpus...", file=sys.stderr)
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                results.append(bench_size(app, label.strip().upper(), parse_size(label),
+                                          max(1, args.repeat), Path(tmp)))
+
+    report = {
+        'meta': {
+            'revision': _git_revision(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+
+    print_report(report, baseline)
+    Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    print(f"Results saved to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
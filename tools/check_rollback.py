@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Omarchy Settings - Apply/Rollback Check
+Runs ApplyTransaction against the stub hyprctl in tools/ once per injected
+failure and checks that rejected changes leave the config files untouched.
+
+Usage:
+    python3 tools/check_rollback.py
+    python3 tools/check_rollback.py --budget-ms 500
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+TOOLS_DIR = Path(__file__).resolve().parent
+REPO_DIR = TOOLS_DIR.parent
+APP_PATH = REPO_DIR / "omarchy-control.py"
+
+LOOKNFEEL = """\
+general {
+    gaps_in = 5  # inner gaps
+    gaps_out = 10
+}
+"""
+
+# (name, HYPRCTL_STUB_FAIL, change expected to stay on disk)
+SCENARIOS = [
+    ("accepted", "", True),
+    ("reload fails", "reload", False),
+    ("config errors", "configerrors", False),
+    ("no answer", "hang", False),
+]
+
+
+def load_app_module():
+    """Import omarchy-control.py as a module"""
+    spec = importlib.util.spec_from_file_location("omarchy_control", APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_scenario(app, root, failure, budget_ms):
+    """Apply one change under an injected failure; return (ok, errors, file text)"""
+    root.mkdir(parents=True, exist_ok=True)
+    path = root / "looknfeel.conf"
+    path.write_text(LOOKNFEEL)
+    os.environ['HYPRCTL_STUB_FAIL'] = failure
+    os.environ['HYPRCTL_STUB_HANG'] = str(budget_ms / 1000 * 3)
+
+    writer = app.OmarchyConfigWriter(root)
+    loop = app.GLib.MainLoop()
+    outcome = {}
+
+    def done(ok, errors):
+        outcome['ok'] = ok
+        outcome['errors'] = errors
+        loop.quit()
+
+    transaction = app.ApplyTransaction(writer, [path], budget_ms=budget_ms, on_done=done)
+    transaction.run(lambda: writer.update_settings({'gaps_in': 7}))
+    if not transaction.finished:
+        loop.run()
+    return outcome['ok'], outcome['errors'], path.read_text()
+
+
+def main():
+    """Main entry point"""
+    arg_parser = argparse.ArgumentParser(description=__doc__,
+                                         formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--budget-ms', type=int, default=1000,
+                            help="time budget given to each apply (default 1000)")
+    args = arg_parser.parse_args()
+
+    os.environ['PATH'] = f"{TOOLS_DIR}{os.pathsep}{os.environ.get('PATH', '')}"
+    app = load_app_module()
+
+    failures = 0
+    with tempfile.TemporaryDirectory(prefix="omarchy-rollback-") as tmp:
+        for index, (name, failure, kept) in enumerate(SCENARIOS):
+            ok, errors, text = run_scenario(app, Path(tmp) / str(index), failure, args.budget_ms)
+            changed = text != LOOKNFEEL
+            passed = ok == kept and changed == kept
+            failures += not passed
+            detail = errors[0] if errors else "applied"
+            print(f"{'PASS' if passed else 'FAIL'}  {name:<14} {detail}")
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Omarchy Settings - Fake Hyprland Event Socket
+Serves a recorded event log the way Hyprland's .socket2.sock does, so the
+event stream can be exercised without a compositor.
+
+Usage:
+    python3 tools/fake_socket2.py tools/events-sample.log --socket /tmp/fake-socket2.sock
+    OMARCHY_HYPR_SOCKET2=/tmp/fake-socket2.sock python3 omarchy-control.py
+"""
+
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+
+def replay(conn, lines, delay, loop):
+    """Send every event line to one client"""
+    try:
+        while True:
+            for line in lines:
+                conn.sendall((line + "\n").encode())
+                time.sleep(delay)
+            if not loop:
+                break
+    except OSError:
+        pass
+    finally:
+        conn.close()
+
+
+def main():
+    """Main entry point"""
+    arg_parser = argparse.ArgumentParser(description=__doc__,
+                                         formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('log', help="file with one event>>data line per event")
+    arg_parser.add_argument('--socket', default='/tmp/omarchy-fake-socket2.sock',
+                            help="unix socket path to listen on")
+    arg_parser.add_argument('--delay', type=float, default=0.5,
+                            help="seconds between events (default 0.5)")
+    arg_parser.add_argument('--loop', action='store_true', help="replay the log forever")
+    args = arg_parser.parse_args()
+
+    lines = [line for line in Path(args.log).read_text().splitlines()
+             if line.strip() and not line.startswith('#')]
+
+    if os.path.exists(args.socket):
+        os.unlink(args.socket)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(args.socket)
+    server.listen()
+    print(f"Replaying {len(lines)} events on {args.socket}", file=sys.stderr)
+
+    try:
+        while True:
+            conn, _ = server.accept()
+            threading.Thread(target=replay, args=(conn, lines, args.delay, args.loop),
+                             daemon=True).start()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        os.unlink(args.socket)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Omarchy Settings - Concurrent Writer Stress Test
+Starts many processes that edit the same config file through
+OmarchyConfigWriter at once, optionally alongside an "editor" that rewrites
+the file without taking the lock, and checks that no update was lost.
+
+Usage:
+    python3 tools/stress_writers.py
+    python3 tools/stress_writers.py --writers 16 --rounds 50
+    python3 tools/stress_writers.py --no-editor
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+TOOLS_DIR = Path(__file__).resolve().parent
+REPO_DIR = TOOLS_DIR.parent
+APP_PATH = REPO_DIR / "omarchy-control.py"
+
+LOOKNFEEL = """\
+# Stress test corpus
+general {
+    gaps_in = 5  # inner gaps
+    gaps_out = 10
+}
+
+plugin {
+    stress {
+        enabled = true
+    }
+}
+"""
+
+
+def load_app_module():
+    """Import omarchy-control.py as a module"""
+    spec = importlib.util.spec_from_file_location("omarchy_control", APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_writer(root, index, rounds, start, failures):
+    """Set this writer's own key once per round through the app's writer"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        app = load_app_module()
+        writer = app.OmarchyConfigWriter(root)
+        start.wait()
+        with writer.deferred_reload():
+            for value in range(rounds):
+                if not writer.update_options({f'plugin:stress:writer_{index}': value}):
+                    with failures.get_lock():
+                        failures.value += 1
+
+
+def run_editor(path, rounds, start):
+    """Append comment lines the way an editor saves: read, rename over, no lock"""
+    start.wait()
+    for line in range(rounds):
+        text = Path(path).read_text()
+        temporary = f"{path}.editor"
+        Path(temporary).write_text(f"{text}# editor line {line}\n")
+        os.replace(temporary, path)
+        time.sleep(0.01)
+
+
+def run_round(app, root, writers, rounds, editor):
+    """Run one contention round and return a list of problems found"""
+    root.mkdir(parents=True, exist_ok=True)
+    path = root / "looknfeel.conf"
+    path.write_text(LOOKNFEEL)
+
+    context = multiprocessing.get_context('spawn')
+    start = context.Event()
+    failures = context.Value('i', 0)
+    processes = [
+        context.Process(target=run_writer, args=(str(root), index, rounds, start, failures))
+        for index in range(writers)
+    ]
+    if editor:
+        processes.append(context.Process(target=run_editor, args=(str(path), rounds, start)))
+    for process in processes:
+        process.start()
+    start.set()
+    for process in processes:
+        process.join()
+
+    problems = []
+    if failures.value:
+        problems.append(f"{failures.value} writes reported failure")
+    text = path.read_text()
+    document = app.HyprConfDocument(text, path)
+    for index in range(writers):
+        nodes = document.find_all(f'plugin:stress:writer_{index}')
+        if len(nodes) != 1:
+            problems.append(f"writer_{index} appears {len(nodes)} times")
+        elif not editor and nodes[0].value != str(rounds - 1):
+            problems.append(f"writer_{index} lost updates: ended at {nodes[0].value}")
+    if editor:
+        missing = [line for line in range(rounds) if f"# editor line {line}\n" not in text]
+        if missing:
+            problems.append(f"{len(missing)} editor lines were clobbered")
+    for untouched in ('general:gaps_in', 'general:gaps_out', 'plugin:stress:enabled'):
+        if document.get(untouched) is None:
+            problems.append(f"{untouched} disappeared")
+    return problems
+
+
+def main():
+    """Main entry point"""
+    arg_parser = argparse.ArgumentParser(description=__doc__,
+                                         formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--writers', type=int, default=8,
+                            help="concurrent writer processes (default 8)")
+    arg_parser.add_argument('--rounds', type=int, default=25,
+                            help="updates per writer (default 25)")
+    arg_parser.add_argument('--no-editor', action='store_true',
+                            help="skip the round with a writer that ignores the lock")
+    args = arg_parser.parse_args()
+
+    os.environ['PATH'] = f"{TOOLS_DIR}{os.pathsep}{os.environ.get('PATH', '')}"
+    app = load_app_module()
+
+    scenarios = [("locked writers", False)]
+    if not args.no_editor:
+        scenarios.append(("with editor", True))
+
+    failed = 0
+    with tempfile.TemporaryDirectory(prefix="omarchy-stress-") as tmp:
+        for index, (name, editor) in enumerate(scenarios):
+            started = time.perf_counter()
+            problems = run_round(app, Path(tmp) / str(index), args.writers, args.rounds, editor)
+            elapsed = time.perf_counter() - started
+            failed += bool(problems)
+            kept = f"{args.writers * args.rounds} updates"
+            if editor:
+                kept += f" and {args.rounds} unlocked saves"
+            detail = problems[0] if problems else f"{kept} merged"
+            print(f"{'PASS' if not problems else 'FAIL'}  {name:<15} {detail} ({elapsed:.1f} s)")
+            for problem in problems[1:]:
+                print(f"      {problem}")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())